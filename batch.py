@@ -0,0 +1,340 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+from lexer import TOKEN_VALUES
+from parse import Node, Parser
+from tableau_procedure import check_validity_of
+
+# Operation codes of the serialized formulas.
+TYPES = ("VARIABLE", "TRUE", "FALSE", "NOT", "AND", "OR", "IMPLIES", "NECESSARILY", "POSSIBLY")
+OPCODES = {type: code for code, type in enumerate(TYPES)}
+
+
+def encode(formula: Node) -> tuple:
+    """
+    Serializes a formula compactly.
+
+    Every distinct subformula becomes one item, after the items of its
+    operands: a variable is its name and any other node is its operation
+    code followed by the positions of its operands. Shared subformulas are
+    sent once and no Node is pickled.
+
+    Parameters
+    ----------
+    formula: Node
+        Formula to serialize.
+
+    Returns
+    -------
+    tuple
+        Items of the formula, in postorder.
+
+    """
+    positions = {}
+    items = []
+    stack = [formula]
+    while stack:
+        node = stack[-1]
+        if node in positions:
+            stack.pop()
+            continue
+        pending = [arg for arg in node.args if arg not in positions]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        positions[node] = len(items)
+        if node.type == "VARIABLE":
+            items.append(node.value)
+        else:
+            items.append((OPCODES[node.type],) + tuple(positions[arg] for arg in node.args))
+    return tuple(items)
+
+
+def decode(items: tuple) -> Node:
+    """
+    Rebuilds a formula serialized by encode.
+
+    Parameters
+    ----------
+    items: tuple
+        Items of the formula, in postorder.
+
+    Returns
+    -------
+    Node
+        Formula.
+
+    """
+    nodes = []
+    for item in items:
+        if isinstance(item, str):
+            nodes.append(Node("VARIABLE", item))
+        else:
+            type = TYPES[item[0]]
+            nodes.append(Node(type, TOKEN_VALUES[type], args=tuple(nodes[i] for i in item[1:])))
+    return nodes[-1]
+
+
+class BatchResult:
+    """
+    Encapsulate the result of one formula of a batch.
+
+    Attributes
+    ----------
+    index: int
+        Position of the formula in the batch.
+    valid: bool
+        Validity of the formula, None if it could not be checked.
+    model: KripkeModel
+        Model returned with the verdict, if asked for.
+    error: str
+        Why the formula could not be checked, or None.
+    time: float
+        Seconds spent on the formula by its worker.
+
+    Methods
+    -------
+    __repr__(self)
+        Returns the string representation of the result.
+
+    """
+
+    def __init__(self, index: int, valid: bool = None, model=None, error: str = None, time: float = 0.0):
+        self.index = index
+        self.valid = valid
+        self.model = model
+        self.error = error
+        self.time = time
+
+    def __repr__(self) -> str:
+        """
+        Returns the string representation of the result.
+
+        Returns
+        -------
+        str
+            String representation of the result.
+
+        """
+        if self.error is not None:
+            return f"BatchResult({self.index}, error={self.error!r})"
+        return f"BatchResult({self.index}, {self.valid}, {self.time:.6f}s)"
+
+
+def worker_loop(connection, with_model: bool, preprocess: bool) -> None:
+    """
+    Checks the chunks of formulas received on a connection and sends back
+    one result per formula as soon as it is known.
+
+    Parameters
+    ----------
+    connection: Connection
+        Connection to the parent process.
+    with_model: bool
+        Send the model with every verdict.
+    preprocess: bool
+        Simplify formulas before checking them.
+
+    Returns
+    -------
+    None
+
+    """
+    parser = Parser()
+    while True:
+        try:
+            chunk = connection.recv()
+        except EOFError:
+            return
+        if chunk is None:
+            return
+        for index, payload in chunk:
+            start = time.perf_counter()
+            try:
+                formula = parser.parse_text(payload) if isinstance(payload, str) else decode(payload)
+            except SyntaxError as e:
+                connection.send((index, None, None, str(e), time.perf_counter() - start))
+                continue
+            valid, model = check_validity_of(formula, preprocess=preprocess)
+            connection.send((index, valid, model if with_model else None, None, time.perf_counter() - start))
+
+
+class Worker:
+    """
+    Encapsulate a worker process of check_many.
+
+    Attributes
+    ----------
+    process: multiprocessing.Process
+        Worker process.
+    connection: Connection
+        Connection to the worker process.
+    tasks: deque
+        Tasks sent to the worker and not answered yet, in order.
+    started: float
+        Time the task in progress was started at.
+
+    Methods
+    -------
+    submit(self, chunk)
+        Sends a chunk of tasks to the worker.
+    kill(self)
+        Stops the worker process at once.
+
+    """
+
+    def __init__(self, context, with_model: bool, preprocess: bool):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=worker_loop, args=(child, with_model, preprocess), daemon=True)
+        self.process.start()
+        child.close()
+        self.tasks = deque()
+        self.started = 0.0
+
+    def submit(self, chunk: list) -> None:
+        """
+        Sends a chunk of tasks to the worker.
+
+        Parameters
+        ----------
+        chunk: list
+            Pairs of index and formula text or serialized formula.
+
+        Returns
+        -------
+        None
+
+        """
+        self.tasks.extend(chunk)
+        self.started = time.monotonic()
+        self.connection.send(chunk)
+
+    def kill(self) -> None:
+        """
+        Stops the worker process at once.
+
+        Returns
+        -------
+        None
+
+        """
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+def check_many(formulas, workers: int = None, chunksize: int = 16, timeout: float = None, ordered: bool = True, with_model: bool = False, preprocess: bool = False):
+    """
+    Checks the validity of many formulas on a pool of processes.
+
+    Formulas are given as text, parsed by the workers, or as Nodes, sent in
+    the compact form of encode. They are read lazily and sent in chunks, and
+    every worker answers each formula as soon as it is checked. A formula
+    that takes longer than timeout seconds gets a "timeout" error: its worker
+    is killed and replaced, and the rest of its chunk is checked again.
+
+    Parameters
+    ----------
+    formulas: Iterable
+        Formulas, as str or Node.
+    workers: int
+        Number of processes, the number of CPUs by default.
+    chunksize: int
+        Number of formulas sent to a worker at once.
+    timeout: float
+        Seconds a formula may take, unlimited if None.
+    ordered: bool
+        Yield the results in the order of the formulas, else as they come.
+    with_model: bool
+        Send the model back with every verdict.
+    preprocess: bool
+        Simplify formulas before checking them.
+
+    Returns
+    -------
+    Iterator[BatchResult]
+        One result per formula.
+
+    """
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context()
+    tasks = enumerate(formulas)
+    retries = deque()
+    done = {}
+    next_index = 0
+    pool = []
+
+    def next_chunk() -> list:
+        chunk = []
+        while retries and len(chunk) < chunksize:
+            chunk.append(retries.popleft())
+        for index, formula in tasks:
+            chunk.append((index, formula if isinstance(formula, str) else encode(formula)))
+            if len(chunk) == chunksize:
+                break
+        return chunk
+
+    def replace(worker: Worker, error: str) -> BatchResult:
+        worker.kill()
+        index = worker.tasks.popleft()[0]
+        retries.extendleft(reversed(worker.tasks))
+        pool[pool.index(worker)] = Worker(context, with_model, preprocess)
+        return BatchResult(index, error=error)
+
+    try:
+        for _ in range(workers):
+            chunk = next_chunk()
+            if not chunk:
+                break
+            pool.append(Worker(context, with_model, preprocess))
+            pool[-1].submit(chunk)
+
+        while any(worker.tasks for worker in pool):
+            busy = [worker for worker in pool if worker.tasks]
+            wait_for = None
+            if timeout is not None:
+                wait_for = max(0.0, min(worker.started for worker in busy) + timeout - time.monotonic())
+            ready = wait([worker.connection for worker in busy], wait_for)
+            results = []
+            for worker in busy:
+                if worker.connection in ready:
+                    try:
+                        index, valid, model, error, elapsed = worker.connection.recv()
+                    except EOFError:
+                        results.append(replace(worker, "worker died"))
+                        continue
+                    worker.tasks.popleft()
+                    worker.started = time.monotonic()
+                    results.append(BatchResult(index, valid, model, error, elapsed))
+                elif timeout is not None and time.monotonic() - worker.started > timeout:
+                    results.append(replace(worker, "timeout"))
+            for worker in pool:
+                if not worker.tasks:
+                    chunk = next_chunk()
+                    if chunk:
+                        worker.submit(chunk)
+            for result in results:
+                if not ordered:
+                    yield result
+                    continue
+                done[result.index] = result
+                while next_index in done:
+                    yield done.pop(next_index)
+                    next_index += 1
+    finally:
+        for worker in pool:
+            if worker.tasks:
+                worker.kill()
+            else:
+                try:
+                    worker.connection.send(None)
+                except OSError:
+                    pass
+                worker.process.join(1)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                worker.connection.close()
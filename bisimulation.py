@@ -0,0 +1,181 @@
+"""
+Minimization of Kripke models up to bisimulation.
+
+Bisimilar worlds satisfy the same modal formulas, so merging them keeps a
+countermodel a countermodel. The coarsest bisimulation is computed by
+Paige-Tarjan partition refinement in O(m log n) for n worlds and m edges:
+blocks are split against the smaller half of a compound block each time,
+and the number of successors every world has in a compound block is kept
+on its edges, so a three-way split never rescans the larger half.
+"""
+from tableau_procedure import KripkeModel
+
+
+def initial_partition(model: KripkeModel) -> list:
+    """
+    Groups the worlds by valuation and by whether they have successors, the
+    coarsest partition stable with respect to the set of all worlds.
+
+    Parameters
+    ----------
+    model: KripkeModel
+        Model to partition.
+
+    Returns
+    -------
+    list
+        Sets of world ids.
+
+    """
+    has_successors = set(model.sources)
+    groups = {}
+    for world, bits in enumerate(model.valuations):
+        groups.setdefault((bits, world in has_successors), set()).add(world)
+    return list(groups.values())
+
+
+def coarsest_partition(model: KripkeModel) -> list:
+    """
+    Computes the coarsest bisimulation of a model, by Paige-Tarjan partition
+    refinement.
+
+    Blocks are sets of worlds, kept in a list with the index of the block
+    of every world. Compound blocks are sets of block indices; the blocks
+    are stable with respect to every compound block. Every edge x -> y
+    points to a counter shared by the edges of x into the compound block of
+    y, holding their number.
+
+    Parameters
+    ----------
+    model: KripkeModel
+        Model to partition.
+
+    Returns
+    -------
+    list
+        Index of the block of every world, numbered in order of first world.
+
+    """
+    size = len(model)
+    sources = model.sources
+    blocks = initial_partition(model)
+    block_of = [0] * size
+    for index, block in enumerate(blocks):
+        for world in block:
+            block_of[world] = index
+
+    predecessors = [[] for _ in range(size)]
+    for edge, target in enumerate(model.targets):
+        predecessors[target].append(edge)
+    counters = {}
+    counter_of = [None] * len(sources)
+    for edge, source in enumerate(sources):
+        counter = counters.get(source)
+        if counter is None:
+            counter = counters[source] = [0]
+        counter[0] += 1
+        counter_of[edge] = counter
+
+    compound_of = [0] * len(blocks)
+    compounds = [set(range(len(blocks)))]
+    # Compound blocks made of more than one block, to split.
+    pending = [0]
+    queued = {0}
+    while pending:
+        compound = compounds[pending[-1]]
+        if len(compound) < 2:
+            queued.discard(pending.pop())
+            continue
+        blocks_in = iter(compound)
+        first, second = next(blocks_in), next(blocks_in)
+        splitter = first if len(blocks[first]) <= len(blocks[second]) else second
+        compound.discard(splitter)
+        compound_of[splitter] = len(compounds)
+        compounds.append({splitter})
+
+        # Number of successors in the splitter and counter of the compound
+        # block, for every predecessor of the splitter.
+        inside = {}
+        outer = {}
+        edges = []
+        for world in blocks[splitter]:
+            for edge in predecessors[world]:
+                source = sources[edge]
+                inside[source] = inside.get(source, 0) + 1
+                outer[source] = counter_of[edge]
+                edges.append(edge)
+
+        # Three-way split of every block: predecessors of the splitter only,
+        # of both the splitter and the rest of the compound block, of neither.
+        parts = {}
+        for source, count in inside.items():
+            block = block_of[source]
+            both = outer[source][0] > count
+            split = parts.get(block)
+            if split is None:
+                split = parts[block] = [None, None]
+            if split[both] is None:
+                split[both] = len(blocks)
+                blocks.append(set())
+                compound_of.append(compound_of[block])
+                compounds[compound_of[block]].add(split[both])
+            blocks[block].discard(source)
+            blocks[split[both]].add(source)
+            block_of[source] = split[both]
+        for block in parts:
+            parent = compound_of[block]
+            if not blocks[block]:
+                compounds[parent].discard(block)
+            if len(compounds[parent]) > 1 and parent not in queued:
+                queued.add(parent)
+                pending.append(parent)
+
+        # Counters of the splitter, split off from the counters of the rest.
+        split_counters = {}
+        for source, count in inside.items():
+            outer[source][0] -= count
+            split_counters[source] = [count]
+        for edge in edges:
+            counter_of[edge] = split_counters[sources[edge]]
+
+    numbers = {}
+    return [numbers.setdefault(block_of[world], len(numbers)) for world in range(size)]
+
+
+def minimize(model: KripkeModel) -> tuple:
+    """
+    Merges the bisimilar worlds of a model.
+
+    Every world of the quotient is named after the first world of its
+    class, and the class of the first world, the root of a countermodel,
+    is the first world of the quotient.
+
+    Parameters
+    ----------
+    model: KripkeModel
+        Model to minimize.
+
+    Returns
+    -------
+    tuple
+        Quotient model and the id of the world of the quotient of every
+        world of model, by world id.
+
+    """
+    mapping = coarsest_partition(model)
+    quotient = KripkeModel()
+    quotient.atoms = list(model.atoms)
+    quotient.atom_ids = dict(model.atom_ids)
+    first = {}
+    for world, block in enumerate(mapping):
+        if block not in first:
+            first[block] = world
+            quotient.new_world(model.names[world])
+            quotient.valuations[block] = model.valuations[world]
+    for block, world in first.items():
+        seen = set()
+        for successor in model.successors(world):
+            if mapping[successor] not in seen:
+                seen.add(mapping[successor])
+                quotient.connect(block, mapping[successor])
+    return quotient, mapping
@@ -1,5 +1,5 @@
 import re
-from typing import List
+from typing import Iterator
 
 class Token:
     """
@@ -11,45 +11,89 @@ class Token:
         Token Type.
     value: str
         Token Value.
+    pos: int
+        Offset of the token in the text.
 
     Methods
     -------
-    __init__(self, type, value)
+    __init__(self, type, value, pos=None)
         Initialize the Token.
+    __eq__(self, other)
+        Compare the type and value of two tokens.
     __repr__(self)
         Return the Token.
 
     """
-    def __init__(self, type: str, value: str):
+    __slots__ = ("type", "value", "pos")
+
+    def __init__(self, type: str, value: str, pos: int = None):
         self.type = type
         self.value = value
+        self.pos = pos
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Token):
+            return self.type == other.type and self.value == other.value
+        return NotImplemented
+
+    __hash__ = None
 
     def __repr__(self) -> str:
         return f"Token({self.type}, {self.value})"
 
+# One alternative per token type; every match skips the whitespace before the
+# token. "v" is tried as OR before variables, so it only starts a variable when
+# it follows other letters, as in "xvy".
+TOKEN_PATTERN = re.compile(r"""\s*(?:
+    (?P<LPAREN>\()
+   |(?P<RPAREN>\))
+   |(?P<NOT>[~¬!])
+   |(?P<AND>[\^∧&])
+   |(?P<OR>[|∨vV])
+   |(?P<IMPLIES>->|[→⇒])
+   |(?P<NECESSARILY>[□◻]|\[\])
+   |(?P<POSSIBLY>[◇◊]|<>)
+   |(?P<TRUE>⊤)
+   |(?P<FALSE>⊥)
+   |(?P<VARIABLE>[a-z]+)
+   |(?P<ERROR>\S)
+   |(?P<END>\Z)
+)""", re.VERBOSE)
+
+TOKEN_VALUES = {
+    "LPAREN": "(",
+    "RPAREN": ")",
+    "NOT": "~",
+    "AND": "^",
+    "OR": "|",
+    "IMPLIES": "->",
+    "NECESSARILY": "□",
+    "POSSIBLY": "◇",
+    "TRUE": "⊤",
+    "FALSE": "⊥",
+}
+
 class Lexer:
     """
     Lexer class.
 
+    The text is scanned by a single precompiled pattern and tokens are
+    produced lazily, so a parser can consume them without a token list being
+    built.
+
     Attributes
     ----------
     text: str
         Text to be tokenized.
-    pos: int
-        Current position in the text.
-    current_char: str
-        Current character in the text.
+    stream: Iterator[Token]
+        Tokens not yet returned by get_next_token.
 
     Methods
     -------
     __init__(self, text)
         Initialize the Lexer.
-    error(self)
+    error(self, pos)
         Raise the SyntaxError.
-    advance(self)
-        Advance the position.
-    skip_whitespace(self)
-        Skip the whitespace.
     get_next_token(self)
         Return the next token.
     tokenize(self)
@@ -58,46 +102,25 @@ class Lexer:
     """
     def __init__(self, text: str):
         self.text = text
-        self.pos = 0
-        self.current_char = self.text[self.pos]
+        self.stream = None
 
-    def error(self) -> None:
+    def error(self, pos: int = None) -> None:
         """
         Raise the SyntaxError.
 
-        Returns
-        -------
-        None
-
-        """
-        raise SyntaxError("Invalid syntax")
-
-    def advance(self) -> None:
-        """
-        Advance the position.
+        Parameters
+        ----------
+        pos: int
+            Offset of the invalid character.
 
         Returns
         -------
         None
 
         """
-        self.pos += 1
-        if self.pos > len(self.text) - 1:
-            self.current_char = None
-        else:
-            self.current_char = self.text[self.pos]
-
-    def skip_whitespace(self) -> None:
-        """
-        Skip the whitespace.
-
-        Returns
-        -------
-        None
-
-        """
-        while self.current_char is not None and self.current_char.isspace():
-            self.advance()
+        if pos is None:
+            raise SyntaxError("Invalid syntax")
+        raise SyntaxError(f"Invalid syntax at position {pos}")
 
     def get_next_token(self) -> Token:
         """
@@ -109,78 +132,26 @@ class Lexer:
             Next Token.
 
         """
-        while self.current_char is not None:
-            if self.current_char.isspace():
-                self.skip_whitespace()
-                continue
-            if self.current_char == '(':
-                self.advance()
-                return Token("LPAREN", "(")
-            elif self.current_char == ')':
-                self.advance()
-                return Token("RPAREN", ")")
-            elif self.current_char in ['~','¬','!']:
-                self.advance()
-                return Token("NOT", "~")
-            elif self.current_char in ['^','∧','&']:
-                self.advance()
-                return Token("AND", "^")
-            elif self.current_char in ['|','∨','v','V']:
-                self.advance()
-                return Token("OR", "|")
-            elif self.current_char == '-':
-                self.advance()
-                if self.current_char == '>':
-                    self.advance()
-                    return Token("IMPLIES", "->")
-                else:
-                    self.error()
-            elif self.current_char in ['→','⇒']:
-                self.advance()
-                return Token("IMPLIES", "->")
-            elif self.current_char in ['□','◻']:
-                self.advance()
-                return Token("NECESSARILY", "□")
-            elif self.current_char == '[':
-                self.advance()
-                if self.current_char == ']':
-                    self.advance()
-                    return Token("NECESSARILY", "□")
-                else:
-                    self.error()
-            elif self.current_char in ['◇','◊']:
-                self.advance()
-                return Token("POSSIBLY", "◇")
-            elif self.current_char == '<':
-                self.advance()
-                if self.current_char == '>':
-                    self.advance()
-                    return Token("POSSIBLY", "◇")
-                else:
-                    self.error()
-            elif re.match("[a-z]", self.current_char):
-                var = ""
-                while self.current_char is not None and re.match("[a-z]", self.current_char):
-                    var += self.current_char
-                    self.advance()
-                return Token("VARIABLE", var)
-            else:
-                self.error()
-        return Token("None", None)
-
-    def tokenize(self) -> List[Token]:
+        if self.stream is None:
+            self.stream = self.tokenize()
+        return next(self.stream, None) or Token("None", None, len(self.text))
+
+    def tokenize(self) -> Iterator[Token]:
         """
         Tokenize the text.
 
         Returns
         -------
-        List[Token]
-            List of Token.
+        Iterator[Token]
+            Tokens, in order, produced as they are scanned.
 
         """
-        tokens = []
-        token = self.get_next_token()
-        while token.type != "None":
-            tokens.append(token)
-            token = self.get_next_token()
-        return tokens
+        values = TOKEN_VALUES
+        for match in TOKEN_PATTERN.finditer(self.text):
+            type = match.lastgroup
+            if type == "END":
+                return
+            pos = match.start(type)
+            if type == "ERROR":
+                self.error(pos)
+            yield Token(type, values.get(type) or match.group(type), pos)
@@ -1,17 +1,45 @@
+import importlib
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import messagebox
 import customtkinter as ctk
 
+import bisimulation
 import tableau_procedure
 from parse import Parser
-import modelGraph
+from verdict_cache import VerdictCache
 
 
 DARK_MODE = "dark"
+# Milliseconds between two polls of a running check, about one frame.
+POLL_INTERVAL = 16
+# Milliseconds after the window shows before the plotting stack is imported.
+WARM_UP_DELAY = 500
+# Modules of the plotting stack, imported in this order by the warm-up.
+WARM_UP_MODULES = ("matplotlib", "matplotlib.figure", "matplotlib.collections", "matplotlib.backends.backend_tkagg", "modelGraph")
 ctk.set_appearance_mode(DARK_MODE)
 ctk.set_default_color_theme("green")
 
 
+def import_plotting_stack() -> None:
+    """
+    Imports the modules of the plotting stack in order. A missing package
+    stops the import and is reported when a countermodel is drawn.
+
+    Returns
+    -------
+    None
+
+    """
+    for module in WARM_UP_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            return
+
+
 class App(ctk.CTk):
     """
     This is the main window of the application.
@@ -20,6 +48,8 @@ class App(ctk.CTk):
     ----------
     parser: Parser
         It is the Parser object which is used to parse the formula.
+    cache: VerdictCache
+        It is the cache of the verdicts of the formulas already checked.
     formulas: list
         It is the list of example formulas.
     selected_option: tk.StringVar
@@ -30,6 +60,20 @@ class App(ctk.CTk):
         It is the entry box in which the user can type the formula.
     button: ctk.CTkButton
         It is the button which checks the validity of the formula.
+    cancel_button: ctk.CTkButton
+        It is the button which stops the running check.
+    progress: ctk.CTkLabel
+        It is the label which shows the progress of the running check.
+    minimize: tk.BooleanVar
+        It is the setting which merges the bisimilar worlds of a countermodel before it is drawn.
+    budget: tableau_procedure.Budget
+        It is the budget of the running check, None when no check runs.
+    stats: tableau_procedure.Stats
+        It is the statistics of the latest check, shown with its result.
+    results: queue.Queue
+        It is the queue through which the worker thread hands its result to the window.
+    graph: modelGraph.GraphVisualization
+        It is the drawing of the countermodels, created with the first one and reused after.
     footer: ctk.CTkTextbox
         It is the footer of the application which contains the copyright information.
     left_frame: ctk.CTkFrame
@@ -42,7 +86,17 @@ class App(ctk.CTk):
     update_entry(self, option)
         It updates the entry with the selected formula.
     check_validity(self)
-        It checks the validity of the formula and shows the result.
+        It starts checking the validity of the formula in a worker thread.
+    run_check(self, formula, stats)
+        It checks the validity of the formula, in the worker thread.
+    poll_check(self, text)
+        It shows the progress of the running check and its result once known.
+    cancel_check(self)
+        It stops the running check.
+    show_result(self, text, valid, model, stats)
+        It shows the result of the check.
+    warm_up(self)
+        It imports the plotting stack in a background thread.
     show_about(self)
         It shows the about information.
 
@@ -55,6 +109,15 @@ class App(ctk.CTk):
         super().__init__()
 
         self.parser= Parser()
+        self.cache = VerdictCache()
+        self.budget = None
+        self.stats = None
+        self.results = queue.Queue()
+        self.graph = None
+        # matplotlib is only needed to draw a countermodel, so it is
+        # imported after the window shows, in the background. The timer only
+        # fires once the main loop runs, after the first frame is drawn.
+        self.after(WARM_UP_DELAY, self.warm_up)
         
         self.title("Modal Validity Checker")
         self.geometry("1200x700+100+100")
@@ -102,10 +165,20 @@ class App(ctk.CTk):
                                     command=self.check_validity)
         self.button.grid(row=4, column=0, padx=20, pady=40)
 
+        self.cancel_button = ctk.CTkButton(master=self.left_frame, text="Cancel", font=('Arial', 14, 'bold'),
+                                           fg_color='#555555', hover_color='#c9c9c9',
+                                           command=self.cancel_check)
+        self.progress = ctk.CTkLabel(master=self.left_frame, text="", font=("Arial", 12))
+
+        self.minimize = tk.BooleanVar(self.left_frame, value=True)
+        minimize_box = ctk.CTkCheckBox(master=self.left_frame, text="Minimize countermodels", font=('Arial', 12),
+                                       variable=self.minimize)
+        minimize_box.grid(row=6, column=0, padx=20, pady=10)
+
         help_button = ctk.CTkButton(master=self.left_frame, text="Help", font=('Arial', 12),
                             fg_color='#555555', hover_color='#00A550', 
                             command=self.show_about)
-        help_button.grid(row=6, column=0, padx=20, pady=10,sticky="s")
+        help_button.grid(row=7, column=0, padx=20, pady=10,sticky="s")
         self.left_frame.rowconfigure(5, weight=10)
         self.left_frame.rowconfigure(1, weight=1)
 
@@ -113,7 +186,7 @@ class App(ctk.CTk):
         self.about = ctk.CTkTextbox(self.right_frame,wrap="word")
         self.about.insert(tk.END, "To use the Modal Logic Validity Checker, follow these steps:\n\n")
         self.about.insert(tk.END, "* Type your modal logic formula into the text box on the left using any combination of the following symbols:\n\n")
-        self.about.insert(tk.END, "Negation: '~', '¬', or '!'\nConjunction: '^', '∧', or '&'\nDisjunction: '|', '∨', 'v', or 'V'\nImplication: '->', '→', or '⇒'\nNecessity: '□', '◻', or '[]'\nPossibility: '◇', '◊', or '<>'\nYou can also use any combination of letters to represent variables.\n\n")
+        self.about.insert(tk.END, "Negation: '~', '¬', or '!'\nConjunction: '^', '∧', or '&'\nDisjunction: '|', '∨', 'v', or 'V'\nImplication: '->', '→', or '⇒'\nNecessity: '□', '◻', or '[]'\nPossibility: '◇', '◊', or '<>'\nTrue and false: '⊤' and '⊥'\nYou can also use any combination of letters to represent variables.\n\n")
         self.about.insert(tk.END, "* Click the \"Check validity\" button to initiate the validity check.\n\n")
         self.about.insert(tk.END, "* The Modal Logic Validity Checker app will use the tableau algorithm to analyze your formula and determine whether it is valid or not. The results of the check will be displayed on the right.\n\n")
         self.about.insert(tk.END, "The algorithm uses a proof by contradiction method, so for any invalid formula expect a graphical representation of the Kripke model where the formula is not valid. If the formula is valid in all frames, just a positive result will be given.\n\n")
@@ -166,37 +239,157 @@ class App(ctk.CTk):
         self.disclaimer.pack(side="bottom")
 
 
+    def warm_up(self) -> None:
+        """
+        Imports the plotting stack in a background thread, so the first
+        countermodel does not wait for it. The interpreter switches between
+        the threads while the modules run, so the window keeps handling its
+        events even during the import of matplotlib. Drawing still happens on
+        the Tk thread, which waits for the import if it has not finished.
+
+        Returns
+        -------
+        None
+
+        """
+        threading.Thread(target=import_plotting_stack, daemon=True).start()
+
     def check_validity(self) -> None:
         """
-        Checks and show the validity of the formula.
+        Starts checking the validity of the formula in a worker thread, so
+        the window stays responsive, and starts polling for its result.
 
         Returns
         -------
         None
 
         """
+        if self.budget is not None:
+            return
         text = self.entry.get()
         if not text:
             messagebox.showerror("Error", "Please enter some text")
             return
+        self.stats = tableau_procedure.Stats()
         try:
-            formula = self.parser.parse_text(text)
+            formula = self.parser.parse_text(text, self.stats)
         except SyntaxError as e:
              messagebox.showerror("Error:", e)
              return
 
+        self.budget = tableau_procedure.Budget(cancel=tableau_procedure.CancelToken())
+        self.button.configure(state="disabled")
+        self.cancel_button.grid(row=5, column=0, padx=20, pady=10, sticky="n")
+        self.progress.configure(text="Checking...")
+        self.progress.grid(row=1, column=0, padx=20, sticky="s")
+        threading.Thread(target=self.run_check, args=(formula, self.stats), daemon=True).start()
+        self.after(POLL_INTERVAL, self.poll_check, text)
+
+    def run_check(self, formula, stats) -> None:
+        """
+        Checks the validity of the formula and hands the result to the
+        window. Runs in the worker thread and never touches a widget.
+
+        Parameters
+        ----------
+        formula: Node
+            Formula to check.
+        stats: tableau_procedure.Stats
+            Statistics of the check, filled in by the worker thread.
+
+        Returns
+        -------
+        None
+
+        """
+        try:
+            self.results.put(self.cache.check(formula, budget=self.budget, stats=stats))
+        except Exception as e:
+            self.results.put(e)
+
+    def poll_check(self, text: str) -> None:
+        """
+        Shows the progress of the running check, and its result once the
+        worker thread has handed it over.
+
+        Parameters
+        ----------
+        text: str
+            Checked formula, as typed.
+
+        Returns
+        -------
+        None
+
+        """
+        try:
+            result = self.results.get_nowait()
+        except queue.Empty:
+            budget = self.budget
+            status = "Cancelling" if budget.cancel.cancelled else "Checking"
+            self.progress.configure(text=f"{status}: {budget.rules} rules, {budget.worlds} worlds, {budget.elapsed:.1f} s")
+            self.after(POLL_INTERVAL, self.poll_check, text)
+            return
+
+        self.budget = None
+        self.button.configure(state="normal")
+        self.cancel_button.grid_forget()
+        self.progress.grid_forget()
+        if isinstance(result, Exception):
+            messagebox.showerror("Error:", result)
+            return
+        valid, model = result
+        if valid is tableau_procedure.UNKNOWN:
+            messagebox.showinfo("Cancelled", f"The check was cancelled after {model.rules} rules.")
+            return
+        self.show_result(text, valid, model, self.stats)
+
+    def cancel_check(self) -> None:
+        """
+        Stops the running check; the worker thread gives up at its next
+        checkpoint.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.budget is not None:
+            self.budget.cancel.cancel()
+
+    def show_result(self, text: str, valid: bool, model, stats=None) -> None:
+        """
+        Shows the result of the check.
+
+        Parameters
+        ----------
+        text: str
+            Checked formula, as typed.
+        valid: bool
+            Validity of the formula.
+        model: KripkeModel
+            Model where the formula is not valid.
+        stats: tableau_procedure.Stats
+            Statistics of the check, or None.
+
+        Returns
+        -------
+        None
+
+        """
         self.about.pack_forget()
         self.disclaimer.pack_forget()
         self.output_text.delete("0.0", "end")
         for widget in self.output_result.winfo_children():
-            widget.destroy()
+            if widget is self.graph:
+                widget.pack_forget()
+            else:
+                widget.destroy()
         
         self.output_text.insert("0.0", f"Input: {text}\n\n")
         self.output_text.configure(font=("Arial", 20),border_spacing=30,corner_radius=0)
         self.output_text.pack(fill=tk.BOTH,  expand=True, padx=10)
         
-        valid, model = tableau_procedure.check_validity_of(formula)
-        
         if valid: 
             output = "VALID"
             
@@ -215,9 +408,23 @@ class App(ctk.CTk):
             r.configure(font=("Arial", 14),corner_radius=0,border_spacing=10)
             r.pack(fill=tk.X)
             
-            graph = modelGraph.GraphVisualization(self.output_result,model)
-            graph.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+            if self.graph is None:
+                # A plain import, still lazy, so PyInstaller bundles the
+                # plotting stack.
+                import modelGraph
+                self.graph = modelGraph.GraphVisualization(self.output_result)
+            if self.minimize.get():
+                start = time.perf_counter()
+                quotient = bisimulation.minimize(model)[0]
+                minimize_time = time.perf_counter() - start
+                self.output_text.insert("end", f"Minimized: {len(model)} to {len(quotient)} worlds in {minimize_time:.4f} s\n")
+                model = quotient
+            self.graph.show(model)
+            self.graph.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
             self.output_result.pack(fill=tk.BOTH,  expand=True, pady=20)
+
+        if stats is not None:
+            self.output_text.insert("end", f"Search: {stats.summary()}\n")
         
         if text not in self.formulas:
             self.formulas.append(text)
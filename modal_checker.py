@@ -0,0 +1,212 @@
+"""
+Headless command-line entry point of the modal validity checker.
+
+    python -m modal_checker check [file] [--model] [--preprocess] [--cache path]
+                                  [--timeout seconds] [--max-rules n] [--max-worlds n]
+                                  [--verify] [--minimize] [--stats] [--trace path]
+
+Formulas are read one per line from the file, or from standard input, and
+one JSON object per line is written to standard output as soon as each
+formula is checked, so runs of any length use constant memory and can be
+piped into other tools. Blank lines and lines starting with # are skipped.
+A formula that reaches a limit before it is decided gets "valid": null and
+the limit it reached in "unknown". With --minimize, countermodels are
+merged up to bisimulation and the time it takes is reported apart, in
+"minimize_time". With --stats, every result has the counts of its search
+and the time of its phases in "stats". With --trace, the events of every
+search are streamed to a file, for python -m search_trace.
+This module never imports the GUI or the plotting libraries.
+"""
+import argparse
+import functools
+import json
+import sys
+import time
+
+import bisimulation
+from parse import Parser
+from search_trace import Trace
+from tableau_procedure import UNKNOWN, KripkeModel, Stats, check_validity_of
+from verdict_cache import VerdictCache
+
+
+def model_data(model: KripkeModel) -> dict:
+    """
+    Returns the JSON data of a model.
+
+    Parameters
+    ----------
+    model: KripkeModel
+        Model to convert.
+
+    Returns
+    -------
+    dict
+        True variables of every world and accessible worlds of every world.
+
+    """
+    return {
+        "worlds": {world.name: list(world.values) for world in model.worlds},
+        "relations": {name: list(related) for name, related in model.relations.items()},
+    }
+
+
+def check_line(parser: Parser, number: int, text: str, check, with_model: bool, minimize: bool = False, with_stats: bool = False, trace=None) -> dict:
+    """
+    Checks the formula of one line.
+
+    Parameters
+    ----------
+    parser: Parser
+        Parser of the formulas.
+    number: int
+        Line number, from 1.
+    text: str
+        Formula.
+    check: function
+        Checks a formula and returns its validity and model.
+    with_model: bool
+        Include the countermodel of invalid formulas.
+    minimize: bool
+        Minimize the countermodel of invalid formulas up to bisimulation.
+    with_stats: bool
+        Include the statistics of the check.
+    trace: TextIO
+        File the events of the search are written to, or None.
+
+    Returns
+    -------
+    dict
+        JSON result of the line.
+
+    """
+    result = {"line": number, "formula": text}
+    stats = Stats() if with_stats else None
+    start = time.perf_counter()
+    try:
+        formula = parser.parse_text(text, stats)
+    except SyntaxError as e:
+        result["error"] = str(e)
+        return result
+    options = {}
+    if stats is not None:
+        options["stats"] = stats
+    if trace is not None:
+        options["trace"] = Trace(f"line {number}", stream=trace)
+    try:
+        valid, model = check(formula, **options)
+    except RuntimeError as e:
+        # A countermodel that --verify rejected fails its line only.
+        result["error"] = str(e)
+        return result
+    result["valid"] = None if valid is UNKNOWN else valid
+    result["time"] = time.perf_counter() - start
+    if minimize and valid is False:
+        start = time.perf_counter()
+        model = bisimulation.minimize(model)[0]
+        result["minimize_time"] = time.perf_counter() - start
+    if valid is UNKNOWN:
+        result["unknown"] = model.reason
+        result["rules"] = model.rules
+    elif with_model and not valid:
+        result["model"] = model_data(model)
+    if stats is not None:
+        result["stats"] = stats.as_dict()
+    return result
+
+
+def check_stream(lines, output, check, with_model: bool = False, minimize: bool = False, with_stats: bool = False, trace=None) -> int:
+    """
+    Checks the formula of every line and writes one JSON result per line.
+
+    Parameters
+    ----------
+    lines: Iterable[str]
+        Lines of formulas.
+    output: TextIO
+        Stream the results are written and flushed to.
+    check: function
+        Checks a formula and returns its validity and model.
+    with_model: bool
+        Include the countermodel of invalid formulas.
+    minimize: bool
+        Minimize the countermodel of invalid formulas up to bisimulation.
+    with_stats: bool
+        Include the statistics of the check.
+    trace: TextIO
+        File the events of the searches are written to, or None.
+
+    Returns
+    -------
+    int
+        Number of lines that could not be parsed.
+
+    """
+    parser = Parser()
+    errors = 0
+    for number, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text or text.startswith("#"):
+            continue
+        result = check_line(parser, number, text, check, with_model, minimize, with_stats, trace)
+        errors += "error" in result
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+    return errors
+
+
+def main(argv: list = None) -> int:
+    """
+    Runs the command line.
+
+    Parameters
+    ----------
+    argv: list
+        Arguments, without the program name.
+
+    Returns
+    -------
+    int
+        Exit status: 0, or 1 if a formula could not be parsed.
+
+    """
+    parser = argparse.ArgumentParser(prog="modal_checker", description="Check the validity of modal formulas.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("check", help="check one formula per line and print one JSON result per line")
+    check.add_argument("file", nargs="?", help="file of formulas, standard input if omitted or -")
+    check.add_argument("--model", action="store_true", help="include the countermodel of invalid formulas")
+    check.add_argument("--preprocess", action="store_true", help="simplify formulas before checking them")
+    check.add_argument("--cache", metavar="PATH", help="sqlite file of cached verdicts")
+    check.add_argument("--timeout", type=float, metavar="SECONDS", help="give up on a formula after this long")
+    check.add_argument("--max-rules", type=int, metavar="N", help="give up on a formula after N rule applications")
+    check.add_argument("--max-worlds", type=int, metavar="N", help="give up on a formula whose model grows past N worlds")
+    check.add_argument("--verify", action="store_true", help="evaluate every invalid formula in its countermodel")
+    check.add_argument("--minimize", action="store_true", help="merge the bisimilar worlds of every countermodel")
+    check.add_argument("--stats", action="store_true", help="include the counts and phase times of every check")
+    check.add_argument("--trace", metavar="PATH", help="file the events of every search are written to")
+    args = parser.parse_args(argv)
+
+    options = {"preprocess": args.preprocess, "timeout": args.timeout, "max_rules": args.max_rules, "max_worlds": args.max_worlds, "verify": args.verify}
+    if args.cache:
+        cache = VerdictCache(path=args.cache, minimize=args.minimize)
+        check_formula = functools.partial(cache.check, **options)
+    else:
+        cache = None
+        check_formula = functools.partial(check_validity_of, **options)
+
+    source = sys.stdin if args.file in (None, "-") else open(args.file, encoding="utf-8")
+    trace = open(args.trace, "w", encoding="utf-8") if args.trace else None
+    try:
+        errors = check_stream(source, sys.stdout, check_formula, args.model, args.minimize, args.stats, trace)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if trace is not None:
+            trace.close()
+        if cache is not None:
+            cache.close()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,53 +1,386 @@
 import tkinter as tk
-import networkx as nx
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+from collections import OrderedDict, deque
 
 from tableau_procedure import KripkeModel
 
+ROOT_COLOR = '#6ABD56'
+WORLD_COLOR = 'green'
+COLLAPSED_COLOR = '#555555'
+
+# Worlds drawn at most, and accessible worlds drawn per world; the others are
+# collapsed into one extra node per world, labelled with how many worlds it
+# hides.
+MAX_VISIBLE = 200
+MAX_CHILDREN = 12
+# Largest drawing with arrows and labels on every world.
+MAX_DETAILED = 60
+LAYOUT_CACHE_SIZE = 32
+
+
+def spanning_tree(model: KripkeModel) -> tuple:
+    """
+    Finds a spanning tree of the model, breadth first from the worlds
+    without incoming edges. Countermodels built by the tableau are trees
+    already; other models keep their remaining edges apart.
+
+    Parameters
+    ----------
+    model: KripkeModel
+        Model to draw.
+
+    Returns
+    -------
+    tuple
+        Roots, accessible worlds of every world in the tree and the edges
+        left out of the tree.
+
+    """
+    names = [world.name for world in model.worlds]
+    relations = model.relations
+    targets = {name for related in relations.values() for name in related}
+    roots = []
+    children = {name: [] for name in names}
+    extra = []
+    seen = set()
+    for root in [name for name in names if name not in targets] + names:
+        if root in seen:
+            continue
+        roots.append(root)
+        seen.add(root)
+        queue = deque([root])
+        while queue:
+            name = queue.popleft()
+            for related in relations.get(name, ()):
+                if related in seen:
+                    extra.append((name, related))
+                else:
+                    seen.add(related)
+                    children.setdefault(name, []).append(related)
+                    queue.append(related)
+    return roots, children, extra
+
+
+def subtree_sizes(roots: list, children: dict) -> dict:
+    """
+    Counts the worlds of every subtree of the spanning tree.
+
+    Parameters
+    ----------
+    roots: list
+        Roots of the tree.
+    children: dict
+        Accessible worlds of every world in the tree.
+
+    Returns
+    -------
+    dict
+        Number of worlds of the subtree of every world.
+
+    """
+    order = []
+    stack = list(roots)
+    while stack:
+        name = stack.pop()
+        order.append(name)
+        stack.extend(children.get(name, ()))
+    sizes = {}
+    for name in reversed(order):
+        sizes[name] = 1 + sum(sizes[child] for child in children.get(name, ()))
+    return sizes
+
+
+def collapse(roots: list, children: dict) -> list:
+    """
+    Chooses the worlds to draw, breadth first, and collapses the others.
+
+    Parameters
+    ----------
+    roots: list
+        Roots of the spanning tree.
+    children: dict
+        Accessible worlds of every world in the tree.
+
+    Returns
+    -------
+    list
+        Pairs of world name, or number of hidden worlds for a collapsed node,
+        and index of the parent node, -1 for a root, in breadth-first order.
+
+    """
+    sizes = subtree_sizes(roots, children)
+    nodes = []
+    queue = deque((root, -1) for root in roots)
+    while queue:
+        name, parent = queue.popleft()
+        index = len(nodes)
+        nodes.append((name, parent))
+        if isinstance(name, int):
+            continue
+        related = children.get(name, ())
+        room = min(MAX_CHILDREN, MAX_VISIBLE - len(nodes) - len(queue))
+        if len(related) > room:
+            room = max(room - 1, 0)
+            queue.extend((child, index) for child in related[:room])
+            queue.append((sum(sizes[child] for child in related[room:]), index))
+        else:
+            queue.extend((child, index) for child in related)
+    return nodes
+
+
+def tree_layout(parents: tuple) -> list:
+    """
+    Places the nodes of a forest top-down: leaves side by side, parents
+    centred above their children and one row per depth.
+
+    Parameters
+    ----------
+    parents: tuple
+        Index of the parent of every node, -1 for a root, in breadth-first
+        order.
+
+    Returns
+    -------
+    list
+        Position of every node.
+
+    """
+    children = [[] for _ in parents]
+    roots = []
+    for index, parent in enumerate(parents):
+        (roots if parent < 0 else children[parent]).append(index)
+    positions = [None] * len(parents)
+    depth = [0] * len(parents)
+    for index, parent in enumerate(parents):
+        if parent >= 0:
+            depth[index] = depth[parent] + 1
+    next_x = 0
+    stack = [(root, False) for root in reversed(roots)]
+    while stack:
+        index, expanded = stack.pop()
+        if not children[index]:
+            positions[index] = (next_x, -depth[index])
+            next_x += 1
+        elif expanded:
+            first, last = positions[children[index][0]], positions[children[index][-1]]
+            positions[index] = ((first[0] + last[0]) / 2, -depth[index])
+        else:
+            stack.append((index, True))
+            stack.extend((child, False) for child in reversed(children[index]))
+    return positions
+
+
+def model_shape(model: KripkeModel) -> tuple:
+    """
+    Returns the shape of a model: its edges and the true variables of its
+    worlds, everything its drawing depends on, read from the arrays of the
+    model without building its worlds.
+
+    Parameters
+    ----------
+    model: KripkeModel
+        Model to draw.
+
+    Returns
+    -------
+    tuple
+        Shape of model, equal for models drawn the same.
+
+    """
+    return (len(model), model.sources.tobytes(), model.targets.tobytes(), tuple(model.atoms), tuple(model.valuations))
+
+
+def plan(model: KripkeModel) -> tuple:
+    """
+    Plans the drawing of a model: finds its spanning tree, collapses it to
+    the nodes to draw and places them.
+
+    Parameters
+    ----------
+    model: KripkeModel
+        Model to draw.
+
+    Returns
+    -------
+    tuple
+        Position, color and label of every node, whether it is a collapsed
+        node, and the edges between nodes as pairs of node indices.
+
+    """
+    roots, children, extra = spanning_tree(model)
+    nodes = collapse(roots, children)
+    positions = tree_layout(tuple(parent for _, parent in nodes))
+    values = {world.name: world.values for world in model.worlds}
+    index = {name: i for i, (name, _) in enumerate(nodes) if not isinstance(name, int)}
+
+    edges = [(parent, i) for i, (_, parent) in enumerate(nodes) if parent >= 0]
+    edges.extend((index[a], index[b]) for a, b in extra if a in index and b in index)
+    colors = [COLLAPSED_COLOR if isinstance(name, int) else ROOT_COLOR if parent < 0 else WORLD_COLOR
+              for name, parent in nodes]
+    labels = [f"+{name}" if isinstance(name, int) else str(values[name]) for name, _ in nodes]
+    collapsed = [isinstance(name, int) for name, _ in nodes]
+    return positions, colors, labels, collapsed, edges
+
+
+class LayoutCache:
+    """
+    Encapsulate the drawing plans of the model shapes drawn lately, so a
+    model of a shape drawn before skips the spanning tree, the collapse and
+    the layout.
+
+    Attributes
+    ----------
+    maxsize: int
+        Number of model shapes kept.
+    layouts: OrderedDict
+        Drawing plans by model shape, least recently used first.
+
+    Methods
+    -------
+    __call__(self, model)
+        Returns the drawing plan of a model.
+
+    """
+
+    def __init__(self, maxsize: int = LAYOUT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.layouts = OrderedDict()
+
+    def __call__(self, model: KripkeModel) -> tuple:
+        """
+        Returns the drawing plan of a model, from the cache when a model of
+        the same shape was drawn before.
+
+        Parameters
+        ----------
+        model: KripkeModel
+            Model to draw.
+
+        Returns
+        -------
+        tuple
+            Drawing plan of model, see plan.
+
+        """
+        shape = model_shape(model)
+        layout = self.layouts.get(shape)
+        if layout is None:
+            layout = plan(model)
+            self.layouts[shape] = layout
+            if len(self.layouts) > self.maxsize:
+                self.layouts.popitem(last=False)
+        else:
+            self.layouts.move_to_end(shape)
+        return layout
+
+
+def draw(axes, model: KripkeModel, layout=plan) -> int:
+    """
+    Draws a model on matplotlib axes, replacing what they showed.
+
+    Parameters
+    ----------
+    axes: Axes
+        Axes to draw on.
+    model: KripkeModel
+        Model to draw.
+    layout: function
+        Returns the drawing plan of a model, see plan and LayoutCache.
+
+    Returns
+    -------
+    int
+        Number of nodes drawn.
+
+    """
+    from matplotlib.collections import LineCollection
+
+    positions, colors, labels, collapsed, edges = layout(model)
+
+    axes.clear()
+    axes.set_axis_off()
+    detailed = len(positions) <= MAX_DETAILED
+    if detailed:
+        for a, b in edges:
+            axes.annotate("", xy=positions[b], xytext=positions[a],
+                          arrowprops=dict(arrowstyle="-|>", color="black", lw=2, shrinkA=12, shrinkB=12))
+    else:
+        axes.add_collection(LineCollection([(positions[a], positions[b]) for a, b in edges], colors="black", linewidths=0.5))
+    xs = [x for x, _ in positions]
+    ys = [y for _, y in positions]
+    axes.scatter(xs, ys, s=max(20, 1500 // len(positions)), c=colors, zorder=2)
+    if detailed:
+        for (x, y), label in zip(positions, labels):
+            axes.text(x, y, label, ha="center", va="center", fontweight="bold", fontsize=12, zorder=3)
+    else:
+        for (x, y), label, hidden in zip(positions, labels, collapsed):
+            if hidden:
+                axes.text(x, y, label, ha="center", va="bottom", fontsize=7, zorder=3)
+    axes.margins(0.1)
+    axes.autoscale_view()
+    return len(positions)
+
 
 class GraphVisualization(tk.Frame):
     """
     Visualize the Kripke Model as a graph.
-    
+
+    One figure and one canvas are created with the widget and every model is
+    drawn on them again. Worlds are laid out as the tree the tableau built,
+    the drawing plan of every model shape is cached and large models are
+    collapsed to MAX_VISIBLE nodes.
+
     Parameters
     ----------
     parent: tk.Tk
         Tkinter GUI object.
     model: KripkeModel
-        Kripke Model object.
+        Kripke Model object, or None to draw nothing yet.
+
+    Attributes
+    ----------
+    figure: Figure
+        Figure the models are drawn on.
+    axes: Axes
+        Axes of the figure.
+    canvas: FigureCanvasTkAgg
+        Canvas showing the figure.
+    layout: LayoutCache
+        Drawing plans of the model shapes drawn lately.
+
+    Methods
+    -------
+    show(self, model)
+        Draws a model, replacing the previous one.
 
     """
-    def __init__(self, parent, model:KripkeModel, *args, **kwargs):
-        
+    def __init__(self, parent, model: KripkeModel = None, *args, **kwargs):
+
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
         tk.Frame.__init__(self, parent, *args, **kwargs)
 
-        # Create the graph
-        G = nx.DiGraph()
-        for world in model.worlds:
-            G.add_node(world.name, values=world.values)
-
-        for world, connections in model.relations.items():
-            for connection in connections:
-                G.add_edge(world, connection)
-
-
-        lbls={n:v["values"] for n,v in G.nodes(data=True)}
-        no_incoming_edges = [node for node in G.nodes() if not list(G.predecessors(node))]
-        node_colors = ['#6ABD56' if node in no_incoming_edges else 'green' for node in G.nodes()]
-        
-        # Draw the graph
-        plt.figure()
-        pos = nx.circular_layout(G)
-        nx.draw(G, pos,labels=lbls, arrows=True, style='', margins=0.05,
-                arrowstyle=patches.ArrowStyle('Fancy', head_length=5, head_width=2.5, tail_width=0.4),
-                font_weight='bold', font_color='black',font_size=20, 
-                node_color=node_colors, node_size=3000,
-                edge_color='black', width=6)
-        
-        # Add the graph to the Tkinter GUI
-        canvas = FigureCanvasTkAgg(plt.gcf(), self)
-        canvas.draw()
-        self.graph = canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.figure = Figure()
+        self.axes = self.figure.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.figure, self)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.layout = LayoutCache()
+        if model is not None:
+            self.show(model)
+
+    def show(self, model: KripkeModel) -> None:
+        """
+        Draws a model, replacing the previous one.
+
+        Parameters
+        ----------
+        model: KripkeModel
+            Kripke Model object.
+
+        Returns
+        -------
+        None
 
+        """
+        draw(self.axes, model, self.layout)
+        self.canvas.draw_idle()
@@ -0,0 +1,314 @@
+"""
+Evaluation of formulas in a given Kripke model.
+
+Every subformula is evaluated once, bottom-up, to a vector of truth values
+indexed by world id, and its vector is dropped as soon as the last formula
+using it is evaluated. □ and ◇ are computed from the edge arrays of the
+model, the product of the vector with the adjacency matrix. With numpy
+installed the vectors are numpy arrays and every step is vectorized;
+without it they are bytes, one per world, and only □ and ◇ loop in Python.
+numpy is only imported on the first evaluation.
+"""
+from parse import Node
+from tableau_procedure import KripkeModel
+
+
+class NumpyVectors:
+    """
+    Encapsulate the truth vectors of a model as numpy boolean arrays.
+
+    Attributes
+    ----------
+    np: module
+        numpy.
+    model: KripkeModel
+        Model the formulas are evaluated in.
+    size: int
+        Number of worlds.
+    sources: ndarray
+        Source world of every edge.
+    targets: ndarray
+        Target world of every edge.
+    valuations: ndarray
+        Bitset of the true variables of every world, or None if the model
+        has too many variables for 64 bits.
+
+    Methods
+    -------
+    constant(self, value)
+        Returns the vector of a constant.
+    variable(self, name)
+        Returns the vector of a variable.
+    negate(self, vector)
+        Returns the vector of a negation.
+    conjoin(self, vectors)
+        Returns the vector of a conjunction.
+    disjoin(self, vectors)
+        Returns the vector of a disjunction.
+    possibly(self, vector)
+        Returns the vector of a ◇ formula.
+    necessarily(self, vector)
+        Returns the vector of a □ formula.
+
+    """
+
+    def __init__(self, np, model: KripkeModel):
+        self.np = np
+        self.model = model
+        self.size = len(model)
+        self.sources = np.frombuffer(model.sources, dtype=f"i{model.sources.itemsize}")
+        self.targets = np.frombuffer(model.targets, dtype=f"i{model.targets.itemsize}")
+        self.valuations = None
+        if len(model.atoms) < 64:
+            self.valuations = np.array(model.valuations, dtype=np.int64)
+
+    def constant(self, value: bool):
+        return self.np.full(self.size, value)
+
+    def variable(self, name: str):
+        atom = self.model.atom_ids.get(name)
+        if atom is None:
+            return self.constant(False)
+        if self.valuations is not None:
+            return (self.valuations >> atom & 1).astype(bool)
+        return self.np.fromiter((bits >> atom & 1 for bits in self.model.valuations), bool, self.size)
+
+    def negate(self, vector):
+        return ~vector
+
+    def conjoin(self, vectors: list):
+        return self.np.logical_and.reduce(vectors)
+
+    def disjoin(self, vectors: list):
+        return self.np.logical_or.reduce(vectors)
+
+    def possibly(self, vector):
+        result = self.constant(False)
+        result[self.sources[vector[self.targets]]] = True
+        return result
+
+    def necessarily(self, vector):
+        result = self.constant(True)
+        result[self.sources[~vector[self.targets]]] = False
+        return result
+
+
+class ByteVectors:
+    """
+    Encapsulate the truth vectors of a model as bytes, 1 for true and 0 for
+    false, without numpy. Conjunctions and disjunctions of vectors are done
+    as integer operations on their bytes.
+
+    Attributes
+    ----------
+    model: KripkeModel
+        Model the formulas are evaluated in.
+    size: int
+        Number of worlds.
+
+    Methods
+    -------
+    constant(self, value)
+        Returns the vector of a constant.
+    variable(self, name)
+        Returns the vector of a variable.
+    negate(self, vector)
+        Returns the vector of a negation.
+    conjoin(self, vectors)
+        Returns the vector of a conjunction.
+    disjoin(self, vectors)
+        Returns the vector of a disjunction.
+    possibly(self, vector)
+        Returns the vector of a ◇ formula.
+    necessarily(self, vector)
+        Returns the vector of a □ formula.
+
+    """
+    NEGATION = bytes.maketrans(b"\x00\x01", b"\x01\x00")
+
+    def __init__(self, model: KripkeModel):
+        self.model = model
+        self.size = len(model)
+
+    def constant(self, value: bool) -> bytes:
+        return (b"\x01" if value else b"\x00") * self.size
+
+    def variable(self, name: str) -> bytes:
+        atom = self.model.atom_ids.get(name)
+        if atom is None:
+            return self.constant(False)
+        return bytes(bits >> atom & 1 for bits in self.model.valuations)
+
+    def negate(self, vector: bytes) -> bytes:
+        return vector.translate(self.NEGATION)
+
+    def conjoin(self, vectors: list) -> bytes:
+        result = int.from_bytes(vectors[0], "little")
+        for vector in vectors[1:]:
+            result &= int.from_bytes(vector, "little")
+        return result.to_bytes(self.size, "little")
+
+    def disjoin(self, vectors: list) -> bytes:
+        result = int.from_bytes(vectors[0], "little")
+        for vector in vectors[1:]:
+            result |= int.from_bytes(vector, "little")
+        return result.to_bytes(self.size, "little")
+
+    def possibly(self, vector: bytes) -> bytes:
+        result = bytearray(self.size)
+        for source, target in zip(self.model.sources, self.model.targets):
+            if vector[target]:
+                result[source] = 1
+        return bytes(result)
+
+    def necessarily(self, vector: bytes) -> bytes:
+        result = bytearray(self.constant(True))
+        for source, target in zip(self.model.sources, self.model.targets):
+            if not vector[target]:
+                result[source] = 0
+        return bytes(result)
+
+
+def vectors_of(model: KripkeModel, use_numpy: bool = None):
+    """
+    Returns the truth vectors of a model, with numpy if it is installed.
+
+    Parameters
+    ----------
+    model: KripkeModel
+        Model the formulas are evaluated in.
+    use_numpy: bool
+        Use numpy, or not; None to use it if it is installed.
+
+    Returns
+    -------
+    NumpyVectors or ByteVectors
+        Truth vectors of the model.
+
+    """
+    if use_numpy is not False:
+        try:
+            import numpy
+        except ImportError:
+            if use_numpy:
+                raise
+        else:
+            return NumpyVectors(numpy, model)
+    return ByteVectors(model)
+
+
+def evaluate(formula: Node, model: KripkeModel, use_numpy: bool = None):
+    """
+    Evaluates a formula in every world of a model.
+
+    Parameters
+    ----------
+    formula: Node
+        Formula to evaluate.
+    model: KripkeModel
+        Model to evaluate it in.
+    use_numpy: bool
+        Use numpy, or not; None to use it if it is installed.
+
+    Returns
+    -------
+    ndarray or bytes
+        Truth value of formula in every world, by world id.
+
+    """
+    vectors = vectors_of(model, use_numpy)
+    order = []
+    uses = {}
+    stack = [formula]
+    while stack:
+        node = stack[-1]
+        if node in uses:
+            stack.pop()
+            continue
+        pending = [arg for arg in node.args if arg not in uses]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        uses[node] = 0
+        order.append(node)
+        for arg in node.args:
+            uses[arg] += 1
+
+    memo = {}
+    for node in order:
+        type = node.type
+        args = [memo[arg] for arg in node.args]
+        if type == "VARIABLE":
+            vector = vectors.variable(node.value)
+        elif type == "TRUE":
+            vector = vectors.constant(True)
+        elif type == "FALSE":
+            vector = vectors.constant(False)
+        elif type == "NOT":
+            vector = vectors.negate(args[0])
+        elif type == "AND":
+            vector = vectors.conjoin(args)
+        elif type == "OR":
+            vector = vectors.disjoin(args)
+        elif type == "IMPLIES":
+            vector = vectors.disjoin([vectors.negate(args[0]), args[1]])
+        elif type == "NECESSARILY":
+            vector = vectors.necessarily(args[0])
+        elif type == "POSSIBLY":
+            vector = vectors.possibly(args[0])
+        else:
+            raise ValueError(f"Unknown formula type {type}")
+        memo[node] = vector
+        for arg in node.args:
+            uses[arg] -= 1
+            if not uses[arg]:
+                del memo[arg]
+    return memo[formula]
+
+
+def holds(formula: Node, model: KripkeModel, world: int = 0, use_numpy: bool = None) -> bool:
+    """
+    Checks whether a formula is true in a world of a model.
+
+    Parameters
+    ----------
+    formula: Node
+        Formula to evaluate.
+    model: KripkeModel
+        Model to evaluate it in.
+    world: int
+        Id of the world, the root of a countermodel by default.
+    use_numpy: bool
+        Use numpy, or not; None to use it if it is installed.
+
+    Returns
+    -------
+    bool
+        True if formula is true in the world, else False.
+
+    """
+    return bool(evaluate(formula, model, use_numpy)[world])
+
+
+def is_countermodel(formula: Node, model: KripkeModel, use_numpy: bool = None) -> bool:
+    """
+    Checks whether a model returned with an INVALID verdict falsifies the
+    formula in its root world.
+
+    Parameters
+    ----------
+    formula: Node
+        Checked formula.
+    model: KripkeModel
+        Model returned with the verdict.
+    use_numpy: bool
+        Use numpy, or not; None to use it if it is installed.
+
+    Returns
+    -------
+    bool
+        True if formula is false in the root world, else False.
+
+    """
+    return len(model) > 0 and not holds(formula, model, 0, use_numpy)
@@ -1,20 +1,38 @@
+import itertools
+import threading
+import weakref
+
 from lexer import Token, Lexer
 
 class Node:
     """
     Encapsulate the behaviour of node.
 
+    Nodes are hash-consed: constructing a node whose type, value and children
+    match a live node returns that node, so every structurally distinct
+    subformula exists exactly once. Nodes are therefore immutable, compare by
+    identity and carry their hash, height and a small integer id precomputed.
+
+    Conjunctions and disjunctions are n-ary: their operands are in args.
+    Unary nodes keep their operand in right, binary nodes in left and right.
+
     Attributes
     ----------
     type: str
     value: str
+    args: tuple
+        Operands of the node, in order.
     left: Node
+        First operand of a binary node.
     right: Node
+        Last operand of a unary or binary node.
+    id: int
+        Unique id of the subformula.
 
     Methods
     -------
-    __init__(self, type, value=None)
-        Initialize the node.
+    __new__(cls, type, value=None, left=None, right=None, args=None)
+        Return the unique node with the given structure.
     __repr__(self)
         Representation of node.
     __eq__(self, other)
@@ -25,14 +43,65 @@ class Node:
         Height of node.
 
     """
-    def __init__(self, type: str, value=None):
-        self.type = type
-        self.value = value
-        self.left = None
-        self.right = None
+    __slots__ = ("type", "value", "args", "id", "_hash", "_height", "__weakref__")
+
+    def __new__(cls, type: str, value=None, left: 'Node' = None, right: 'Node' = None, args: tuple = None) -> 'Node':
+        if args is None:
+            args = tuple(child for child in (left, right) if child is not None)
+        key = (type, value, args)
+        with _intern_lock:
+            node = _intern_table.get(key)
+            if node is None:
+                node = object.__new__(cls)
+                setattr_ = object.__setattr__
+                setattr_(node, "type", type)
+                setattr_(node, "value", value)
+                setattr_(node, "args", args)
+                setattr_(node, "id", next(_node_ids))
+                setattr_(node, "_hash", hash(key))
+                setattr_(node, "_height", 1 + max([child._height for child in args], default=-1))
+                _intern_table[key] = node
+        return node
+
+    @property
+    def left(self) -> 'Node':
+        return self.args[0] if len(self.args) == 2 else None
+
+    @property
+    def right(self) -> 'Node':
+        return self.args[-1] if 0 < len(self.args) <= 2 else None
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError("Node is immutable")
+
+    def __delattr__(self, name) -> None:
+        raise AttributeError("Node is immutable")
+
+    def __copy__(self) -> 'Node':
+        return self
+
+    def __deepcopy__(self, memo) -> 'Node':
+        return self
+
+    def __reduce__(self):
+        return (Node, (self.type, self.value, None, None, self.args))
 
     def __repr__(self) -> str:
-        return f"Node({self.type}, {self.value}, {self.left}, {self.right})"
+        parts = []
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if item is None:
+                parts.append("None")
+            elif isinstance(item, str):
+                parts.append(item)
+            else:
+                stack.append(")")
+                children = (None,) + item.args if len(item.args) == 1 else item.args or (None, None)
+                for child in reversed(children[1:]):
+                    stack.extend((child, ", "))
+                stack.extend((children[0], f"Node({item.type}, {item.value}, "))
+        return "".join(parts)
 
     def __eq__(self, other) -> bool:
         """
@@ -49,12 +118,7 @@ class Node:
             True if nodes are equal, else false.
 
         """
-        if isinstance(other, self.__class__):
-            if self.value == other.value:
-                if self.left == other.left:
-                    if self.right == other.right:
-                        return True
-        return False
+        return self is other
 
     def __hash__(self) -> int:
         """
@@ -66,7 +130,7 @@ class Node:
             Hash of node.
 
         """
-        return hash((self.type, self.value, self.left, self.right))
+        return self._hash
 
     def height(self) -> int:
         """
@@ -78,25 +142,39 @@ class Node:
             Height of node.
 
         """
-        if self.left is None and self.right is None:
-            return 0
-        elif self.left is None:
-            return 1 + self.right.height()
-        elif self.right is None:
-            return 1 + self.left.height()
-        else:
-            return 1 + max(self.left.height(), self.right.height())
+        return self._height
+
+
+_intern_table = weakref.WeakValueDictionary()
+_intern_lock = threading.Lock()
+_node_ids = itertools.count()
+
+# Binding power of the operators; conjunction and disjunction are n-ary and
+# implication is right associative.
+CONSTANTS = {"VARIABLE", "TRUE", "FALSE"}
+PREFIX_OPERATORS = {"NOT", "NECESSARILY", "POSSIBLY"}
+PRECEDENCE = {"IMPLIES": 1, "OR": 2, "AND": 3, "NOT": 4, "NECESSARILY": 4, "POSSIBLY": 4}
+NARY_OPERATORS = {"AND", "OR"}
+
 
 class Parser:
     """
     Encapsulate the behaviour of parser.
 
+    Formulas are parsed by operator precedence in a single pass over the
+    tokens: the prefix operators ¬, □ and ◇ bind tightest, then ∧, ∨ and →.
+    Chains of the same ∧ or ∨ become one n-ary node and → groups to the
+    right. Operators and operands wait on explicit stacks, so parsing takes
+    linear time and nesting depth is only limited by memory.
+
     Attributes
     ----------
-    tokens: list
-        List of tokens.
-    pos: int
-        Current position of tokens.
+    tokens: Iterator[Token]
+        Stream of tokens not yet looked at.
+    lookahead: Token
+        Next token of the stream.
+    end: int
+        Offset of the end of the text.
 
     Methods
     -------
@@ -106,30 +184,36 @@ class Parser:
         Raise error.
     get_next_token(self)
         Get next token.
-    factor(self)
-        Handle the lowest-level components of the formula
-    term(self)
-        Handle conjunction and disjunction
+    reduce(self, operators, operands)
+        Build the node of the operator on top of the stack.
     parse(self)
-        Handle highest level of components, i.e implication
+        Parse the tokens into a formula.
     parse_text(self, text: str)
         Parse the text.
 
     """
     def __init__(self):
-        self.tokens = []
-        self.pos = 0
+        self.tokens = iter(())
+        self.lookahead = Token("None", None)
+        self.end = 0
 
-    def error(self) -> None:
+    def error(self, token: Token = None) -> None:
         """
         Raise error.
 
+        Parameters
+        ----------
+        token: Token
+            Unexpected token.
+
         Returns
         -------
         None
 
         """
-        raise SyntaxError("Invalid syntax")
+        if token is None or token.pos is None:
+            raise SyntaxError("Invalid syntax")
+        raise SyntaxError(f"Invalid syntax at position {token.pos}")
 
     def get_next_token(self) -> Token:
         """
@@ -141,63 +225,35 @@ class Parser:
             Next token.
 
         """
-        if self.pos < len(self.tokens):
-            token = self.tokens[self.pos]
-            self.pos += 1
-            return token
-        return Token("None", None)
+        token = self.lookahead
+        if token.type != "None":
+            self.lookahead = next(self.tokens, None) or Token("None", None, self.end)
+        return token
 
-    def factor(self) -> Node:
+    def reduce(self, operators: list, operands: list) -> None:
         """
-        Handle the lowest-level components of the formula
+        Build the node of the operator on top of the stack.
 
-        Returns
-        -------
-        Node
-            Factor.
-
-        """
-        token = self.get_next_token()
-        if token.type == "VARIABLE":
-            return Node("VARIABLE", token.value)
-        elif token.type == "NOT":
-            node = Node("NOT", token.value)
-            node.right = self.factor()
-            return node
-        elif token.type in ["NECESSARILY", "POSSIBLY"]:
-            node = Node(token.type, token.value)
-            node.right = self.factor()
-            return node
-        elif token.type == "LPAREN":
-            node = self.parse()
-            if self.get_next_token().type != "RPAREN":
-                self.error()
-            return node
-        else:
-            self.error()
-
-    def term(self) -> Node:
-        """
-        Handle conjunction and disjunction
+        Parameters
+        ----------
+        operators: list
+            Pending operators as [token, number of operands].
+        operands: list
+            Parsed operands.
 
         Returns
         -------
-        Node
-            Term.
+        None
 
         """
-        node = self.factor()
-        while self.pos < len(self.tokens) and self.tokens[self.pos].type in ["AND", "OR"]:
-            token = self.get_next_token()
-            parent = Node(token.type, token.value)
-            parent.left = node
-            parent.right = self.factor()
-            return parent
-        return node
+        token, count = operators.pop()
+        args = tuple(operands[-count:])
+        del operands[-count:]
+        operands.append(Node(token.type, token.value, args=args))
 
     def parse(self) -> Node:
         """
-        Handle highest level of components, i.e implication
+        Parse the tokens into a formula.
 
         Returns
         -------
@@ -205,16 +261,50 @@ class Parser:
             Parse tree.
 
         """
-        node = self.term()
-        if self.pos < len(self.tokens) and self.tokens[self.pos].type == "IMPLIES":
+        operators = []
+        operands = []
+        expect_operand = True
+        while True:
             token = self.get_next_token()
-            parent = Node(token.type, token.value)
-            parent.left = node
-            parent.right = self.term()
-            return parent
-        return node
-
-    def parse_text(self, text: str) -> Node:
+            type = token.type
+            if expect_operand:
+                if type in CONSTANTS:
+                    operands.append(Node(type, token.value))
+                    expect_operand = False
+                elif type in PREFIX_OPERATORS:
+                    operators.append([token, 1])
+                elif type == "LPAREN":
+                    operators.append([token, 0])
+                else:
+                    self.error(token)
+            elif type in PRECEDENCE:
+                precedence = PRECEDENCE[type]
+                while operators:
+                    top = operators[-1][0].type
+                    if top == "LPAREN" or top == type or PRECEDENCE[top] < precedence:
+                        break
+                    self.reduce(operators, operands)
+                if operators and operators[-1][0].type == type and type in NARY_OPERATORS:
+                    operators[-1][1] += 1
+                else:
+                    operators.append([token, 2])
+                expect_operand = True
+            elif type == "RPAREN":
+                while operators and operators[-1][0].type != "LPAREN":
+                    self.reduce(operators, operands)
+                if not operators:
+                    self.error(token)
+                operators.pop()
+            elif type == "None":
+                while operators:
+                    if operators[-1][0].type == "LPAREN":
+                        self.error(token)
+                    self.reduce(operators, operands)
+                return operands[0]
+            else:
+                self.error(token)
+
+    def parse_text(self, text: str, stats=None) -> Node:
         """
         Parse the text.
 
@@ -222,6 +312,9 @@ class Parser:
         ----------
         text: str
             Text to parse.
+        stats: Stats
+            Statistics the lex and parse phases are timed in, or None. The
+            tokens are then all scanned before parsing, to time them apart.
 
         Returns
         -------
@@ -229,8 +322,13 @@ class Parser:
             Parse tree.
 
         """
-        lexer = Lexer(text)
-        self.tokens = lexer.tokenize()
-        self.pos = 0
-        return self.parse()
-
+        self.tokens = Lexer(text).tokenize()
+        if stats is not None:
+            with stats.phase("lex"):
+                self.tokens = iter(list(self.tokens))
+        self.end = len(text)
+        self.lookahead = next(self.tokens, None) or Token("None", None, self.end)
+        if stats is None:
+            return self.parse()
+        with stats.phase("parse"):
+            return self.parse()
@@ -0,0 +1,503 @@
+"""
+Benchmark the validity checker on named families of seeded formulas.
+
+    python performance/benchmark.py run [--family NAME ...] [--repeat N] [--seed S]
+                                        [--quick] [--stats] [--output results.json]
+    python performance/benchmark.py compare baseline.json current.json
+                                            [--threshold 0.1] [--min-seconds 0.001]
+
+run times every formula --repeat times, after one warm-up check, and then
+measures its peak memory in a separate pass, so tracemalloc never slows the
+timed checks. Times are summarized by their median and interquartile range,
+and the results are written as JSON with the metadata of the run. The
+verdict of every formula of a known-valid or known-invalid family is checked.
+With --stats, a last pass checks every formula once more with statistics and
+adds their counts and phase times to its results.
+
+compare matches the formulas of two runs by name and flags the ones whose
+median time or peak memory grew by more than the threshold, leaving out time
+differences below --min-seconds. The exit status is 1 if a formula regressed,
+so the script can run as a check in a pipeline.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from memory_benchmark import disjunctive_formula, variable
+from parse import Parser
+from performance_test import get_long_formula
+from tableau_procedure import Stats, check_validity_of
+from tests.formulas import pigeonhole
+
+# Schemata valid in K and their instances, with A and B formulas.
+VALID_SCHEMATA = {
+    "K": "◻(({A})→({B}))→(◻({A})→◻({B}))",
+    "dual": "◇({A})→~◻~({A})",
+    "conjunction": "◻(({A})^({B}))→◻({A})^◻({B})",
+    "disjunction": "◇(({A})|({B}))→◇({A})|◇({B})",
+}
+# Schemata with countermodels in K whatever the variables of A are.
+INVALID_SCHEMATA = {
+    "T": "◻({A})→({A})",
+    "4": "◻({A})→◻◻({A})",
+    "B": "({A})→◻◇({A})",
+    "D": "◻({A})→◇({A})",
+}
+
+
+def operand(prefix, size):
+    """
+    Builds a contingent formula of size conjuncts over variables starting
+    with prefix, which no world without successors satisfies without its
+    variables.
+
+    Parameters
+    ----------
+    prefix: str
+        Prefix of the names of the variables.
+    size: int
+        Number of conjuncts.
+
+    Returns
+    -------
+    str
+        Text of the formula.
+
+    """
+    return "^".join(f"({variable(prefix + 'a', i)}|◇{variable(prefix + 'b', i)})" for i in range(size))
+
+
+def random_family(rng, size):
+    """
+    Returns three random formulas of performance_test.get_long_formula.
+
+    Parameters
+    ----------
+    rng: random.Random
+        Seeded generator of the family and size.
+    size: int
+        Number of random formulas built, of which the longest is kept.
+
+    Returns
+    -------
+    list
+        Name, text and expected verdict, None as it is not known, of every
+        formula.
+
+    """
+    return [(f"random-{size}-{index}", get_long_formula(size, rng), None) for index in range(3)]
+
+
+def depth_family(rng, size):
+    """
+    Returns a valid and an invalid formula nesting size modal operators.
+
+    Parameters
+    ----------
+    rng: random.Random
+        Seeded generator of the family and size, unused.
+    size: int
+        Modal depth of the formulas.
+
+    Returns
+    -------
+    list
+        Name, text and expected verdict of every formula.
+
+    """
+    boxes = "◻" * size
+    diamonds = "◇" * size
+    return [
+        (f"depth-valid-{size}", f"{boxes}(p→q)→({boxes}p→{boxes}q)", True),
+        (f"depth-invalid-{size}", f"{diamonds}p→{boxes}p", False),
+    ]
+
+
+def pigeonhole_family(rng, size):
+    """
+    Returns the pigeonhole formula of size holes, valid and hard for the
+    tableau.
+
+    Parameters
+    ----------
+    rng: random.Random
+        Seeded generator of the family and size, unused.
+    size: int
+        Number of holes.
+
+    Returns
+    -------
+    list
+        Name, text and expected verdict of the formula.
+
+    """
+    return [(f"pigeonhole-{size}", pigeonhole(size), True)]
+
+
+def disjunctive_family(rng, size):
+    """
+    Returns the invalid formula of memory_benchmark with size disjuncts.
+
+    Parameters
+    ----------
+    rng: random.Random
+        Seeded generator of the family and size, unused.
+    size: int
+        Number of disjuncts.
+
+    Returns
+    -------
+    list
+        Name, text and expected verdict of the formula.
+
+    """
+    return [(f"disjunctive-{size}", disjunctive_formula(size), False)]
+
+
+def schemata_family(rng, size):
+    """
+    Returns the instances of the valid and invalid schemata with operands
+    of size conjuncts.
+
+    Parameters
+    ----------
+    rng: random.Random
+        Seeded generator of the family and size, unused.
+    size: int
+        Number of conjuncts of every operand.
+
+    Returns
+    -------
+    list
+        Name, text and expected verdict of every formula.
+
+    """
+    A, B = operand("x", size), operand("y", size)
+    cases = [(f"valid-{name}-{size}", schema.format(A=A, B=B), True) for name, schema in VALID_SCHEMATA.items()]
+    cases += [(f"invalid-{name}-{size}", schema.format(A=A, B=B), False) for name, schema in INVALID_SCHEMATA.items()]
+    return cases
+
+
+# Generator and sizes of every family; --quick keeps the first two sizes.
+FAMILIES = {
+    "random": (random_family, [10, 100, 1000, 5000]),
+    "depth": (depth_family, [4, 16, 64, 256]),
+    "pigeonhole": (pigeonhole_family, [1, 2, 3]),
+    "disjunctive": (disjunctive_family, [10, 25, 50, 100]),
+    "schemata": (schemata_family, [2, 4, 8, 10]),
+}
+
+
+def cases_of(families, seed, quick=False):
+    """
+    Yields the formulas of the families, from a generator seeded for every
+    family and size.
+
+    Parameters
+    ----------
+    families: list
+        Names of the families, keys of FAMILIES.
+    seed: int
+        Seed of the generators.
+    quick: bool
+        Only the two smallest sizes of every family.
+
+    Returns
+    -------
+    Iterator[tuple]
+        Family, size, name, text and expected verdict of every formula.
+
+    """
+    for family in families:
+        generate, sizes = FAMILIES[family]
+        for size in sizes[:2] if quick else sizes:
+            rng = random.Random(f"{seed}-{family}-{size}")
+            for name, formula, expected in generate(rng, size):
+                yield family, size, name, formula, expected
+
+
+def summarize(runs):
+    """
+    Returns the median and interquartile range of the times of a formula.
+
+    Parameters
+    ----------
+    runs: list
+        Seconds of every timed check.
+
+    Returns
+    -------
+    dict
+        Median, interquartile range and times.
+
+    """
+    if len(runs) < 2:
+        return {"median": runs[0], "iqr": 0.0, "runs": runs}
+    quartiles = statistics.quantiles(runs, n=4)
+    return {"median": statistics.median(runs), "iqr": quartiles[2] - quartiles[0], "runs": runs}
+
+
+def time_check(node, repeat):
+    """
+    Returns the verdict of a formula and the seconds of repeat checks of
+    it, after one warm-up check.
+
+    Parameters
+    ----------
+    node: Node
+        Formula to check.
+    repeat: int
+        Number of timed checks.
+
+    Returns
+    -------
+    tuple
+        Validity of the formula and seconds of every check.
+
+    """
+    valid, _ = check_validity_of(node)
+    runs = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        check_validity_of(node)
+        runs.append(time.perf_counter() - start)
+    return valid, runs
+
+
+def peak_memory(node):
+    """
+    Returns the peak traced bytes of one check of a formula.
+
+    Parameters
+    ----------
+    node: Node
+        Formula to check.
+
+    Returns
+    -------
+    int
+        Peak bytes allocated during the check.
+
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        check_validity_of(node)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def search_stats(formula):
+    """
+    Returns the statistics of one check of a formula, lexing and parsing
+    included.
+
+    Parameters
+    ----------
+    formula: str
+        Text of the formula.
+
+    Returns
+    -------
+    dict
+        Statistics of the check, see Stats.as_dict.
+
+    """
+    stats = Stats()
+    check_validity_of(Parser().parse_text(formula, stats), stats=stats)
+    return stats.as_dict()
+
+
+def git_commit():
+    """
+    Returns the commit of the checked-out tree.
+
+    Returns
+    -------
+    str
+        Commit hash, or None outside a git work tree.
+
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def metadata(args):
+    """
+    Returns the metadata of a run: when and where it ran and its options.
+
+    Parameters
+    ----------
+    args: argparse.Namespace
+        Options of the run command.
+
+    Returns
+    -------
+    dict
+        Metadata of the run.
+
+    """
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "quick": args.quick,
+        "stats": args.stats,
+        "families": args.family,
+    }
+
+
+def run(args):
+    """
+    Benchmarks the families, prints a summary to standard error and writes
+    the JSON results.
+
+    Parameters
+    ----------
+    args: argparse.Namespace
+        Options of the run command.
+
+    Returns
+    -------
+    int
+        Exit status.
+
+    """
+    parser = Parser()
+    results = []
+    cases = list(cases_of(args.family, args.seed, args.quick))
+    nodes = [parser.parse_text(formula) for _, _, _, formula, _ in cases]
+    print(f"{'formula':>24} {'median s':>10} {'IQR s':>10} {'peak MB':>10}", file=sys.stderr)
+    for (family, size, name, formula, expected), node in zip(cases, nodes):
+        valid, runs = time_check(node, args.repeat)
+        if expected is not None and valid is not expected:
+            raise AssertionError(f"{name} is {'valid' if valid else 'invalid'}, expected {'valid' if expected else 'invalid'}")
+        results.append({"name": name, "family": family, "size": size, "length": len(formula), "valid": valid, "time": summarize(runs)})
+    # The memory pass runs after every timed check.
+    for result, node in zip(results, nodes):
+        result["peak_bytes"] = peak_memory(node)
+        print(f"{result['name']:>24} {result['time']['median']:>10.6f} {result['time']['iqr']:>10.6f} "
+              f"{result['peak_bytes'] / 10**6:>10.4f}", file=sys.stderr)
+    if args.stats:
+        for result, (_, _, _, formula, _) in zip(results, cases):
+            result["stats"] = search_stats(formula)
+
+    text = json.dumps({"metadata": metadata(args), "results": results}, indent=1)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+def regressions(baseline, current, threshold, min_seconds):
+    """
+    Compares the formulas of two runs by name.
+
+    Parameters
+    ----------
+    baseline: dict
+        Results of the earlier run.
+    current: dict
+        Results of the later run.
+    threshold: float
+        Relative growth counted as a regression.
+    min_seconds: float
+        Smallest time growth counted as a regression.
+
+    Returns
+    -------
+    list
+        Name, ratio of the median times, ratio of the peak memory and
+        whether it regressed, of every formula of both runs.
+
+    """
+    old = {result["name"]: result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        before = old.get(result["name"])
+        if before is None:
+            continue
+        time_before, time_after = before["time"]["median"], result["time"]["median"]
+        time_ratio = time_after / time_before if time_before else float("inf")
+        memory_ratio = result["peak_bytes"] / before["peak_bytes"] if before["peak_bytes"] else float("inf")
+        slower = time_ratio > 1 + threshold and time_after - time_before > min_seconds
+        larger = memory_ratio > 1 + threshold
+        rows.append((result["name"], time_ratio, memory_ratio, slower or larger))
+    return rows
+
+
+def compare(args):
+    """
+    Prints the comparison of two runs.
+
+    Parameters
+    ----------
+    args: argparse.Namespace
+        Options of the compare command.
+
+    Returns
+    -------
+    int
+        Exit status, 1 if a formula regressed.
+
+    """
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    rows = regressions(baseline, current, args.threshold, args.min_seconds)
+    print(f"{'formula':>24} {'time':>8} {'memory':>8}")
+    for name, time_ratio, memory_ratio, regressed in rows:
+        print(f"{name:>24} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x{'  REGRESSION' if regressed else ''}")
+    missing = {result["name"] for result in baseline["results"]} - {result["name"] for result in current["results"]}
+    if missing:
+        print(f"not in the current run: {', '.join(sorted(missing))}")
+    return 1 if any(row[3] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the validity checker.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="benchmark families of formulas")
+    run_parser.add_argument("--family", action="append", choices=list(FAMILIES), help="family to run, all of them by default")
+    run_parser.add_argument("--repeat", type=int, default=5, help="number of timed checks per formula")
+    run_parser.add_argument("--seed", type=int, default=0, help="seed of the formula generators")
+    run_parser.add_argument("--quick", action="store_true", help="only the two smallest sizes of every family")
+    run_parser.add_argument("--stats", action="store_true", help="add the statistics of one more check of every formula")
+    run_parser.add_argument("--output", metavar="PATH", help="JSON file of the results, standard output if omitted")
+    compare_parser = commands.add_parser("compare", help="flag regressions between two runs")
+    compare_parser.add_argument("baseline", help="JSON results of the earlier run")
+    compare_parser.add_argument("current", help="JSON results of the later run")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="relative growth counted as a regression")
+    compare_parser.add_argument("--min-seconds", type=float, default=0.001, help="smallest time growth counted as a regression")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        args.family = args.family or list(FAMILIES)
+        sys.exit(run(args))
+    sys.exit(compare(args))
@@ -0,0 +1,115 @@
+"""
+Measure how long the modules of the checker take to import, with -X importtime.
+
+    python performance/import_time.py [--budget-ms MS] [--repeat N] [module ...]
+
+Every module is imported in a fresh interpreter, once to write its bytecode
+cache and then --repeat times, and the median cumulative import time is
+compared to its budget. The modules must not import any third-party package,
+except the GUI toolkit of main: its import is left out of the time of main
+and of the check, which keep the plotting stack out of the start of the
+window, and main is skipped when the toolkit is not installed. The exit
+status is 1 if a budget is exceeded or a third-party package is imported, so
+the script can run as a check in a pipeline.
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets in milliseconds of the modules that have to stay light.
+BUDGETS = {
+    "parse": 30,
+    "tableau_procedure": 40,
+    "modal_checker": 80,
+    "main": 100,
+}
+# Third-party packages a module needs, left out of its time and of the check.
+ALLOWED = {
+    "main": ("customtkinter",),
+}
+
+
+def import_times(module):
+    """
+    Import a module in a fresh interpreter and return the cumulative
+    microseconds of every module imported, by name, including the ones the
+    interpreter imports at startup. No module only starts the interpreter.
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    code = f"import {module}" if module else "pass"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def third_party(names):
+    """
+    Return the imported packages that are neither in the standard library nor
+    modules of the checker.
+    """
+    packages = {name.split(".")[0] for name in names}
+    return sorted(package for package in packages
+                  if package not in sys.stdlib_module_names
+                  and not os.path.exists(os.path.join(ROOT, package + ".py")))
+
+
+def measure(module, repeat):
+    """
+    Return the median milliseconds taken to import a module and the third-party
+    packages it imports, leaving out the ones imported at startup and the
+    allowed packages of the module with everything they import.
+    """
+    allowed = ALLOWED.get(module, ())
+    skipped = set(import_times(None))
+    for package in allowed:
+        skipped.update(import_times(package))
+    import_times(module)
+    runs = [import_times(module) for _ in range(repeat)]
+    milliseconds = statistics.median(run[module] - sum(run.get(package, 0) for package in allowed) for run in runs) / 1000
+    return milliseconds, third_party(set(runs[0]) - skipped)
+
+
+def missing(module):
+    """
+    Return the allowed packages of a module that are not installed.
+    """
+    return [package for package in ALLOWED.get(module, ()) if importlib.util.find_spec(package) is None]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the import time of the checker's modules.")
+    parser.add_argument("modules", nargs="*", help="modules to measure, the ones with a budget by default")
+    parser.add_argument("--budget-ms", type=float, help="budget of every module, instead of the defaults")
+    parser.add_argument("--repeat", type=int, default=5, help="number of measured imports per module")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':>20} {'ms':>8} {'budget':>8}  third-party")
+    for module in args.modules or BUDGETS:
+        budget = args.budget_ms if args.budget_ms is not None else BUDGETS.get(module)
+        if missing(module):
+            print(f"{module:>20} skipped, {', '.join(missing(module))} is not installed")
+            continue
+        try:
+            milliseconds, packages = measure(module, args.repeat)
+        except subprocess.CalledProcessError as e:
+            failed = True
+            print(f"{module:>20} import failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        over = budget is not None and milliseconds > budget
+        failed = failed or over or bool(packages)
+        print(f"{module:>20} {milliseconds:>8.1f} {budget if budget is not None else '-':>8}  "
+              f"{', '.join(packages) or '-'}{'  OVER BUDGET' if over else ''}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,112 @@
+"""
+Measure the time and peak memory of the checker on formulas with many beta
+splits on the path to their open branch.
+
+    python performance/memory_benchmark.py [--root PATH] [n ...]
+
+Every formula is checked once untraced, for its time, and once more under
+tracemalloc, for its peak memory, so tracing never slows the timed check.
+With --root, the parser and the tableau are imported from another tree,
+such as a checkout of an earlier commit, so its figures can be measured with
+the same script:
+
+    git worktree add ../before 47324f2
+    python performance/memory_benchmark.py --root ../before 10 12 14
+
+The baseline commit 47324f2 deep-copied the whole branch at every beta
+split. Against the current tree, which undoes a shared trail instead, on one
+machine:
+
+    disjuncts   before (s / MB)     after (s / MB)
+    10          1.505 / 0.4025      0.0003 / 0.0209
+    12          7.064 / 0.5245      0.0003 / 0.0235
+    14          25.93 / 0.6887      0.0003 / 0.0259
+    200         (did not finish)    0.0029 / 0.2982
+"""
+import argparse
+import gc
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from string import ascii_lowercase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def variable(prefix, index):
+    """
+    Name the index-th variable with the given prefix, using letters only.
+    """
+    name = ""
+    while True:
+        index, digit = divmod(index, 26)
+        name += ascii_lowercase[digit]
+        if index == 0:
+            return prefix + name
+
+
+def disjunctive_formula(n):
+    """
+    Build (p_1 ∨ ◇q_1) ∧ ... ∧ (p_n ∨ ◇q_n) → □r, which forces n beta splits
+    on the path to its open branch. The conjunction is nested in explicit
+    binary parentheses, so every version of the parser reads it alike.
+    """
+    formula = f"({variable('p', n - 1)}|◇{variable('q', n - 1)})"
+    for i in range(n - 2, -1, -1):
+        formula = f"(({variable('p', i)}|◇{variable('q', i)})^{formula})"
+    return formula + "→□r"
+
+
+def measure(formula):
+    """
+    Return the elapsed seconds of one validity check, untraced, and the peak
+    traced megabytes of a second one.
+    """
+    # Imported here, so --root can choose the tree they come from.
+    from parse import Parser
+    from tableau_procedure import check_validity_of
+
+    node = Parser().parse_text(formula)
+    gc.collect()
+    start_time = time.perf_counter()
+    check_validity_of(node)
+    elapsed_time = time.perf_counter() - start_time
+    gc.collect()
+    tracemalloc.start()
+    try:
+        check_validity_of(node)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed_time, peak / 10**6
+
+
+def git_commit(root):
+    """
+    Return the commit checked out in root, or None outside a git work tree.
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the time and peak memory of checks with many beta splits.")
+    parser.add_argument("sizes", nargs="*", type=int, help="numbers of disjuncts, 25 50 100 200 by default")
+    parser.add_argument("--root", default=ROOT, help="tree the parser and the tableau are imported from")
+    args = parser.parse_args()
+
+    # Older trees parse and expand formulas recursively.
+    sys.setrecursionlimit(10000)
+    root = os.path.abspath(args.root)
+    sys.path.insert(0, root)
+    print(f"engine: {root} ({git_commit(root) or 'not a git work tree'})")
+    print(f"{'disjuncts':>10} {'seconds':>10} {'peak MB':>10}")
+    for n in args.sizes or [25, 50, 100, 200]:
+        elapsed_time, peak = measure(disjunctive_formula(n))
+        print(f"{n:>10} {elapsed_time:>10.4f} {peak:>10.4f}")
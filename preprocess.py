@@ -0,0 +1,274 @@
+from parse import Node
+
+
+TOP = Node("TRUE", "⊤")
+BOTTOM = Node("FALSE", "⊥")
+
+DUAL = {"AND": "OR", "OR": "AND", "NECESSARILY": "POSSIBLY", "POSSIBLY": "NECESSARILY"}
+VALUES = {"AND": "^", "OR": "|", "NECESSARILY": "□", "POSSIBLY": "◇"}
+
+
+class PreprocessReport:
+    """
+    Encapsulate the effect of preprocessing a formula.
+
+    Sizes count distinct subformulas, which is what the tableau works on.
+
+    Attributes
+    ----------
+    size_before: int
+        Size of the formula before preprocessing.
+    size_after: int
+        Size of the formula after preprocessing.
+
+    Methods
+    -------
+    reduction(self)
+        Returns the fraction by which the formula shrank.
+    __repr__(self)
+        Returns the string representation of the report.
+
+    """
+
+    def __init__(self, size_before: int, size_after: int):
+        self.size_before = size_before
+        self.size_after = size_after
+
+    def reduction(self) -> float:
+        """
+        Returns the fraction by which the formula shrank.
+
+        Returns
+        -------
+        float
+            1 - size_after / size_before.
+
+        """
+        return 1 - self.size_after / self.size_before
+
+    def __repr__(self) -> str:
+        """
+        Returns the string representation of the report.
+
+        Returns
+        -------
+        str
+            String representation of the report.
+
+        """
+        return f"PreprocessReport({self.size_before} -> {self.size_after}, {self.reduction():.1%} smaller)"
+
+
+def formula_size(formula: Node) -> int:
+    """
+    Counts the distinct subformulas of a formula.
+
+    Parameters
+    ----------
+    formula: Node
+        Formula to measure.
+
+    Returns
+    -------
+    int
+        Number of distinct subformulas.
+
+    """
+    seen = {formula}
+    stack = [formula]
+    while stack:
+        for arg in stack.pop().args:
+            if arg not in seen:
+                seen.add(arg)
+                stack.append(arg)
+    return len(seen)
+
+
+def make_nary(type: str, args: list, complements: dict) -> Node:
+    """
+    Builds a simplified conjunction or disjunction.
+
+    Nested operands of the same connective are flattened, units and
+    duplicates are dropped, a zero or a complementary pair collapses the
+    node to the zero, and operands absorbed by another operand are removed,
+    as in p ∧ (p ∨ q) = p.
+
+    Parameters
+    ----------
+    type: str
+        "AND" or "OR".
+    args: list
+        Operands, already simplified.
+    complements: dict
+        Known complements of simplified formulas.
+
+    Returns
+    -------
+    Node
+        Simplified formula.
+
+    """
+    unit, zero = (TOP, BOTTOM) if type == "AND" else (BOTTOM, TOP)
+    given = set(args)
+    for arg in args:
+        if complements.get(arg) in given:
+            return zero
+    flat = []
+    seen = set()
+    for arg in args:
+        for operand in (arg.args if arg.type == type else (arg,)):
+            if operand is zero:
+                return zero
+            if operand is unit or operand in seen:
+                continue
+            seen.add(operand)
+            flat.append(operand)
+    for operand in flat:
+        if complements.get(operand) in seen:
+            return zero
+    dual = DUAL[type]
+    flat = [operand for operand in flat
+            if operand.type != dual or not any(arg in seen for arg in operand.args)]
+    if not flat:
+        return unit
+    if len(flat) == 1:
+        return flat[0]
+    return Node(type, VALUES[type], args=tuple(flat))
+
+
+def make_modal(type: str, arg: Node) -> Node:
+    """
+    Builds a simplified modal formula: □⊤ is ⊤ and ◇⊥ is ⊥.
+
+    Parameters
+    ----------
+    type: str
+        "NECESSARILY" or "POSSIBLY".
+    arg: Node
+        Operand, already simplified.
+
+    Returns
+    -------
+    Node
+        Simplified formula.
+
+    """
+    if type == "NECESSARILY" and arg is TOP:
+        return TOP
+    if type == "POSSIBLY" and arg is BOTTOM:
+        return BOTTOM
+    return Node(type, VALUES[type], right=arg)
+
+
+def operands(node: Node, negated: bool) -> list:
+    """
+    Returns the operands whose negation normal form is needed to build the
+    negation normal form of a node.
+
+    Parameters
+    ----------
+    node: Node
+        Formula being converted.
+    negated: bool
+        Whether the negation of the formula is being converted.
+
+    Returns
+    -------
+    list
+        Pairs of operand and whether it is negated.
+
+    """
+    type = node.type
+    if type == "NOT":
+        return [(node.args[0], not negated)]
+    if type == "IMPLIES":
+        return [(node.args[0], not negated), (node.args[1], negated)]
+    return [(arg, negated) for arg in node.args]
+
+
+def build(node: Node, negated: bool, results: list, complements: dict) -> Node:
+    """
+    Builds the simplified negation normal form of a node from those of its
+    operands.
+
+    Parameters
+    ----------
+    node: Node
+        Formula being converted.
+    negated: bool
+        Whether the negation of the formula is being converted.
+    results: list
+        Converted operands, in the order given by operands().
+    complements: dict
+        Known complements of simplified formulas.
+
+    Returns
+    -------
+    Node
+        Simplified formula in negation normal form.
+
+    """
+    type = node.type
+    if type == "VARIABLE":
+        literal = Node("NOT", "~", right=node)
+        complements[node] = literal
+        complements[literal] = node
+        return literal if negated else node
+    if type == "TRUE":
+        return BOTTOM if negated else TOP
+    if type == "FALSE":
+        return TOP if negated else BOTTOM
+    if type == "NOT":
+        return results[0]
+    if type == "IMPLIES":
+        return make_nary("AND" if negated else "OR", results, complements)
+    if type in ("AND", "OR"):
+        return make_nary(DUAL[type] if negated else type, results, complements)
+    return make_modal(DUAL[type] if negated else type, results[0])
+
+
+def simplify(formula: Node) -> tuple:
+    """
+    Converts a formula to simplified negation normal form.
+
+    Negations are pushed down to the variables, through □ and ◇ as well,
+    double negations and implications disappear, ⊤ and ⊥ are propagated and
+    conjunctions and disjunctions are flattened, deduplicated and checked for
+    complementary operands, so p ∨ ¬p becomes ⊤ and q ∧ ¬q becomes ⊥. The
+    result is equivalent to the formula and the traversal uses an explicit
+    stack.
+
+    Parameters
+    ----------
+    formula: Node
+        Formula to preprocess.
+
+    Returns
+    -------
+    tuple
+        Preprocessed formula and PreprocessReport.
+
+    """
+    memo = {}
+    complements = {}
+    stack = [(formula, False)]
+    while stack:
+        key = stack[-1]
+        if key in memo:
+            stack.pop()
+            continue
+        node, negated = key
+        children = operands(node, negated)
+        pending = [child for child in children if child not in memo]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        result = build(node, negated, [memo[child] for child in children], complements)
+        memo[key] = result
+        other = memo.get((node, not negated))
+        if other is not None:
+            complements[result] = other
+            complements[other] = result
+    result = memo[(formula, False)]
+    return result, PreprocessReport(formula_size(formula), formula_size(result))
@@ -0,0 +1,388 @@
+"""
+Event traces of the tableau search, and the tools that read them.
+
+    python -m search_trace flamegraph trace.jsonl [--weight time|rules] > trace.folded
+    python -m search_trace replay trace.jsonl [--step]
+
+A Trace is a probe of the search that records one event per rule applied,
+beta split, world created, world entered and left, clash found and
+backtrack, as a JSON array: its kind, the microseconds since the search
+started, the id of its world in the check and its details. Formulas are
+numbered by the id of their node and their text is recorded once, in a
+"formula" event. The events are kept in a ring buffer holding the latest
+ones, or streamed as JSON lines to a file. A search without a trace runs
+without a probe and pays nothing for it.
+
+flamegraph turns a trace into collapsed stacks, the input of flamegraph.pl
+or speedscope: the frames of an event are the modal formulas that created
+the worlds on the way from the root to its world, then its rule. replay
+prints the events one per line, indented by the depth of their world,
+waiting for Enter after each one with --step.
+"""
+import argparse
+import json
+import sys
+import time
+from collections import deque
+
+from parse import Node
+from tableau_procedure import Probe
+
+# Characters of formula text recorded in a trace, the rest is cut off.
+TEXT_LIMIT = 120
+# Events kept by a Trace that does not stream them.
+CAPACITY = 65536
+
+BINARY = {"AND", "OR", "IMPLIES"}
+
+
+def formula_text(formula: Node, limit: int = None) -> str:
+    """
+    Returns the text of a formula, fully parenthesized, without recursion.
+
+    Parameters
+    ----------
+    formula: Node
+        Formula to print.
+    limit: int
+        Number of characters after which the text is cut off with "…", or
+        None.
+
+    Returns
+    -------
+    str
+        Text of formula.
+
+    """
+    parts = []
+    length = 0
+    stack = [formula]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            text = item
+        elif item.type in BINARY:
+            stack.append(")")
+            for arg in reversed(item.args[1:]):
+                stack.extend((arg, item.value))
+            stack.append(item.args[0])
+            text = "("
+        elif item.args:
+            stack.append(item.args[0])
+            text = item.value
+        else:
+            text = item.value
+        parts.append(text)
+        length += len(text)
+        if limit is not None and length > limit:
+            return "".join(parts)[:limit] + "…"
+    return "".join(parts)
+
+
+class Trace(Probe):
+    """
+    Encapsulate the event trace of a search.
+
+    Attributes
+    ----------
+    events: deque
+        Latest events, when they are not streamed.
+    stream: TextIO
+        File the events are written to as JSON lines, or None.
+    limit: int
+        Characters of formula text recorded.
+    formulas: dict
+        Text of every formula seen, by formula id.
+    pending: list
+        Events of the rule being applied, recorded after it with its time
+        and formula.
+    started: int
+        Time the trace started at, in nanoseconds.
+
+    Methods
+    -------
+    emit(self, event)
+        Records an event.
+    formula(self, formula)
+        Returns the id of a formula, recording its text the first time.
+    dump(self, stream)
+        Writes the formulas and the events kept to a file.
+
+    """
+
+    def __init__(self, name: str = None, capacity: int = CAPACITY, stream=None, limit: int = TEXT_LIMIT):
+        self.events = deque(maxlen=capacity)
+        self.stream = stream
+        self.limit = limit
+        self.formulas = {}
+        self.pending = []
+        self.started = time.perf_counter_ns()
+        self.emit(["check", 0, name])
+
+    def now(self) -> int:
+        return (time.perf_counter_ns() - self.started) // 1000
+
+    def emit(self, event: list) -> None:
+        """
+        Records an event.
+
+        Parameters
+        ----------
+        event: list
+            Kind, time and details of the event.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.stream is None:
+            self.events.append(event)
+        else:
+            self.stream.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def formula(self, formula: Node) -> int:
+        """
+        Returns the id of a formula, recording its text the first time.
+
+        Parameters
+        ----------
+        formula: Node
+            Formula of an event.
+
+        Returns
+        -------
+        int
+            Id of formula.
+
+        """
+        if formula.id not in self.formulas:
+            self.formulas[formula.id] = text = formula_text(formula, self.limit)
+            if self.stream is not None:
+                self.emit(["formula", formula.id, text])
+        return formula.id
+
+    def rule(self, tableau, formula: Node, value: bool) -> None:
+        time1 = self.now()
+        id1 = self.formula(formula)
+        self.emit(["rule", time1, tableau.id, id1, int(value)])
+        for event in self.pending:
+            event[1] = time1
+            if event[0] == "world":
+                event[4] = id1
+            self.emit(event)
+        self.pending.clear()
+
+    def split(self, tableau, alternatives: tuple) -> None:
+        self.pending.append(["split", None, tableau.id, len(alternatives)])
+
+    def world(self, tableau, successor) -> None:
+        if tableau is None:
+            self.emit(["world", self.now(), -1, successor.id, None])
+        else:
+            self.pending.append(["world", None, tableau.id, successor.id, None])
+
+    def enter(self, tableau, depth: int) -> None:
+        self.emit(["enter", self.now(), tableau.id, depth])
+
+    def leave(self, tableau, open: bool, pending: int) -> None:
+        self.emit(["leave", self.now(), tableau.id, int(open)])
+
+    def clash(self, tableau) -> None:
+        self.emit(["clash", self.now(), tableau.id, self.formula(tableau.clash)])
+
+    def backtrack(self, tableau, alternative: tuple, undone: int, exhausted: bool) -> None:
+        formula, value = alternative
+        self.emit(["backtrack", self.now(), tableau.id, self.formula(formula), int(value), undone])
+
+    def dump(self, stream) -> None:
+        """
+        Writes the formulas and the events kept to a file, as JSON lines.
+
+        Parameters
+        ----------
+        stream: TextIO
+            File to write to.
+
+        Returns
+        -------
+        None
+
+        """
+        for id1, text in self.formulas.items():
+            stream.write(json.dumps(["formula", id1, text], ensure_ascii=False, separators=(",", ":")) + "\n")
+        for event in self.events:
+            stream.write(json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def read_events(stream):
+    """
+    Yields the events of a trace file, one per line.
+
+    Parameters
+    ----------
+    stream: TextIO
+        Trace file.
+
+    Returns
+    -------
+    Iterator[list]
+        Events.
+
+    """
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def collapse(events, weight: str = "time") -> dict:
+    """
+    Returns the collapsed stacks of a trace: every event of a world is on
+    the stack of the modal formulas that created the worlds from the root to
+    it, under the name of the check. An event weighs the microseconds since
+    the event before it, or 1 for a rule with the "rules" weight.
+
+    Parameters
+    ----------
+    events: Iterable[list]
+        Events of one or more checks.
+    weight: str
+        "time" or "rules".
+
+    Returns
+    -------
+    dict
+        Weight of every stack, by its frames joined with ";".
+
+    """
+    formulas = {}
+    stacks = {}
+    paths = {}
+    root = "check"
+    previous = 0
+    for event in events:
+        kind = event[0]
+        if kind == "formula":
+            formulas[event[1]] = event[2]
+            continue
+        if kind == "check":
+            root = event[2] or "check"
+            paths = {}
+            previous = 0
+            continue
+        elapsed, previous = event[1] - previous, event[1]
+        world = event[2]
+        if kind == "world":
+            if world < 0:
+                paths[event[3]] = (root,)
+            else:
+                paths[event[3]] = paths.get(world, (root, "…")) + (formulas.get(event[4], "?"),)
+        path = paths.get(world, (root, "…")) if world >= 0 else (root,)
+        if kind == "rule":
+            frame = ("T " if event[4] else "F ") + formulas.get(event[3], "?")
+        elif kind in ("clash", "backtrack"):
+            frame = kind
+        else:
+            frame = None
+        if weight == "rules":
+            if kind != "rule":
+                continue
+            elapsed = 1
+        stack = ";".join(path if frame is None else path + (frame,)).replace("\n", " ")
+        stacks[stack] = stacks.get(stack, 0) + elapsed
+    return stacks
+
+
+def replay(events):
+    """
+    Yields the events of a trace as lines of text, indented by the depth of
+    their world, so the search can be stepped through.
+
+    Parameters
+    ----------
+    events: Iterable[list]
+        Events of one or more checks.
+
+    Returns
+    -------
+    Iterator[str]
+        Description of every event.
+
+    """
+    formulas = {}
+    depths = {}
+    branch = 0
+    for event in events:
+        kind = event[0]
+        if kind == "formula":
+            formulas[event[1]] = event[2]
+            continue
+        if kind == "check":
+            depths = {}
+            branch = 0
+            yield f"check {event[2] or ''}".rstrip()
+            continue
+        time1, world = event[1], event[2]
+        if kind == "world" and world < 0:
+            depths[event[3]] = 0
+            continue
+        indent = "  " * depths.get(world, 0)
+        head = f"{time1:>10} us {indent}w{world}"
+        if kind == "rule":
+            yield f"{head} {'T' if event[4] else 'F'} {formulas.get(event[3], '?')}"
+        elif kind == "world":
+            depths[event[3]] = depths.get(world, 0) + 1
+            yield f"{head} creates w{event[3]} for {formulas.get(event[4], '?')}"
+        elif kind == "split":
+            branch += 1
+            yield f"{head} splits into {event[3]} branches, {branch} open"
+        elif kind == "enter":
+            yield f"{head} is checked, at depth {event[3]}"
+        elif kind == "leave":
+            yield f"{head} is {'open' if event[3] else 'closed'}"
+        elif kind == "clash":
+            yield f"{head} clashes on {formulas.get(event[3], '?')}"
+        elif kind == "backtrack":
+            yield f"{head} backtracks {event[5]} changes to {'T' if event[4] else 'F'} {formulas.get(event[3], '?')}"
+
+
+def main(argv: list = None) -> int:
+    """
+    Runs the command line.
+
+    Parameters
+    ----------
+    argv: list
+        Arguments, without the program name.
+
+    Returns
+    -------
+    int
+        Exit status.
+
+    """
+    parser = argparse.ArgumentParser(prog="search_trace", description="Read event traces of the tableau search.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    flamegraph = commands.add_parser("flamegraph", help="print the collapsed stacks of a trace")
+    flamegraph.add_argument("file", help="trace file")
+    flamegraph.add_argument("--weight", choices=["time", "rules"], default="time", help="weigh events by microseconds or count rules")
+    steps = commands.add_parser("replay", help="print the events of a trace one by one")
+    steps.add_argument("file", help="trace file")
+    steps.add_argument("--step", action="store_true", help="wait for Enter after every event")
+    args = parser.parse_args(argv)
+
+    with open(args.file, encoding="utf-8") as f:
+        if args.command == "flamegraph":
+            for stack, weight in collapse(read_events(f), args.weight).items():
+                if weight > 0:
+                    sys.stdout.write(f"{stack} {weight}\n")
+            return 0
+        for line in replay(read_events(f)):
+            print(line)
+            if args.step and input() == "q":
+                break
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,33 +1,89 @@
+import time
+from array import array
+from contextlib import contextmanager, nullcontext
 
-import copy
 from parse import Node
+from preprocess import simplify
 
 
 class KripkeWorld:
     """
     Encapsulate the behaviour of Kripke World.
 
+    A world created on its own keeps its name and true variables itself.
+    Once added to a KripkeModel it becomes a view of its copy there, as are
+    the worlds the model hands out, so a model does not need an object per
+    world.
+
     Attributes
     ----------
+    model: KripkeModel
+        Model holding the world, or None for a world on its own.
+    id: int
+        Id of the world in its model.
     name: str
     values: list
 
     Methods
     -------
+    view(model, id)
+        Returns the view of a world of a model.
     get_name(self)
         Returns the name of the world.
     add_variable(self, value)
         Adds the true variable to the world.
+    __eq__(self, other)
+        Compares two worlds.
+    __hash__(self)
+        Hash of the world.
     __repr__(self)
         Returns the string representation of the world.
-    __del__(self)
-        Deletes the Kripke World.
 
     """
+    __slots__ = ("model", "id", "_name", "_values")
+
+    def __init__(self, name: str, values: list = None):
+        self.model = None
+        self.id = None
+        self._name = name
+        self._values = []
+        for value in values or ():
+            self.add_variable(value)
+
+    @staticmethod
+    def view(model: 'KripkeModel', id: int) -> 'KripkeWorld':
+        """
+        Returns the view of a world of a model.
+
+        Parameters
+        ----------
+        model: KripkeModel
+            Model holding the world.
+        id: int
+            Id of the world in the model.
 
-    def __init__(self, name: str, values: list = []):
-        self.name = name
-        self.values = values
+        Returns
+        -------
+        KripkeWorld
+            View of the world.
+
+        """
+        world = object.__new__(KripkeWorld)
+        world.model = model
+        world.id = id
+        return world
+
+    @property
+    def name(self) -> str:
+        if self.model is None:
+            return self._name
+        return self.model.name(self.id)
+
+    @property
+    def values(self) -> list:
+        if self.model is None:
+            return self._values
+        return self.model.values(self.id)
 
     def get_name(self) -> str:
         """
@@ -39,205 +95,1401 @@ class KripkeWorld:
             Name of the world.
 
         """
-        return self.name
+        return self.name
+
+    def add_variable(self, value) -> None:
+        """
+        Adds the true variable to the world.
+
+        Parameters
+        ----------
+        value: object
+            True variable in the world.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.model is not None:
+            self.model.add_variable(self.id, value)
+        elif value not in self._values:
+            self._values.append(value)
+
+    def __eq__(self, other) -> bool:
+        """
+        Compares two worlds.
+
+        Parameters
+        ----------
+        other: KripkeWorld
+            Another world to compare with.
+
+        Returns
+        -------
+        bool
+            True if both are views of the same world of the same model, or
+            are the same world on its own.
+
+        """
+        if not isinstance(other, KripkeWorld):
+            return NotImplemented
+        if self.model is None or other.model is None:
+            return self is other
+        return self.model is other.model and self.id == other.id
+
+    def __hash__(self) -> int:
+        """
+        Hash of the world.
+
+        Returns
+        -------
+        int
+            Hash of the world, which changes when a world on its own is
+            added to a model.
+
+        """
+        if self.model is None:
+            return object.__hash__(self)
+        return hash((id(self.model), self.id))
+
+    def __repr__(self) -> str:
+        """
+        Returns the string representation of the world.
+
+        Returns
+        -------
+        str
+            String representation of the world.
+
+        """
+        return f"World({self.name}, {self.values})"
+
+
+class KripkeModel:
+    """
+    Encapsulate the behaviour of Kripke Model.
+
+    Worlds are numbered densely from 0. A world without a name of its own is
+    called "world" followed by its number. The valuation of a world is a
+    bitset over the ids of the variables of the model, and the accessibility
+    relation is kept as two arrays of edges, indexed by source world on
+    demand. KripkeWorld objects and the worlds and relations attributes are
+    views built from these on request. When the model has a trail, every
+    change is recorded on it, so a search can undo it.
+
+    Attributes
+    ----------
+    names: list
+        Name of every world, None for a world named after its number.
+    valuations: list
+        Bitset of the true variables of every world.
+    atoms: list
+        Variable of every atom id.
+    atom_ids: dict
+        Atom id of every variable.
+    sources: array
+        Source world of every edge.
+    targets: array
+        Target world of every edge.
+    trail: Trail
+        Undo log recording the changes, or None.
+    worlds: list
+        Views of the worlds.
+    relations: dict
+        Names of the accessible worlds of every world with an edge.
+
+    Methods
+    -------
+    new_world(self, name=None)
+        Adds a new world to the model.
+    name(self, id)
+        Returns the name of a world.
+    id(self, name)
+        Returns the id of a world.
+    values(self, id)
+        Returns the true variables of a world.
+    add_variable(self, id, value)
+        Makes a variable true in a world.
+    connect(self, id1, id2)
+        Adds an edge between two worlds.
+    successors(self, id)
+        Returns the ids of the worlds accessible from a world.
+    add_relation(self, world1, world2)
+        Adds the relation between two worlds.
+    add_world(self, world)
+        Adds the world to the model.
+    get_model(self)
+        Returns the generated Kripke model.
+    __len__(self)
+        Returns the number of worlds.
+    __repr__(self)
+        Returns the string representation of the model.
+    new_copy(self, mapping)
+        Returns the new copy of the model.
+
+    """
+    __slots__ = ("names", "valuations", "atoms", "atom_ids", "sources", "targets", "trail", "_ids", "_index")
+
+    def __init__(self, worlds: list = None, relations: dict = None, trail: 'Trail' = None):
+        self.names = []
+        self.valuations = []
+        self.atoms = []
+        self.atom_ids = {}
+        self.sources = array("l")
+        self.targets = array("l")
+        self.trail = None
+        self._ids = None
+        self._index = None
+        for world in worlds or ():
+            self.add_world(world)
+        for world1, related in (relations or {}).items():
+            for world2 in related:
+                self.add_relation(world1, world2)
+        self.trail = trail
+
+    def _append(self, lst, value) -> None:
+        if self.trail is None:
+            lst.append(value)
+        else:
+            self.trail.append(lst, value)
+
+    def new_world(self, name: str = None) -> int:
+        """
+        Adds a new world, without true variables, to the model.
+
+        Parameters
+        ----------
+        name: str
+            Name of the world, None to name it after its number.
+
+        Returns
+        -------
+        int
+            Id of the world.
+
+        """
+        self._append(self.names, name)
+        self._append(self.valuations, 0)
+        id = len(self.valuations) - 1
+        if self._ids is not None:
+            if self.trail is None:
+                self._ids.setdefault(self.name(id), id)
+            else:
+                self._ids = None
+        return id
+
+    def name(self, id: int) -> str:
+        """
+        Returns the name of a world.
+
+        Parameters
+        ----------
+        id: int
+            Id of the world.
+
+        Returns
+        -------
+        str
+            Name of the world.
+
+        """
+        name = self.names[id]
+        return f"world{id}" if name is None else name
+
+    def id(self, name: str) -> int:
+        """
+        Returns the id of a world, or None if there is no world of that name.
+        The index of the names is built on the first lookup; a model with a
+        trail is not indexed, as undoing would leave the index stale.
+
+        Parameters
+        ----------
+        name: str
+            Name of the world.
+
+        Returns
+        -------
+        int
+            Id of the world.
+
+        """
+        ids = self._ids
+        if ids is None:
+            ids = {}
+            for id in range(len(self.names)):
+                ids.setdefault(self.name(id), id)
+            if self.trail is None:
+                self._ids = ids
+        return ids.get(name)
+
+    def values(self, id: int) -> list:
+        """
+        Returns the true variables of a world.
+
+        Parameters
+        ----------
+        id: int
+            Id of the world.
+
+        Returns
+        -------
+        list
+            True variables, in the order the model first met them.
+
+        """
+        bits = self.valuations[id]
+        return [atom for index, atom in enumerate(self.atoms) if bits >> index & 1]
+
+    def add_variable(self, id: int, value) -> None:
+        """
+        Makes a variable true in a world.
+
+        Parameters
+        ----------
+        id: int
+            Id of the world.
+        value: object
+            True variable in the world.
+
+        Returns
+        -------
+        None
+
+        """
+        atom = self.atom_ids.get(value)
+        if atom is None:
+            atom = self.atom_ids[value] = len(self.atoms)
+            self.atoms.append(value)
+        bits = self.valuations[id] | 1 << atom
+        if self.trail is None:
+            self.valuations[id] = bits
+        else:
+            self.trail.set_index(self.valuations, id, bits)
+
+    def connect(self, id1: int, id2: int) -> None:
+        """
+        Adds an edge between two worlds.
+
+        Parameters
+        ----------
+        id1: int
+            Id of the first world.
+        id2: int
+            Id of the world accessible from it.
+
+        Returns
+        -------
+        None
+
+        """
+        self._index = None
+        self._append(self.sources, id1)
+        self._append(self.targets, id2)
+
+    def successors(self, id: int) -> array:
+        """
+        Returns the ids of the worlds accessible from a world. The edges are
+        indexed by source world, in compressed sparse row form, on the first
+        lookup after a change.
+
+        Parameters
+        ----------
+        id: int
+            Id of the world.
+
+        Returns
+        -------
+        array
+            Ids of the accessible worlds.
+
+        """
+        key = (len(self.sources), len(self.valuations))
+        if self._index is None or self._index[0] != key:
+            offsets = array("l", [0]) * (key[1] + 1)
+            for source in self.sources:
+                offsets[source + 1] += 1
+            for index in range(key[1]):
+                offsets[index + 1] += offsets[index]
+            adjacency = array("l", [0]) * key[0]
+            fill = offsets[:-1]
+            for source, target in zip(self.sources, self.targets):
+                adjacency[fill[source]] = target
+                fill[source] += 1
+            self._index = (key, offsets, adjacency)
+        _, offsets, adjacency = self._index
+        return adjacency[offsets[id]:offsets[id + 1]]
+
+    def add_relation(self, world1: str, world2: str) -> None:
+        """
+        Adds the relation between two worlds, adding the worlds first if the
+        model has no world of their names.
+
+        Parameters
+        ----------
+        world1: str
+            Name of the first world.
+        world2: str
+            Name of the second world.
+
+        Returns
+        -------
+        None
+
+        """
+        id1 = self.id(world1)
+        if id1 is None:
+            id1 = self.new_world(world1)
+        id2 = self.id(world2)
+        if id2 is None:
+            id2 = self.new_world(world2)
+        self.connect(id1, id2)
+
+    def add_world(self, world: KripkeWorld) -> None:
+        """
+        Adds the world to the model. The world becomes a view of its copy
+        in this model.
+
+        Parameters
+        ----------
+        world: KripkeWorld
+            World to be added.
+
+        Returns
+        -------
+        None
+
+        """
+        id = self.new_world(world.name)
+        for value in world.values:
+            self.add_variable(id, value)
+        world.model = self
+        world.id = id
+        world._name = world._values = None
+
+    @property
+    def worlds(self) -> list:
+        return [KripkeWorld.view(self, id) for id in range(len(self.valuations))]
+
+    @property
+    def relations(self) -> dict:
+        relations = {}
+        for source, target in zip(self.sources, self.targets):
+            relations.setdefault(self.name(source), []).append(self.name(target))
+        return relations
+
+    def __len__(self) -> int:
+        """
+        Returns the number of worlds.
+
+        Returns
+        -------
+        int
+            Number of worlds.
+
+        """
+        return len(self.valuations)
+
+    def get_model(self) -> tuple:
+        """
+        Returns the generated Kripke model.
+
+        Returns
+        -------
+        tuple
+            Kripke model.
+
+        """
+        return self.worlds, self.relations
+
+    def __repr__(self) -> str:
+        """
+        Returns the string representation of the model.
+
+        Returns
+        -------
+        str
+            String representation of the model.
+
+        """
+        return f"Model({self.worlds},\n {self.relations})"
+
+    def new_copy(self, mapping: dict) -> 'KripkeModel':
+        """
+        Returns the new copy of the model.
+
+        Parameters
+        ----------
+        mapping: dict
+            Mapping of the worlds names.
+
+        Returns
+        -------
+        KripkeModel
+            New copy of the model with the new names.
+
+        """
+        new_model = KripkeModel()
+
+        for world in self.worlds:
+            if not world.name in mapping:
+                mapping[world.name] = world
+            new_model.add_world(mapping[world.name])
+
+        for world_name, related_worlds in self.relations.items():
+            for related_world in related_worlds:
+                new_model.add_relation(mapping[world_name].name, mapping[related_world].name)
+
+        return new_model
+
+
+class Unknown:
+    """
+    Encapsulate the verdict of a check stopped before it was decided.
+
+    There is a single instance, UNKNOWN. It has no truth value, so code
+    written for a True or False verdict fails loudly instead of reading it as
+    invalid.
+
+    Methods
+    -------
+    __bool__(self)
+        Raises TypeError.
+    __repr__(self)
+        Returns the string representation of the verdict.
+
+    """
+
+    def __bool__(self) -> bool:
+        raise TypeError("UNKNOWN verdict has no truth value")
+
+    def __repr__(self) -> str:
+        return "UNKNOWN"
+
+
+UNKNOWN = Unknown()
+
+
+class CancelToken:
+    """
+    Encapsulate a request to stop a check, made from another thread.
+
+    Attributes
+    ----------
+    cancelled: bool
+        Whether the check has to stop.
+
+    Methods
+    -------
+    cancel(self)
+        Asks the check to stop.
+
+    """
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """
+        Asks the check to stop.
+
+        Returns
+        -------
+        None
+
+        """
+        self.cancelled = True
+
+
+class Budget:
+    """
+    Encapsulate the limits of a check and how much of them was used.
+
+    The search counts its rule applications and only asks the budget at
+    checkpoints, every check_interval rules or at the rule limit, and before
+    it checks an accessible world, so the clock, the number of worlds and
+    the cancel token cost nothing in between.
+
+    Attributes
+    ----------
+    timeout: float
+        Seconds the check may take, or None.
+    max_rules: int
+        Number of rules the check may apply, or None.
+    max_worlds: int
+        Number of worlds the model may have, or None.
+    cancel: CancelToken
+        Token stopping the check, or None.
+    check_interval: int
+        Number of rules applied between two checks of the clock.
+    rules: int
+        Number of rules applied so far.
+    worlds: int
+        Number of worlds of the model at the latest checkpoint.
+    elapsed: float
+        Seconds spent at the latest checkpoint.
+    reason: str
+        Limit that stopped the check, or None.
+    started: float
+        Time the check started at.
+
+    Methods
+    -------
+    __repr__(self)
+        Returns the string representation of the budget.
+    start(self)
+        Starts the clock.
+    checkpoint(self, rules)
+        Returns the number of rules at which to check the budget next.
+    exhausted(self, rules, worlds)
+        Checks whether a limit was reached.
+
+    """
+
+    def __init__(self, timeout: float = None, max_rules: int = None, max_worlds: int = None, cancel: CancelToken = None, check_interval: int = 256):
+        self.timeout = timeout
+        self.max_rules = max_rules
+        self.max_worlds = max_worlds
+        self.cancel = cancel
+        self.check_interval = check_interval
+        self.rules = 0
+        self.worlds = 0
+        self.elapsed = 0.0
+        self.reason = None
+        self.started = None
+
+    def __repr__(self) -> str:
+        return f"Budget(reason={self.reason}, rules={self.rules}, worlds={self.worlds}, elapsed={self.elapsed:.3f}s)"
+
+    def start(self) -> None:
+        """
+        Starts the clock.
+
+        Returns
+        -------
+        None
+
+        """
+        self.started = time.monotonic()
+
+    def checkpoint(self, rules: int) -> int:
+        """
+        Returns the number of rules at which to check the budget next.
+
+        Parameters
+        ----------
+        rules: int
+            Number of rules applied so far.
+
+        Returns
+        -------
+        int
+            Number of rules of the next checkpoint.
+
+        """
+        checkpoint = rules + self.check_interval
+        if self.max_rules is not None:
+            checkpoint = min(checkpoint, self.max_rules)
+        return checkpoint
+
+    def exhausted(self, rules: int, worlds: int) -> bool:
+        """
+        Records the progress of the check and checks whether a limit was
+        reached.
+
+        Parameters
+        ----------
+        rules: int
+            Number of rules applied so far.
+        worlds: int
+            Number of worlds of the model.
+
+        Returns
+        -------
+        bool
+            True if the check has to stop, else false.
+
+        """
+        self.rules = rules
+        self.worlds = worlds
+        self.elapsed = time.monotonic() - self.started
+        if self.cancel is not None and self.cancel.cancelled:
+            self.reason = "cancelled"
+        elif self.max_rules is not None and rules >= self.max_rules:
+            self.reason = "max_rules"
+        elif self.max_worlds is not None and worlds > self.max_worlds:
+            self.reason = "max_worlds"
+        elif self.timeout is not None and self.elapsed >= self.timeout:
+            self.reason = "timeout"
+        return self.reason is not None
+
+
+class Probe:
+    """
+    Encapsulate an observer of a search, which does nothing.
+
+    A search given a probe runs on ProbedTableau, which reports every rule
+    application, beta split and new world to it; the search reports the
+    worlds it checks, the clashes it finds and its backtracks. A search
+    without a probe runs on Tableau and pays nothing for it. Subclasses
+    override the methods of the events they observe.
+
+    Methods
+    -------
+    rule(self, tableau, formula, value)
+        Observes a rule applied to a formula of a column.
+    split(self, tableau, alternatives)
+        Observes a beta split, once its first alternative is added.
+    world(self, tableau, successor)
+        Observes an accessible world created by tableau, None for the root.
+    enter(self, tableau, depth)
+        Observes the start of the check of a world.
+    leave(self, tableau, open, pending)
+        Observes the end of the check of a world.
+    clash(self, tableau)
+        Observes a closed branch.
+    backtrack(self, tableau, alternative, undone, exhausted)
+        Observes the next alternative of a beta split being tried.
+    build(self, witness)
+        Builds the countermodel of a witness.
+
+    """
+
+    def rule(self, tableau: 'Tableau', formula: Node, value: bool) -> None:
+        pass
+
+    def split(self, tableau: 'Tableau', alternatives: tuple) -> None:
+        pass
+
+    def world(self, tableau: 'Tableau', successor: 'Tableau') -> None:
+        pass
+
+    def enter(self, tableau: 'Tableau', depth: int) -> None:
+        pass
+
+    def leave(self, tableau: 'Tableau', open: bool, pending: int) -> None:
+        pass
+
+    def clash(self, tableau: 'Tableau') -> None:
+        pass
+
+    def backtrack(self, tableau: 'Tableau', alternative: tuple, undone: int, exhausted: bool) -> None:
+        pass
+
+    def build(self, witness: tuple) -> 'KripkeModel':
+        return build_model(witness)
+
+
+class Probes(Probe):
+    """
+    Encapsulate several probes observing one search, in order.
+
+    Attributes
+    ----------
+    probes: tuple
+        Probes told about every event; the first one builds the model.
+
+    """
+
+    def __init__(self, *probes: Probe):
+        self.probes = probes
+
+    def rule(self, tableau: 'Tableau', formula: Node, value: bool) -> None:
+        for probe in self.probes:
+            probe.rule(tableau, formula, value)
+
+    def split(self, tableau: 'Tableau', alternatives: tuple) -> None:
+        for probe in self.probes:
+            probe.split(tableau, alternatives)
+
+    def world(self, tableau: 'Tableau', successor: 'Tableau') -> None:
+        for probe in self.probes:
+            probe.world(tableau, successor)
+
+    def enter(self, tableau: 'Tableau', depth: int) -> None:
+        for probe in self.probes:
+            probe.enter(tableau, depth)
+
+    def leave(self, tableau: 'Tableau', open: bool, pending: int) -> None:
+        for probe in self.probes:
+            probe.leave(tableau, open, pending)
+
+    def clash(self, tableau: 'Tableau') -> None:
+        for probe in self.probes:
+            probe.clash(tableau)
+
+    def backtrack(self, tableau: 'Tableau', alternative: tuple, undone: int, exhausted: bool) -> None:
+        for probe in self.probes:
+            probe.backtrack(tableau, alternative, undone, exhausted)
+
+    def build(self, witness: tuple) -> 'KripkeModel':
+        return self.probes[0].build(witness)
+
+
+class Stats(Probe):
+    """
+    Encapsulate the statistics of a check: counts of the search and the
+    time spent in every phase, from lexing to building the model.
+
+    Beta splits undo the trail instead of copying the branch, so the cost of
+    copying shows up as the number of trail entries undone, and clashes are
+    found when a formula enters a column, so they are counted instead of
+    calls to contradiction().
+
+    Attributes
+    ----------
+    rules: dict
+        Number of rules applied, by formula type and column value.
+    beta_splits: int
+        Number of beta rules applied.
+    backtracks: int
+        Number of alternatives of beta rules tried after the first one.
+    undone: int
+        Number of trail entries undone by backtracks.
+    clashes: int
+        Number of branches closed.
+    worlds: int
+        Number of worlds created, the root included.
+    max_branch_depth: int
+        Largest number of beta splits open on a branch at once.
+    max_world_depth: int
+        Largest number of worlds on the path from the root to a checked world.
+    peak_true_column: int
+        Largest true column of a world.
+    peak_false_column: int
+        Largest false column of a world.
+    phases: dict
+        Seconds spent in every phase, not counting the phases inside it.
+    branch_depth: int
+        Number of beta splits open on the current branch.
+
+    Methods
+    -------
+    phase(self, name)
+        Returns a context manager timing a phase.
+    rule_count(self)
+        Returns the number of rules applied.
+    as_dict(self)
+        Returns the statistics as JSON data.
+    summary(self)
+        Returns the statistics as one line of text.
+
+    """
+
+    def __init__(self):
+        self.rules = {}
+        self.beta_splits = 0
+        self.backtracks = 0
+        self.undone = 0
+        self.clashes = 0
+        self.worlds = 0
+        self.max_branch_depth = 0
+        self.max_world_depth = 0
+        self.peak_true_column = 0
+        self.peak_false_column = 0
+        self.phases = {}
+        self.branch_depth = 0
+        self.nested = 0.0
+
+    def __repr__(self) -> str:
+        return f"Stats({self.summary()})"
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Returns a context manager adding the time spent in it to a phase.
+        The time of a phase nested in it is only counted once, in the
+        nested phase.
+
+        Parameters
+        ----------
+        name: str
+            Name of the phase.
+
+        Returns
+        -------
+        contextmanager
+            Timer of the phase.
+
+        """
+        start = time.perf_counter()
+        nested = self.nested
+        self.nested = 0.0
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - self.nested
+            self.nested = nested + elapsed
+
+    def rule(self, tableau: 'Tableau', formula: Node, value: bool) -> None:
+        key = (formula.type, value)
+        self.rules[key] = self.rules.get(key, 0) + 1
+        if len(tableau.true_column) > self.peak_true_column:
+            self.peak_true_column = len(tableau.true_column)
+        if len(tableau.false_column) > self.peak_false_column:
+            self.peak_false_column = len(tableau.false_column)
+
+    def split(self, tableau: 'Tableau', alternatives: tuple) -> None:
+        self.beta_splits += 1
+        self.branch_depth += 1
+        if self.branch_depth > self.max_branch_depth:
+            self.max_branch_depth = self.branch_depth
+
+    def world(self, tableau: 'Tableau', successor: 'Tableau') -> None:
+        self.worlds += 1
+
+    def enter(self, tableau: 'Tableau', depth: int) -> None:
+        if depth > self.max_world_depth:
+            self.max_world_depth = depth
+
+    def leave(self, tableau: 'Tableau', open: bool, pending: int) -> None:
+        self.branch_depth -= pending
+
+    def clash(self, tableau: 'Tableau') -> None:
+        self.clashes += 1
+
+    def backtrack(self, tableau: 'Tableau', alternative: tuple, undone: int, exhausted: bool) -> None:
+        self.backtracks += 1
+        self.undone += undone
+        if exhausted:
+            self.branch_depth -= 1
+
+    def build(self, witness: tuple) -> 'KripkeModel':
+        with self.phase("model"):
+            return build_model(witness)
+
+    def rule_count(self) -> int:
+        """
+        Returns the number of rules applied.
+
+        Returns
+        -------
+        int
+            Number of rules applied.
+
+        """
+        return sum(self.rules.values())
+
+    def as_dict(self) -> dict:
+        """
+        Returns the statistics as JSON data, with the rules applied keyed on
+        formula type and then on column, "true" or "false".
+
+        Returns
+        -------
+        dict
+            Statistics.
+
+        """
+        rules = {}
+        for (type, value), count in sorted(self.rules.items()):
+            rules.setdefault(type, {})["true" if value else "false"] = count
+        return {
+            "rules": rules,
+            "beta_splits": self.beta_splits,
+            "backtracks": self.backtracks,
+            "undone": self.undone,
+            "clashes": self.clashes,
+            "worlds": self.worlds,
+            "max_branch_depth": self.max_branch_depth,
+            "max_world_depth": self.max_world_depth,
+            "peak_true_column": self.peak_true_column,
+            "peak_false_column": self.peak_false_column,
+            "phases": dict(self.phases),
+        }
+
+    def summary(self) -> str:
+        """
+        Returns the statistics as one line of text.
+
+        Returns
+        -------
+        str
+            Statistics.
+
+        """
+        phases = ", ".join(f"{name} {seconds * 1000:.2f} ms" for name, seconds in self.phases.items())
+        return (f"{self.rule_count()} rules, {self.beta_splits} beta splits, {self.backtracks} backtracks, "
+                f"{self.clashes} clashes, {self.worlds} worlds, branch depth {self.max_branch_depth}, "
+                f"world depth {self.max_world_depth}" + (f"; {phases}" if phases else ""))
+
+
+_MISSING = object()
+_APPEND = object()
+_POP = object()
+
+# Clash of a world whose set of formulas is already known to be unsatisfiable.
+CLOSED = Node("FALSE", "⊥")
+
+
+class Trail:
+    """
+    Undo log shared by all the tableaux of one search.
+
+    Every change to branch state (columns, agenda, successors and the Kripke
+    model under construction) is recorded here, so a beta split only needs to
+    remember the current position and undo back to it before trying the other
+    alternative. A split therefore costs O(changes) instead of a deep copy of
+    the whole state.
+
+    Attributes
+    ----------
+    entries: list
+        Recorded changes, oldest first.
+
+    Methods
+    -------
+    mark(self)
+        Returns the current position of the trail.
+    set_item(self, mapping, key, value)
+        Sets an item of a dict, recording its previous value.
+    set_index(self, lst, index, value)
+        Sets an item of a list, recording its previous value.
+    pop_item(self, mapping)
+        Pops the last item of a dict, recording it.
+    append(self, lst, value)
+        Appends to a list, recording the append.
+    pop(self, lst)
+        Pops the last value of a list, recording it.
+    set_attr(self, obj, name, value)
+        Sets an attribute, recording its previous value.
+    undo(self, mark)
+        Reverts all changes recorded after the mark.
+
+    """
+
+    def __init__(self):
+        self.entries = []
+
+    def mark(self) -> int:
+        """
+        Returns the current position of the trail.
+
+        Returns
+        -------
+        int
+            Position to undo back to.
+
+        """
+        return len(self.entries)
+
+    def set_item(self, mapping: dict, key, value) -> None:
+        """
+        Sets an item of a dict, recording its previous value.
+
+        Parameters
+        ----------
+        mapping: dict
+            Dict to update.
+        key: object
+            Key to set.
+        value: object
+            New value.
+
+        Returns
+        -------
+        None
+
+        """
+        self.entries.append((mapping, key, mapping.get(key, _MISSING)))
+        mapping[key] = value
+
+    def set_index(self, lst: list, index: int, value) -> None:
+        """
+        Sets an item of a list, recording its previous value.
+
+        Parameters
+        ----------
+        lst: list
+            List to update.
+        index: int
+            Index to set, of an existing item.
+        value: object
+            New value.
+
+        Returns
+        -------
+        None
+
+        """
+        self.entries.append((lst, index, lst[index]))
+        lst[index] = value
+
+    def pop_item(self, mapping: dict) -> tuple:
+        """
+        Pops the last item of a dict, recording it.
+
+        Parameters
+        ----------
+        mapping: dict
+            Dict to pop from.
+
+        Returns
+        -------
+        tuple
+            Popped key and value.
+
+        """
+        key, value = mapping.popitem()
+        self.entries.append((mapping, key, value))
+        return key, value
+
+    def append(self, lst: list, value) -> None:
+        """
+        Appends to a list, recording the append.
+
+        Parameters
+        ----------
+        lst: list
+            List to append to.
+        value: object
+            Value to append.
+
+        Returns
+        -------
+        None
+
+        """
+        lst.append(value)
+        self.entries.append((lst, _APPEND, None))
+
+    def pop(self, lst: list):
+        """
+        Pops the last value of a list, recording it.
+
+        Parameters
+        ----------
+        lst: list
+            List to pop from.
+
+        Returns
+        -------
+        object
+            Popped value.
+
+        """
+        value = lst.pop()
+        self.entries.append((lst, _POP, value))
+        return value
 
-    def add_variable(self, value) -> None:
+    def set_attr(self, obj, name: str, value) -> None:
         """
-        Adds the true variable to the world.
+        Sets an attribute, recording its previous value.
 
         Parameters
         ----------
+        obj: object
+            Object to update.
+        name: str
+            Attribute name.
         value: object
-            True variable in the world.
+            New value.
 
         Returns
         -------
         None
 
         """
-        self.values.append(value)
+        self.entries.append((obj, name, getattr(obj, name)))
+        setattr(obj, name, value)
 
-    def __repr__(self) -> str:
+    def undo(self, mark: int) -> None:
         """
-        Returns the string representation of the world.
-
-        Returns
-        -------
-        str
-            String representation of the world.
+        Reverts all changes recorded after the mark, newest first.
 
-        """
-        return f"World({self.name}, {self.values})"
+        Popped items are put back at the end, so undoing in reverse order
+        also restores the order of dicts and lists.
 
-    def __del__(self) -> None:
-        """
-        Deletes the Kripke World.
+        Parameters
+        ----------
+        mark: int
+            Position returned by mark().
 
         Returns
         -------
         None
 
         """
-        self.values = []
-        self.name = ""
+        entries = self.entries
+        while len(entries) > mark:
+            target, key, old = entries.pop()
+            if key is _APPEND:
+                target.pop()
+            elif key is _POP:
+                target.append(old)
+            elif type(target) is dict or type(target) is list:
+                if old is _MISSING:
+                    del target[key]
+                else:
+                    target[key] = old
+            else:
+                setattr(target, key, old)
+
+# Priority classes of the default agenda order: literals, alpha rules, beta
+# rules and modal rules.
+LITERAL, ALPHA, BETA, MODAL = 0, 1, 2, 3
+RULE_CLASSES = {
+    ("VARIABLE", True): LITERAL, ("VARIABLE", False): LITERAL,
+    ("TRUE", True): LITERAL, ("TRUE", False): LITERAL,
+    ("FALSE", True): LITERAL, ("FALSE", False): LITERAL,
+    ("NOT", True): ALPHA, ("NOT", False): ALPHA,
+    ("AND", True): ALPHA, ("AND", False): BETA,
+    ("OR", True): BETA, ("OR", False): ALPHA,
+    ("IMPLIES", True): BETA, ("IMPLIES", False): ALPHA,
+    ("NECESSARILY", True): MODAL, ("NECESSARILY", False): MODAL,
+    ("POSSIBLY", True): MODAL, ("POSSIBLY", False): MODAL,
+}
+
+
+def rule_priority(formula: Node, value: bool) -> int:
+    """
+    Orders the unfolded set as literals first, then alpha rules, then beta
+    rules and modal rules last, so a branch is saturated and checked for
+    clashes before it is split or new worlds are created.
 
+    Parameters
+    ----------
+    formula: Node
+        Unfolded formula.
+    value: bool
+        Column the formula is in.
+
+    Returns
+    -------
+    int
+        Priority class, lowest first.
 
-class KripkeModel:
     """
-    Encapsulate the behaviour of Kripke Model.
+    if formula.type == "NOT" and formula.args[0].type == "VARIABLE":
+        return LITERAL
+    return RULE_CLASSES[(formula.type, value)]
 
-    Attributes
+
+def lifo_priority(formula: Node, value: bool) -> int:
+    """
+    Orders the unfolded set last in, first out, regardless of the rules.
+
+    Parameters
     ----------
-    worlds: list
-    relations: dict
+    formula: Node
+        Unfolded formula.
+    value: bool
+        Column the formula is in.
 
-    Methods
+    Returns
     -------
-    add_relation(self, world1, world2)
-        Adds the relation between two worlds.
-    add_world(self, world)
-        Adds the world to the model.
-    get_model(self)
-        Returns the generated Kripke model.
-    __repr__(self)
-        Returns the string representation of the model.
-    __del__(self)
-        Deletes the Kripke Model.
-    new_copy(self, mapping)
-        Returns the new copy of the model.
+    int
+        Priority class, always 0.
 
     """
+    return 0
 
-    def __init__(self, worlds: list = None, relations: dict = None):
-        if worlds == None: worlds = []
-        if relations == None: relations = {}
-        self.worlds = worlds  # list of KripkeWorlds
-        self.relations = relations  # world name: [wordls]
 
-    def __del__(self) -> None:
-        """
-        Deletes the Kripke Model.
+class Agenda:
+    """
+    Encapsulate the unfolded set of a Tableau.
 
-        Returns
-        -------
-        None
+    Formulas wait in one bucket per priority class and are taken from the
+    lowest non-empty bucket, last in first out within a bucket. The policy
+    mapping a formula to its priority class is pluggable; changes are
+    recorded on the trail.
 
-        """
-        self.relations = []
-        self.worlds = []
+    Attributes
+    ----------
+    trail: Trail
+        Undo log of the search.
+    policy: function
+        Maps a formula and its column value to a priority class.
+    buckets: list
+        Pending formulas and column values, one list per priority class.
 
-    def add_relation(self, world1: str, world2: str) -> None:
+    Methods
+    -------
+    push(self, formula, value)
+        Adds a formula to the agenda.
+    pop(self)
+        Takes the next formula from the agenda.
+    __len__(self)
+        Returns the number of pending formulas.
+
+    """
+
+    def __init__(self, trail: Trail, policy=rule_priority):
+        self.trail = trail
+        self.policy = policy
+        self.buckets = []
+
+    def push(self, formula: Node, value: bool) -> None:
         """
-        Adds the relation between two worlds.
+        Adds a formula to the agenda.
 
         Parameters
         ----------
-        world1: str
-            Name of the first world.
-        world2: str
-            Name of the second world.
+        formula: Node
+            Unfolded formula.
+        value: bool
+            Column the formula is in.
 
         Returns
         -------
         None
 
         """
-        if world1 not in self.relations:
-            self.relations[world1] = []
-        self.relations[world1].append(world2)
+        priority = self.policy(formula, value)
+        buckets = self.buckets
+        while len(buckets) <= priority:
+            buckets.append([])
+        self.trail.append(buckets[priority], (formula, value))
 
-    def add_world(self, world) -> None:
+    def pop(self) -> tuple:
         """
-        Adds the world to the model.
-
-        Parameters
-        ----------
-        world: KripkeWorld
-            World to be added.
+        Takes the next formula from the agenda.
 
         Returns
         -------
-        None
+        tuple
+            Formula and column value, or None if the agenda is empty.
 
         """
-        self.worlds.append(world)
+        for bucket in self.buckets:
+            if bucket:
+                return self.trail.pop(bucket)
+        return None
 
-    def get_model(self) -> tuple:
+    def __len__(self) -> int:
         """
-        Returns the generated Kripke model.
+        Returns the number of pending formulas.
 
         Returns
         -------
-        tuple
-            Kripke model.
+        int
+            Number of pending formulas.
 
         """
-        return self.worlds, self.relations
+        return sum(len(bucket) for bucket in self.buckets)
+
+
+class Run:
+    """
+    Encapsulate the state of one check, shared by all of its Tableaux. The
+    engine keeps no state between checks, so checks running at the same time
+    in threads share nothing and number their worlds the same way.
+
+    Every formula the search meets gets a dense id, the bit it sets in the
+    label of a world it is true in, and the next bit for a world it is false
+    in. Ids are given on first sight rather than to the whole closure of the
+    checked formula up front, since the search often meets a small part of
+    it.
+
+    Attributes
+    ----------
+    trail: Trail
+        Undo log of the search.
+    policy: function
+        Order in which the unfolded formulas are expanded, see rule_priority.
+    probe: Probe
+        Observer of the search, or None.
+    labels: dict
+        Witness of every label decided during the search, None for an
+        unsatisfiable one.
+    worlds: int
+        Number of Tableaux created, the id of the next one.
+    ids: dict
+        Even id of every formula met, from 0 in the order they were met.
+
+    Methods
+    -------
+    new_world(self)
+        Returns the id of a new Tableau.
+    formula_id(self, formula)
+        Returns the id of a formula.
+
+    """
+    __slots__ = ("trail", "policy", "probe", "labels", "worlds", "ids")
+
+    def __init__(self, policy=rule_priority, probe: Probe = None):
+        self.trail = Trail()
+        self.policy = policy
+        self.probe = probe
+        self.labels = {}
+        self.worlds = 0
+        self.ids = {}
 
     def __repr__(self) -> str:
+        return f"Run(worlds={self.worlds}, labels={len(self.labels)})"
+
+    def new_world(self) -> int:
         """
-        Returns the string representation of the model.
+        Returns the id of a new Tableau, counted from 0 for the root.
 
         Returns
         -------
-        str
-            String representation of the model.
+        int
+            Id of the Tableau.
 
         """
-        return f"Model({self.worlds},\n {self.relations})"
+        id = self.worlds
+        self.worlds += 1
+        return id
 
-    def new_copy(self, mapping: dict) -> 'KripkeModel':
+    def formula_id(self, formula: Node) -> int:
         """
-        Returns the new copy of the model.
+        Returns the id of a formula, giving it the next one the first time.
 
         Parameters
         ----------
-        mapping: dict
-            Mapping of the worlds names.
+        formula: Node
+            Formula of the check.
 
         Returns
         -------
-        KripkeModel
-            New copy of the model with the new names.
+        int
+            Even id of formula.
 
         """
-        new_model = KripkeModel()
-
-        for world in self.worlds:
-            if not world.name in mapping:
-                mapping[world.name] = world
-                new_model.add_world(world)
-            else:
-                new_model.add_world(mapping[world.name])
-
-        for world_name, related_worlds in self.relations.items():
-            for related_world in related_worlds:
-                new_model.add_relation(mapping[world_name].name, mapping[related_world].name)
-
-        return new_model
-
+        id = self.ids.get(formula)
+        if id is None:
+            id = self.ids[formula] = 2 * len(self.ids)
+        return id
 
 
 class Tableau:
     """
     Encapsulate the behaviour of Tableau.
 
+    Clashes are detected when a formula enters a column, by looking it up in
+    the opposite column, so checking for a contradiction is O(1).
+
+    All changes are recorded on a trail shared with the accessible tableaux,
+    so beta rules explore their first alternative in place and undo it before
+    trying the second one.
+
     Attributes
     ----------
     true_column: dict
         True column of Tableau.
     false_column: dict
         False column of Tableau.
-    unfolded: dict
-        Unfolded set of Tableau.
+    unfolded: Agenda
+        Unfolded set of Tableau, in the order given by its policy.
     accessible: list
         Accessible world of Tableau.
     true_in_accessible: list
         True in accessible world of Tableau.
     false_in_accessible: list
         False in accessible world of Tableau.
-    world: KripkeWorld
-        World of Tableau.
+    clash: Node
+        Formula found in both the true and the false column, or constant
+        found in the column contradicting it, None while the branch is open.
+    run: Run
+        State of the check the Tableau belongs to.
+    id: int
+        Id of the world of Tableau, in the order the check created them.
+    trail: Trail
+        Undo log of the search, the trail of its run.
+    probe: Probe
+        Observer of the search, always None for a Tableau; see ProbedTableau.
 
     Methods
     -------
@@ -253,22 +1505,47 @@ class Tableau:
         Adds the accessible world of Tableau.
     contradiction(self)
         Checks the contradiction of Tableau.
+    add_true(self, formula)
+        Adds a formula to the true column and the unfolded set.
+    add_false(self, formula)
+        Adds a formula to the false column and the unfolded set.
+    add(self, formula, value)
+        Adds a formula to the column given by its value.
+    add_successor(self, worlds)
+        Creates an accessible Tableau.
+    label(self)
+        Returns the set of formulas of Tableau.
+    witness(self, successors)
+        Returns the model of Tableau as a witness.
+    seed_unfolded(self)
+        Adds the unfolded formulas of both columns to the unfolded set.
+    propagate(self)
+        Adds the formulas true in every accessible world to them.
+    branch(self, alternatives, choices)
+        Adds the first alternative of a beta rule.
+    apply_rule(self, current, value, worlds, choices)
+        Applies the rule for a formula of the unfolded set.
+    check_validity(self, budget)
+        Checks the validity of Tableau.
 
     """
+    probe = None
 
-    def __init__(self, tr: dict = None, fl: dict = None, unfld: dict = None, accs: list = None, tr_accs: list = None, fl_accs: list = None):
+    def __init__(self, tr: dict = None, fl: dict = None, unfld: 'Agenda' = None, accs: list = None, tr_accs: list = None, fl_accs: list = None, run: Run = None):
         if tr is None:
             tr = {}
         if fl is None:
             fl = {}
-        if unfld is None:
-            unfld = {}
         if accs is None:
             accs = []
         if tr_accs is None:
             tr_accs = []
         if fl_accs is None:
             fl_accs = []
+        if run is None:
+            run = Run()
+        if unfld is None:
+            unfld = Agenda(run.trail, run.policy)
 
         self.true_column = tr
         self.false_column = fl
@@ -276,7 +1553,15 @@ class Tableau:
         self.accessible = accs
         self.true_in_accessible = tr_accs
         self.false_in_accessible = fl_accs
-        self.world = KripkeWorld(generate_new_name(), [])
+        self.run = run
+        self.id = run.new_world()
+        self.trail = run.trail
+        self.clash = None
+        smaller, other = (tr, fl) if len(tr) <= len(fl) else (fl, tr)
+        for formula in smaller:
+            if formula in other:
+                self.clash = formula
+                break
 
     def __enter__(self):
         return self
@@ -284,13 +1569,14 @@ class Tableau:
     def __exit__(self, *args):
         self.false_column = {}
         self.true_column = {}
-        self.unfolded = {}
+        self.unfolded = Agenda(self.trail, self.unfolded.policy)
         self.accessible = []
         self.true_in_accessible = []
         self.false_in_accessible = []
+        self.clash = None
 
     def __repr__(self):
-        return f"Tableu {self.world}\n false:{self.false_column}, \ntrue:{self.true_column}"
+        return f"Tableu\n false:{self.false_column}, \ntrue:{self.true_column}"
 
     def update_true_col_unfolded(self, tr: Node) -> None:
         """
@@ -307,7 +1593,9 @@ class Tableau:
 
 
         """
-        self.true_column[tr] = False
+        self.trail.set_item(self.true_column, tr, False)
+        if tr in self.false_column:
+            self.trail.set_attr(self, "clash", tr)
 
     def update_false_col_unfolded(self, fl: Node) -> None:
         """
@@ -324,7 +1612,9 @@ class Tableau:
 
 
         """
-        self.false_column[fl] = False
+        self.trail.set_item(self.false_column, fl, False)
+        if fl in self.true_column:
+            self.trail.set_attr(self, "clash", fl)
 
     def update_true_col_folded(self, tr: Node) -> None:
         """
@@ -341,7 +1631,9 @@ class Tableau:
 
 
         """
-        self.true_column[tr] = True
+        self.trail.set_item(self.true_column, tr, True)
+        if tr in self.false_column:
+            self.trail.set_attr(self, "clash", tr)
 
     def update_false_col_folded(self, fl: Node) -> None:
         """
@@ -358,7 +1650,9 @@ class Tableau:
 
 
         """
-        self.false_column[fl] = True
+        self.trail.set_item(self.false_column, fl, True)
+        if fl in self.true_column:
+            self.trail.set_attr(self, "clash", fl)
 
     def add_accessible(self, tbl) -> None:
         """
@@ -375,7 +1669,7 @@ class Tableau:
 
 
         """
-        self.accessible.append(tbl)
+        self.trail.append(self.accessible, tbl)
 
     def contradiction(self) -> bool:
         """
@@ -388,225 +1682,502 @@ class Tableau:
 
 
         """
-        for i, _ in self.true_column.items():
-            for j, _ in self.false_column.items():
-                if i == j:
-                    return True
-        return False
+        return self.clash is not None
+
+    def add_true(self, formula: Node) -> None:
+        """
+        Adds a formula to the true column and to the unfolded set, unless it
+        is already on the branch.
+
+        Parameters
+        ----------
+        formula: Node
+            Formula that must be true.
+
+        Returns
+        -------
+        None
+
+        """
+        if formula not in self.true_column:
+            self.update_true_col_unfolded(formula)
+            self.unfolded.push(formula, True)
+
+    def add_false(self, formula: Node) -> None:
+        """
+        Adds a formula to the false column and to the unfolded set, unless it
+        is already on the branch.
+
+        Parameters
+        ----------
+        formula: Node
+            Formula that must be false.
+
+        Returns
+        -------
+        None
+
+        """
+        if formula not in self.false_column:
+            self.update_false_col_unfolded(formula)
+            self.unfolded.push(formula, False)
+
+    def add_successor(self, worlds: list) -> 'Tableau':
+        """
+        Creates an accessible Tableau. No world is added to a model: the
+        countermodel is only built once an open branch is found.
 
+        Parameters
+        ----------
+        worlds: list
+            Tableaux of the worlds of the branch, which the new one joins.
+
+        Returns
+        -------
+        Tableau
+            New accessible Tableau.
+
+        """
+        tableau1 = Tableau(run=self.run)
+        self.add_accessible(tableau1)
+        self.trail.append(worlds, tableau1)
+        return tableau1
+
+    def label(self) -> int:
+        """
+        Returns the set of formulas of Tableau as a bitset over the formula
+        ids of its run: bit id for a formula of the true column and bit id + 1
+        for a formula of the false column.
+
+        Returns
+        -------
+        int
+            Label of Tableau.
 
-    def check_validity(self,kripke_model:KripkeModel):
         """
-        Checks the validity of Tableau in the Kripke model.
+        formula_id = self.run.formula_id
+        label = 0
+        for formula in self.true_column:
+            label |= 1 << formula_id(formula)
+        for formula in self.false_column:
+            label |= 2 << formula_id(formula)
+        return label
+
+    def witness(self, successors: list) -> tuple:
+        """
+        Returns the model of an open, saturated Tableau as a witness: the
+        variables of its true column and the witnesses of its accessible
+        worlds.
+
+        Parameters
+        ----------
+        successors: list
+            Witnesses of the accessible worlds.
 
-       Returns
+        Returns
         -------
         tuple
-            Validity of Formula and Model.
-
-
-        """
-        
-        for etr,folded in self.true_column.items():
-            if(not folded):
-                self.unfolded[etr]=True
-        for efl,folded in self.false_column.items():
-            if(not folded):
-                self.unfolded[efl]=False
-
-        while len(self.unfolded) > 0:
-            current, value = self.unfolded.popitem()
-            
-            type = current.type
-            if type == "NOT": 
-                if value == True:
-                    self.update_true_col_folded(current)
-
-                    self.update_false_col_unfolded(current.right)
-                    self.unfolded[current.right]=False
-                if value == False:
-                    self.update_false_col_folded(current)
-
-                    self.update_true_col_unfolded(current.right)
-                    self.unfolded[current.right]=True
-            
-            elif type == "AND": 
-                if value == True:
-                    self.update_true_col_folded(current)
-
-                    self.update_true_col_unfolded(current.left)
-                    self.update_true_col_unfolded(current.right)
-                    self.unfolded[current.left]=True
-                    self.unfolded[current.right]=True
-                if value == False:
-                    self.update_false_col_folded(current)
-
-                    with Tableau(tr=copy.deepcopy(self.true_column), fl=copy.deepcopy(self.false_column),
-                                tr_accs=copy.deepcopy(self.true_in_accessible),
-                                fl_accs=copy.deepcopy(self.false_in_accessible)) as tableau1:
-                        
-                        map_new_worlds={}
-                        map_new_worlds[self.world.get_name()]=tableau1.world
-
-                        for a in self.accessible:
-                            tbl=Tableau(tr=copy.deepcopy(a.true_column), fl=copy.deepcopy(a.false_column))
-                            tableau1.add_accessible(tbl)
-
-                            new_world =KripkeWorld(tbl.world.name,a.world.values)
-                            map_new_worlds[a.world.name]=new_world
-
-                        aux_kripke_model= kripke_model.new_copy(map_new_worlds)
-
-                        tableau1.update_false_col_unfolded(current.left)
-
-                        result,model = tableau1.check_validity(aux_kripke_model)
-                        if result == True: return (True,model)
-                    
-                    self.update_false_col_unfolded(current.right)
-                    self.unfolded[current.right]=False
-            
-            elif type == "OR": 
-                if value == True:
-                    self.update_true_col_folded(current)
-
-                    with Tableau(tr=copy.deepcopy(self.true_column), fl=copy.deepcopy(self.false_column),
-                                tr_accs=copy.deepcopy(self.true_in_accessible),
-                                fl_accs=copy.deepcopy(self.false_in_accessible)) as tableau1:
-                    
-                        map_new_worlds={}
-                        map_new_worlds[self.world.get_name()]=tableau1.world
-
-                        for a in self.accessible:
-                            tbl=Tableau(tr=copy.deepcopy(a.true_column), fl=copy.deepcopy(a.false_column))
-                            tableau1.add_accessible(tbl)
-
-                            new_world =KripkeWorld(tbl.world.name,a.world.values)
-                            map_new_worlds[a.world.name]=new_world
-
-                        tableau1.update_true_col_unfolded(current.left)
-                        
-                        aux_kripke_model= kripke_model.new_copy(map_new_worlds)
-                        
-                        result,model = tableau1.check_validity(aux_kripke_model)
-                        if result == True: return (True,model)
-
-                    self.update_true_col_unfolded(current.right)
-                    self.unfolded[current.right]=True
-                    
-                if value == False:
-                    self.update_false_col_folded(current)
-
-                    self.update_false_col_unfolded(current.left)
-                    self.update_false_col_unfolded(current.right)
-                    self.unfolded[current.left]=False
-                    self.unfolded[current.right]=False
-            
-            elif type == "IMPLIES": 
-                if value == True:
-                    self.update_true_col_folded(current)
-                    with Tableau(tr=copy.deepcopy(self.true_column), fl=copy.deepcopy(self.false_column),
-                                tr_accs=copy.deepcopy(self.true_in_accessible),
-                                fl_accs=copy.deepcopy(self.false_in_accessible)) as tableau1:
-                        
-                        map_new_worlds={}
-                        map_new_worlds[self.world.get_name()]=tableau1.world
-
-                        for a in self.accessible:
-                            tbl=Tableau(tr=copy.deepcopy(a.true_column), fl=copy.deepcopy(a.false_column))
-                            tableau1.add_accessible(tbl)
-
-                            new_world =KripkeWorld(tbl.world.name,a.world.values)
-                            map_new_worlds[a.world.name]=new_world
-
-                        tableau1.update_false_col_unfolded(current.left)
-                        aux_kripke_model= kripke_model.new_copy(map_new_worlds)
-                        result,model = tableau1.check_validity(aux_kripke_model)
-                        if result == True: return (True,model)
-                    
-                    self.update_true_col_unfolded(current.right)
-                    self.unfolded[current.right]=True
-                    
-                if value == False:
-                    self.update_false_col_folded(current)
-
-                    self.update_true_col_unfolded(current.left)
-                    self.update_false_col_unfolded(current.right)
-                    self.unfolded[current.left]=True
-                    self.unfolded[current.right]=False
-
-            elif type == "NECESSARILY": 
-                if value == True:
-                    self.update_true_col_folded(current)
-
-                    self.true_in_accessible.append(current.right)
-                if value == False:
-                    self.update_false_col_folded(current)
-
-                    tableau1 = Tableau()
-                    tableau1.update_false_col_unfolded(current.right)
-
-                    kripke_model.add_world(tableau1.world)
-                    kripke_model.add_relation(self.world.name,tableau1.world.name) 
-                    self.accessible.append(tableau1)
-
-            elif type == "POSSIBLY": 
-                if value == True:
-                    self.update_true_col_folded(current)
-
-                    tableau1 = Tableau()
-                    tableau1.update_true_col_unfolded(current.right)
-                    
-                    kripke_model.add_world(tableau1.world)
-                    kripke_model.add_relation(self.world.name,tableau1.world.name)
-                    self.accessible.append(tableau1) 
-                if value == False:
-                    self.update_false_col_folded(current)
-
-                    self.false_in_accessible.append(current.right)
-            
-            elif type == "VARIABLE": 
-                if value == True:
-                    self.update_true_col_folded(current)
-                
-                    self.world.add_variable(current.value)
-                if value == False: 
-                    self.update_false_col_folded(current)
-                    
-            if self.contradiction():return (True,kripke_model)
-       
+            True variables and witnesses of the accessible worlds.
+
+        """
+        values = tuple(formula.value for formula in self.true_column if formula.type == "VARIABLE")
+        return values, tuple(successors)
+
+    def add(self, formula: Node, value: bool) -> None:
+        """
+        Adds a formula to the column given by its value.
+
+        Parameters
+        ----------
+        formula: Node
+            Formula to add.
+        value: bool
+            True for the true column, False for the false column.
+
+        Returns
+        -------
+        None
+
+        """
+        if value:
+            self.add_true(formula)
+        else:
+            self.add_false(formula)
+
+    def seed_unfolded(self) -> None:
+        """
+        Adds the unfolded formulas of both columns to the unfolded set.
+
+        Returns
+        -------
+        None
+
+        """
+        for etr, folded in list(self.true_column.items()):
+            if not folded:
+                self.unfolded.push(etr, True)
+        for efl, folded in list(self.false_column.items()):
+            if not folded:
+                self.unfolded.push(efl, False)
+
+    def propagate(self) -> None:
+        """
+        Adds the formulas that hold in every accessible world to the
+        accessible Tableaux.
+
+        Returns
+        -------
+        None
+
+        """
         for tabl in self.accessible:
             for i in self.true_in_accessible:
-                tabl.update_true_col_unfolded(i)
+                if i not in tabl.true_column:
+                    tabl.update_true_col_unfolded(i)
             for j in self.false_in_accessible:
-                tabl.update_false_col_unfolded(j)
-        
-        for tableau in self.accessible:
-            with tableau:
-                result,model = tableau.check_validity(kripke_model)
-                if result == True:
-                    return (True, model)
-          
-        return (False,kripke_model)
-            
-            
-        
-counter = 0
-def generate_new_name() -> str:
-    """
-    Generates the new unique name.
+                if j not in tabl.false_column:
+                    tabl.update_false_col_unfolded(j)
+
+    def branch(self, alternatives: tuple, choices: list) -> None:
+        """
+        Adds the first alternative of a beta rule and pushes a choice point
+        for the others, together with the trail mark to undo back to.
+
+        Parameters
+        ----------
+        alternatives: tuple
+            Pairs of formula and column value, one per alternative.
+        choices: list
+            Choice points of this Tableau.
+
+        Returns
+        -------
+        None
+
+        """
+        choices.append((self.trail.mark(), alternatives, 1))
+        formula, value = alternatives[0]
+        self.add(formula, value)
+
+    def apply_rule(self, current: Node, value: bool, worlds: list, choices: list) -> None:
+        """
+        Applies the rule for a formula of the unfolded set.
+
+        Conjunctions and disjunctions are n-ary, so a true conjunction adds
+        all of its operands in one step and a false one branches on each of
+        them; disjunctions are dual.
+
+        Parameters
+        ----------
+        current: Node
+            Formula to unfold.
+        value: bool
+            Column the formula is in.
+        worlds: list
+            Tableaux of the worlds of the branch.
+        choices: list
+            Choice points of this Tableau.
+
+        Returns
+        -------
+        None
+
+        """
+        type = current.type
+        args = current.args
+        if type == "NOT":
+            if value == True:
+                self.update_true_col_folded(current)
+                self.add_false(args[0])
+            if value == False:
+                self.update_false_col_folded(current)
+                self.add_true(args[0])
+
+        elif type == "AND":
+            if value == True:
+                self.update_true_col_folded(current)
+                for arg in args:
+                    self.add_true(arg)
+            if value == False:
+                self.update_false_col_folded(current)
+                self.branch(tuple((arg, False) for arg in args), choices)
+
+        elif type == "OR":
+            if value == True:
+                self.update_true_col_folded(current)
+                self.branch(tuple((arg, True) for arg in args), choices)
+            if value == False:
+                self.update_false_col_folded(current)
+                for arg in args:
+                    self.add_false(arg)
+
+        elif type == "IMPLIES":
+            if value == True:
+                self.update_true_col_folded(current)
+                self.branch(((args[0], False), (args[1], True)), choices)
+            if value == False:
+                self.update_false_col_folded(current)
+                self.add_true(args[0])
+                self.add_false(args[1])
+
+        elif type == "NECESSARILY":
+            if value == True:
+                self.update_true_col_folded(current)
+                self.trail.append(self.true_in_accessible, args[0])
+            if value == False:
+                self.update_false_col_folded(current)
+                self.add_successor(worlds).update_false_col_unfolded(args[0])
+
+        elif type == "POSSIBLY":
+            if value == True:
+                self.update_true_col_folded(current)
+                self.add_successor(worlds).update_true_col_unfolded(args[0])
+            if value == False:
+                self.update_false_col_folded(current)
+                self.trail.append(self.false_in_accessible, args[0])
+
+        elif type == "VARIABLE":
+            if value == True:
+                self.update_true_col_folded(current)
+            if value == False:
+                self.update_false_col_folded(current)
+
+        elif type == "TRUE":
+            if value == True:
+                self.update_true_col_folded(current)
+            if value == False:
+                self.update_false_col_folded(current)
+                self.trail.set_attr(self, "clash", current)
+
+        elif type == "FALSE":
+            if value == True:
+                self.update_true_col_folded(current)
+                self.trail.set_attr(self, "clash", current)
+            if value == False:
+                self.update_false_col_folded(current)
+
+    def check_validity(self, budget: Budget = None) -> tuple:
+        """
+        Checks the validity of Tableau.
+
+        The search is driven by an explicit stack with one frame per world
+        being checked, so neither deep formulas nor long branches use the
+        Python call stack. A frame holds its Tableau, the choice points of
+        its beta rules, the index of the next accessible Tableau to check,
+        its label and the witnesses of its accessible worlds found open.
+        When a world closes, the search undoes back to its latest choice
+        point; a world without choice points left closes its parent.
+
+        Whether an accessible world can be satisfied only depends on its
+        label, the formulas it starts with. Every label decided during the
+        search is remembered, unsatisfiable or with a witness of its model,
+        and a world whose label comes up again is closed or given the
+        witness without being checked again. The labels are kept by the run
+        of Tableau, like the rest of the state of the check.
+
+        The search only keeps the Tableaux of the current branch. The
+        countermodel is built from the witness of the root once the branch
+        is found open, so a valid formula never builds a model.
+
+        A ProbedTableau reports the events of the search to its probe; the
+        search only looks for a probe at worlds, clashes and backtracks, never
+        per rule.
+
+        Parameters
+        ----------
+        budget: Budget
+            Limits of the check, or None.
+
+        Returns
+        -------
+        tuple
+            Validity of Formula and Model, empty if the formula is valid, or
+            UNKNOWN and the budget if a limit of the budget was reached.
+
+
+        """
+        trail = self.trail
+        probe = self.probe
+        worlds = [self]
+        labels = self.run.labels
+        rules = 0
+        checkpoint = -1
+        if budget is not None:
+            budget.start()
+            checkpoint = budget.checkpoint(rules)
+            if budget.exhausted(rules, len(worlds)):
+                return (UNKNOWN, budget)
+        self.seed_unfolded()
+        frames = [[self, [], None, None, []]]
+        if probe is not None:
+            probe.world(None, self)
+            probe.enter(self, 1)
+        while frames:
+            frame = frames[-1]
+            tableau = frame[0]
+            if tableau.clash is None:
+                item = tableau.unfolded.pop()
+                if item is not None:
+                    tableau.apply_rule(item[0], item[1], worlds, frame[1])
+                    rules += 1
+                    if rules == checkpoint:
+                        if budget.exhausted(rules, len(worlds)):
+                            return (UNKNOWN, budget)
+                        checkpoint = budget.checkpoint(rules)
+                    continue
+                if frame[2] is None:
+                    tableau.propagate()
+                    frame[2] = 0
+                if frame[2] < len(tableau.accessible):
+                    successor = tableau.accessible[frame[2]]
+                    frame[2] += 1
+                    if budget is not None and budget.exhausted(rules, len(worlds)):
+                        return (UNKNOWN, budget)
+                    label = successor.label()
+                    if label not in labels:
+                        successor.seed_unfolded()
+                        frames.append([successor, [], None, label, []])
+                    elif labels[label] is None:
+                        trail.set_attr(successor, "clash", CLOSED)
+                        frames.append([successor, [], None, None, []])
+                    else:
+                        frame[4].append(labels[label])
+                        continue
+                    if probe is not None:
+                        probe.enter(successor, len(frames))
+                else:
+                    frames.pop()
+                    if probe is not None:
+                        probe.leave(tableau, True, len(frame[1]))
+                    witness = tableau.witness(frame[4])
+                    if frame[3] is not None:
+                        labels[frame[3]] = witness
+                    if frames:
+                        frames[-1][4].append(witness)
+                    elif probe is not None:
+                        return (False, probe.build(witness))
+                    else:
+                        return (False, build_model(witness))
+                continue
+
+            if probe is not None:
+                probe.clash(tableau)
+            while not frame[1]:
+                frames.pop()
+                if probe is not None:
+                    probe.leave(frame[0], False, 0)
+                if frame[3] is not None:
+                    labels[frame[3]] = None
+                if not frames:
+                    return (True, KripkeModel())
+                frame = frames[-1]
+            choices = frame[1]
+            mark, alternatives, index = choices[-1]
+            if index + 1 < len(alternatives):
+                choices[-1] = (mark, alternatives, index + 1)
+            else:
+                choices.pop()
+            if probe is not None:
+                probe.backtrack(frame[0], alternatives[index], len(trail.entries) - mark, index + 1 == len(alternatives))
+            trail.undo(mark)
+            frame[2] = None
+            frame[4] = []
+            formula, value = alternatives[index]
+            frame[0].add(formula, value)
+
+
+class ProbedTableau(Tableau):
+    """
+    Encapsulate a Tableau reporting the rules it applies, its beta splits
+    and the worlds it creates to the probe of its run. The search only runs
+    on it when it is observed, so the rules of a plain search pay nothing for
+    probes.
+
+    Attributes
+    ----------
+    probe: Probe
+        Observer of the search.
+
+    Methods
+    -------
+    add_successor(self, worlds)
+        Creates an accessible ProbedTableau.
+    branch(self, alternatives, choices)
+        Adds the first alternative of a beta rule.
+    apply_rule(self, current, value, worlds, choices)
+        Applies the rule for a formula of the unfolded set.
+
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.probe = self.run.probe
+
+    def add_successor(self, worlds: list) -> 'ProbedTableau':
+        tableau1 = ProbedTableau(run=self.run)
+        self.add_accessible(tableau1)
+        self.trail.append(worlds, tableau1)
+        self.probe.world(self, tableau1)
+        return tableau1
+
+    def branch(self, alternatives: tuple, choices: list) -> None:
+        super().branch(alternatives, choices)
+        self.probe.split(self, alternatives)
+
+    def apply_rule(self, current: Node, value: bool, worlds: list, choices: list) -> None:
+        super().apply_rule(current, value, worlds, choices)
+        self.probe.rule(self, current, value)
+
+
+def build_model(witness: tuple) -> KripkeModel:
+    """
+    Builds the Kripke model of a witness, with one world per occurrence of
+    a witness, numbered from the root in depth-first order.
+
+    Parameters
+    ----------
+    witness: tuple
+        True variables and witnesses of the accessible worlds of the root.
+
+    Returns
+    -------
+    KripkeModel
+        Model of the witness.
+
+    """
+    model = KripkeModel()
+    stack = [(model.new_world(), witness)]
+    while stack:
+        world, (values, successors) = stack.pop()
+        for value in values:
+            model.add_variable(world, value)
+        for successor in successors:
+            world1 = model.new_world()
+            model.connect(world, world1)
+            stack.append((world1, successor))
+    return model
+
+
+def untimed(name: str) -> nullcontext:
+    """
+    Returns a context manager timing nothing, the phase of a check without
+    statistics.
+
+    Parameters
+    ----------
+    name: str
+        Name of the phase.
 
     Returns
     -------
-    str
-        New Name.
+    nullcontext
+        Context manager doing nothing.
 
     """
-    global counter
-    counter += 1
-    return "world" + str(counter)
+    return nullcontext()
 
 
-def check_validity_of(formula: Node) -> tuple:
+def check_validity_of(formula: Node, preprocess: bool = False, policy=rule_priority, timeout: float = None, max_rules: int = None, max_worlds: int = None, cancel: CancelToken = None, budget: Budget = None, verify: bool = False, stats: Stats = None, trace: Probe = None) -> tuple:
     """
     Checks the validity of formula.
 
@@ -614,17 +2185,56 @@ def check_validity_of(formula: Node) -> tuple:
     ----------
     formula: Node
         Formula to check.
+    preprocess: bool
+        Convert the formula to simplified negation normal form first, which
+        saves rule applications and beta branches.
+    policy: function
+        Order in which the unfolded formulas are expanded, see rule_priority.
+    timeout: float
+        Seconds the check may take.
+    max_rules: int
+        Number of rules the check may apply.
+    max_worlds: int
+        Number of worlds the model may have.
+    cancel: CancelToken
+        Token another thread can use to stop the check.
+    budget: Budget
+        Limits of the check, instead of the four above. Its counts show the
+        progress of the check to other threads.
+    verify: bool
+        Evaluate formula in the countermodel of an invalid formula with
+        model_checker, and raise RuntimeError unless it is false in the root.
+    stats: Stats
+        Statistics filled in by the check, with the time of its preprocess,
+        search, model and verify phases, or None to keep none.
+    trace: Probe
+        Observer of the events of the search, such as search_trace.Trace,
+        or None.
 
     Returns
     -------
     tuple
-        Validity of Formula and Model.
+        Validity of Formula and Model, a countermodel if the formula is
+        invalid and a model without worlds if it is valid, or UNKNOWN and
+        the Budget with the progress made if a limit was reached first.
 
     """
-    kripke_model= KripkeModel()
-    with Tableau() as tableau:
-        tableau.update_false_col_unfolded(formula)
-        kripke_model.add_world(tableau.world)
-        result,model= tableau.check_validity(kripke_model)
-        return result,model
-
+    if budget is None and (timeout is not None or max_rules is not None or max_worlds is not None or cancel is not None):
+        budget = Budget(timeout, max_rules, max_worlds, cancel)
+    phase = untimed if stats is None else stats.phase
+    probe = stats if trace is None else trace if stats is None else Probes(stats, trace)
+    checked = formula
+    if preprocess:
+        with phase("preprocess"):
+            formula, _ = simplify(formula)
+    with phase("search"):
+        run = Run(policy, probe)
+        with Tableau(run=run) if probe is None else ProbedTableau(run=run) as tableau:
+            tableau.update_false_col_unfolded(formula)
+            result,model= tableau.check_validity(budget)
+    if verify and result is False:
+        with phase("verify"):
+            import model_checker
+            if not model_checker.is_countermodel(checked, model):
+                raise RuntimeError("The countermodel does not falsify the formula")
+    return result,model
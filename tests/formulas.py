@@ -0,0 +1,12 @@
+def pigeonhole(holes):
+    """
+    Returns the negation of the pigeonhole principle for holes + 1 pigeons,
+    a valid formula whose proof takes exponentially many beta branches.
+    """
+    name = lambda pigeon, hole: "x" + chr(97 + pigeon) + chr(97 + hole)
+    clauses = ["(" + "|".join(name(i, j) for j in range(holes)) + ")" for i in range(holes + 1)]
+    for j in range(holes):
+        for i in range(holes + 1):
+            for k in range(i + 1, holes + 1):
+                clauses.append(f"(~{name(i, j)}|~{name(k, j)})")
+    return "~(" + "^".join(clauses) + ")"
@@ -0,0 +1,41 @@
+import pickle
+import unittest
+
+from batch import check_many, decode, encode
+from parse import Parser
+from tests.formulas import pigeonhole
+
+
+class TestEncode(unittest.TestCase):
+
+    def test_round_trip(self):
+        for text in ["p", "⊤|⊥", "~◻(p^q^r)->◇(p|q)", "(p->q)^(p->q)"]:
+            formula = Parser().parse_text(text)
+            self.assertIs(decode(encode(formula)), formula)
+
+    def test_compact(self):
+        formula = Parser().parse_text("(" + "^".join(["(p->◇q)"] * 100) + ")")
+        self.assertEqual(len(encode(formula)), 5)
+        self.assertLess(len(pickle.dumps(encode(formula))), len(pickle.dumps(formula)))
+
+
+class TestCheckMany(unittest.TestCase):
+
+    def test_ordered_results(self):
+        texts = ["p->p", "(p|q)->p", "p^", "◻(p->q)->(◻p->◻q)"] * 5
+        results = list(check_many(texts, workers=2, chunksize=3))
+        self.assertEqual([result.index for result in results], list(range(len(texts))))
+        self.assertEqual([result.valid for result in results[:4]], [True, False, None, True])
+        self.assertEqual(results[2].error, "Invalid syntax at position 2")
+
+    def test_nodes_and_models(self):
+        formulas = [Parser().parse_text("(p|q)->p"), Parser().parse_text("◇p->◻p")]
+        results = sorted(check_many(formulas, workers=2, ordered=False, with_model=True), key=lambda result: result.index)
+        self.assertEqual([result.valid for result in results], [False, False])
+        self.assertEqual([world.values for world in results[0].model.worlds], [["q"]])
+
+    def test_timeout_kills_worker(self):
+        texts = ["p->p", pigeonhole(4), "q->q", "(p|q)->p"]
+        results = list(check_many(texts, workers=1, chunksize=4, timeout=0.5))
+        self.assertEqual([result.valid for result in results], [True, None, True, False])
+        self.assertEqual(results[1].error, "timeout")
@@ -0,0 +1,104 @@
+import random
+import unittest
+
+from bisimulation import coarsest_partition, minimize
+from model_checker import is_countermodel
+from parse import Parser
+from tableau_procedure import KripkeModel, check_validity_of
+
+
+def random_model(rng, size):
+    model = KripkeModel()
+    for _ in range(size):
+        world = model.new_world()
+        for value in "pq":
+            if rng.random() < 0.3:
+                model.add_variable(world, value)
+    for _ in range(rng.randint(0, 3 * size)):
+        model.connect(rng.randrange(size), rng.randrange(size))
+    return model
+
+
+def naive_partition(model):
+    # Refines the blocks by the blocks of the successors until none splits.
+    numbers = {}
+    blocks = [numbers.setdefault(bits, len(numbers)) for bits in model.valuations]
+    while True:
+        numbers = {}
+        refined = [numbers.setdefault((blocks[world], frozenset(blocks[successor] for successor in model.successors(world))), len(numbers)) for world in range(len(model))]
+        if len(numbers) == len(set(blocks)):
+            return refined
+        blocks = refined
+
+
+class TestCoarsestPartition(unittest.TestCase):
+
+    def test_cycle(self):
+        model = KripkeModel()
+        for _ in range(3):
+            model.new_world()
+        for world in range(3):
+            model.connect(world, (world + 1) % 3)
+        self.assertEqual(coarsest_partition(model), [0, 0, 0])
+
+    def test_chain(self):
+        model = KripkeModel()
+        for _ in range(4):
+            model.new_world()
+        for world in range(3):
+            model.connect(world, world + 1)
+        self.assertEqual(coarsest_partition(model), [0, 1, 2, 3])
+
+    def test_same_as_naive_refinement(self):
+        rng = random.Random(20)
+        for _ in range(500):
+            model = random_model(rng, rng.randint(1, 12))
+            self.assertEqual(coarsest_partition(model), naive_partition(model))
+
+
+class TestMinimize(unittest.TestCase):
+
+    def test_merges_leaves(self):
+        model = KripkeModel()
+        root = model.new_world("root")
+        for name in ["A", "B", "C"]:
+            model.add_variable(model.new_world(name), "p")
+            model.connect(root, model.id(name))
+        quotient, mapping = minimize(model)
+        self.assertEqual(mapping, [0, 1, 1, 1])
+        self.assertEqual(quotient.get_model()[1], {"root": ["A"]})
+        self.assertEqual(list(quotient.values(1)), ["p"])
+
+    def test_mapping(self):
+        rng = random.Random(21)
+        for _ in range(100):
+            model = random_model(rng, rng.randint(1, 12))
+            quotient, mapping = minimize(model)
+            self.assertEqual(len(quotient), len(set(mapping)))
+            for world, block in enumerate(mapping):
+                self.assertEqual(quotient.valuations[block], model.valuations[world])
+                self.assertEqual(set(quotient.successors(block)), {mapping[successor] for successor in model.successors(world)})
+
+    def test_countermodels_stay_countermodels(self):
+        for text in ["◇(p|q)^◇p -> ◻q", "◇p^◇q->◇(p^q)", "◇◇p^◇◇p->◻q", "((◇(p^◇q) ^ ◇(r^◇z^◻~z)) | (◇(p^◇q) ^ ◇s)) -> t"]:
+            formula = Parser().parse_text(text)
+            _, model = check_validity_of(formula)
+            quotient, mapping = minimize(model)
+            self.assertEqual(mapping[0], 0, text)
+            self.assertLessEqual(len(quotient), len(model), text)
+            self.assertTrue(is_countermodel(formula, quotient, use_numpy=False), text)
+
+    def test_large_model(self):
+        model = KripkeModel()
+        for _ in range(20000):
+            model.new_world()
+        for world in range(20000):
+            model.connect(world, (world + 1) % 20000)
+            model.connect(world, (world * 7) % 20000)
+        quotient, mapping = minimize(model)
+        self.assertEqual(len(quotient), 1)
+        self.assertEqual(set(mapping), {0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,17 +5,17 @@ class TestLexer(unittest.TestCase):
     
     def test_parentheses(self):
         lexer = Lexer("()")
-        tokens = lexer.tokenize()
+        tokens = list(lexer.tokenize())
         expected_tokens = [
             Token("LPAREN", "("),
             Token("RPAREN", ")")
         ]
         for i in range(len(tokens)):
-            self.assertEqual(tokens[i].__dict__, expected_tokens[i].__dict__)
+            self.assertEqual(tokens[i], expected_tokens[i])
         
     def test_operators(self):
         lexer = Lexer("-> → ∧ ∨ ! ◻ ◊")
-        tokens = lexer.tokenize()
+        tokens = list(lexer.tokenize())
         expected_tokens = [
             Token("IMPLIES", "->"),
             Token("IMPLIES", "->"),
@@ -26,26 +26,53 @@ class TestLexer(unittest.TestCase):
             Token("POSSIBLY", "◇")
         ]
         for i in range(len(tokens)):
-            self.assertEqual(tokens[i].__dict__, expected_tokens[i].__dict__)
+            self.assertEqual(tokens[i], expected_tokens[i])
         
     def test_variables(self):
         lexer = Lexer("p q r")
-        tokens = lexer.tokenize()
+        tokens = list(lexer.tokenize())
         expected_tokens = [
             Token("VARIABLE", "p"),
             Token("VARIABLE", "q"),
             Token("VARIABLE", "r")
         ]
         for i in range(len(tokens)):
-            self.assertEqual(tokens[i].__dict__, expected_tokens[i].__dict__)
+            self.assertEqual(tokens[i], expected_tokens[i])
         
+    def test_offsets(self):
+        tokens = list(Lexer(" p→ (qr ∧ []s)").tokenize())
+        self.assertEqual([token.pos for token in tokens], [1, 2, 4, 5, 8, 10, 12, 13])
+        self.assertEqual(tokens[3], Token("VARIABLE", "qr"))
+
+    def test_or_letter(self):
+        tokens = list(Lexer("vp xvy V q").tokenize())
+        self.assertEqual(tokens, [Token("OR", "|"), Token("VARIABLE", "p"), Token("VARIABLE", "xvy"),
+                                  Token("OR", "|"), Token("VARIABLE", "q")])
+
+    def test_lazy(self):
+        tokens = Lexer("p ^ q $").tokenize()
+        self.assertEqual(next(tokens), Token("VARIABLE", "p"))
+        self.assertEqual(next(tokens), Token("AND", "^"))
+        self.assertEqual(next(tokens), Token("VARIABLE", "q"))
+        with self.assertRaises(SyntaxError):
+            next(tokens)
+
+    def test_empty(self):
+        lexer = Lexer("   ")
+        self.assertEqual(list(lexer.tokenize()), [])
+        self.assertEqual(lexer.get_next_token().type, "None")
+
+    def test_constants(self):
+        tokens = list(Lexer("⊤ ⊥").tokenize())
+        self.assertEqual(tokens, [Token("TRUE", "⊤"), Token("FALSE", "⊥")])
+
     def test_errors(self):
         lexer = Lexer("&$")
         with self.assertRaises(SyntaxError):
-            lexer.tokenize()
+            list(lexer.tokenize())
         lexer = Lexer("-")
         with self.assertRaises(SyntaxError):
-            lexer.tokenize()
+            list(lexer.tokenize())
             
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,73 @@
+import io
+import json
+import subprocess
+import sys
+import unittest
+
+from modal_checker import check_stream
+from tableau_procedure import check_validity_of
+
+
+class TestCheckStream(unittest.TestCase):
+
+    def test_results(self):
+        output = io.StringIO()
+        errors = check_stream(["p->p\n", "\n", "# comment\n", "(p|q)->p\n", "p^\n"], output, check_validity_of, with_model=True)
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(errors, 1)
+        self.assertEqual([result["line"] for result in results], [1, 4, 5])
+        self.assertTrue(results[0]["valid"])
+        self.assertNotIn("model", results[0])
+        self.assertFalse(results[1]["valid"])
+        self.assertEqual(list(results[1]["model"]["worlds"].values()), [["q"]])
+        self.assertEqual(results[2]["error"], "Invalid syntax at position 2")
+
+    def test_minimize(self):
+        output = io.StringIO()
+        check_stream(["◇(p|q)^◇p -> ◻q\n"], output, check_validity_of, with_model=True, minimize=True)
+        result = json.loads(output.getvalue())
+        self.assertEqual(len(result["model"]["worlds"]), 3)
+        self.assertIn("minimize_time", result)
+
+    def test_verify_error(self):
+        def check(formula, **options):
+            if formula.type == "IMPLIES":
+                raise RuntimeError("The countermodel does not falsify the formula")
+            return check_validity_of(formula, **options)
+
+        output = io.StringIO()
+        errors = check_stream(["p->q\n", "p|~p\n"], output, check)
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(errors, 1)
+        self.assertEqual(results[0]["error"], "The countermodel does not falsify the formula")
+        self.assertTrue(results[1]["valid"])
+
+    def test_stats(self):
+        output = io.StringIO()
+        check_stream(["p->p\n", "p^\n"], output, check_validity_of, with_stats=True)
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(results[0]["stats"]["rules"]["IMPLIES"], {"false": 1})
+        self.assertEqual(set(results[0]["stats"]["phases"]), {"lex", "parse", "search"})
+        self.assertNotIn("stats", results[1])
+
+    def test_trace(self):
+        trace = io.StringIO()
+        check_stream(["p->p\n", "q->q\n"], io.StringIO(), check_validity_of, trace=trace)
+        events = [json.loads(line) for line in trace.getvalue().splitlines()]
+        self.assertEqual([event[2] for event in events if event[0] == "check"], ["line 1", "line 2"])
+
+    def test_streams_lazily(self):
+        output = io.StringIO()
+
+        def lines():
+            yield "p->p\n"
+            self.assertEqual(len(output.getvalue().splitlines()), 1)
+            yield "q->q\n"
+
+        check_stream(lines(), output, check_validity_of)
+        self.assertEqual(len(output.getvalue().splitlines()), 2)
+
+    def test_headless(self):
+        code = "import sys, modal_checker; print(sorted({'customtkinter', 'networkx', 'matplotlib', 'tkinter'} & set(sys.modules)))"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "[]")
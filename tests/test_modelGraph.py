@@ -0,0 +1,132 @@
+import importlib.util
+import time
+import tracemalloc
+import unittest
+from unittest import mock
+
+from modelGraph import MAX_VISIBLE, LayoutCache, collapse, draw, model_shape, plan, spanning_tree, subtree_sizes, tree_layout
+from tableau_procedure import KripkeModel, KripkeWorld
+
+HAS_MATPLOTLIB = importlib.util.find_spec("matplotlib") is not None
+
+
+def chain_model(names):
+    model = KripkeModel()
+    for name in names:
+        model.add_world(KripkeWorld(name, [name.lower()]))
+    for name1, name2 in zip(names, names[1:]):
+        model.add_relation(name1, name2)
+    return model
+
+
+def wide_model(count):
+    model = KripkeModel()
+    model.add_world(KripkeWorld("root"))
+    for i in range(count):
+        model.add_world(KripkeWorld(f"w{i}", ["p"] if i % 2 else []))
+        model.add_relation("root", f"w{i}")
+    return model
+
+
+class TestLayout(unittest.TestCase):
+
+    def test_spanning_tree(self):
+        model = chain_model(["A", "B", "C"])
+        model.add_relation("C", "A")
+        model.add_world(KripkeWorld("D"))
+        model.add_world(KripkeWorld("E"))
+        model.add_relation("D", "E")
+        model.add_relation("E", "D")
+        roots, children, extra = spanning_tree(model)
+        self.assertEqual(roots, ["A", "D"])
+        self.assertEqual(children["A"], ["B"])
+        self.assertEqual(children["B"], ["C"])
+        self.assertEqual(children["D"], ["E"])
+        self.assertEqual(extra, [("C", "A"), ("E", "D")])
+
+    def test_subtree_sizes(self):
+        sizes = subtree_sizes(["A"], {"A": ["B", "C"], "B": ["D"], "C": [], "D": []})
+        self.assertEqual(sizes, {"A": 4, "B": 2, "C": 1, "D": 1})
+
+    def test_collapse(self):
+        roots, children, _ = spanning_tree(wide_model(2000))
+        nodes = collapse(roots, children)
+        self.assertLessEqual(len(nodes), MAX_VISIBLE)
+        self.assertEqual(nodes[0], ("root", -1))
+        hidden = [name for name, _ in nodes if isinstance(name, int)]
+        self.assertEqual(len(nodes) - 1 - len(hidden) + sum(hidden), 2000)
+
+    def test_tree_layout(self):
+        positions = tree_layout((-1, 0, 0, 1, 1))
+        self.assertEqual(positions[3], (0, -2))
+        self.assertEqual(positions[4], (1, -2))
+        self.assertEqual(positions[1], (0.5, -1))
+        self.assertEqual(positions[2], (2, -1))
+        self.assertEqual(positions[0], (1.25, 0))
+
+    def test_model_shape(self):
+        renamed = KripkeModel()
+        renamed.add_world(KripkeWorld("X", ["a"]))
+        renamed.add_world(KripkeWorld("Y", ["b"]))
+        renamed.add_relation("X", "Y")
+        self.assertEqual(model_shape(chain_model(["A", "B"])), model_shape(renamed))
+        self.assertNotEqual(model_shape(chain_model(["A", "B"])), model_shape(chain_model(["A", "B", "C"])))
+        self.assertNotEqual(model_shape(wide_model(2)), model_shape(wide_model(3)))
+
+    def test_plan(self):
+        positions, colors, labels, collapsed, edges = plan(chain_model(["A", "B", "C"]))
+        self.assertEqual(positions, [(0, 0), (0, -1), (0, -2)])
+        self.assertEqual(labels, ["['a']", "['b']", "['c']"])
+        self.assertEqual(collapsed, [False] * 3)
+        self.assertEqual(edges, [(0, 1), (1, 2)])
+
+    def test_layout_cache(self):
+        layout = LayoutCache(maxsize=2)
+        first = layout(chain_model(["A", "B"]))
+        with mock.patch("modelGraph.spanning_tree") as tree:
+            self.assertIs(layout(chain_model(["A", "B"])), first)
+        tree.assert_not_called()
+        layout(chain_model(["A"]))
+        layout(chain_model(["A", "B"]))
+        layout(chain_model(["A", "B", "C"]))
+        self.assertEqual(list(layout.layouts), [model_shape(chain_model(["A", "B"])), model_shape(chain_model(["A", "B", "C"]))])
+
+
+@unittest.skipUnless(HAS_MATPLOTLIB, "matplotlib is not installed")
+class TestDraw(unittest.TestCase):
+
+    def setUp(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        self.figure = Figure()
+        self.axes = self.figure.add_subplot()
+        self.canvas = FigureCanvasAgg(self.figure)
+
+    def test_small_model(self):
+        self.assertEqual(draw(self.axes, chain_model(["A", "B", "C"])), 3)
+        self.canvas.draw()
+        self.assertEqual(sorted(text.get_text() for text in self.axes.texts if text.get_text()), ["['a']", "['b']", "['c']"])
+
+    def test_large_model_redrawn(self):
+        model = wide_model(2000)
+        layout = LayoutCache()
+        start = time.perf_counter()
+        draw(self.axes, model, layout)
+        self.canvas.draw()
+        self.assertLess(time.perf_counter() - start, 1.0)
+        tracemalloc.start()
+        for _ in range(5):
+            draw(self.axes, model, layout)
+            self.canvas.draw()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(5):
+            draw(self.axes, model, layout)
+            self.canvas.draw()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.assertLess(after - before, 256 * 1024)
+        self.assertEqual(len(layout.layouts), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import importlib.util
+import unittest
+
+from model_checker import evaluate, holds, is_countermodel
+from parse import Parser
+from tableau_procedure import KripkeModel, check_validity_of
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+
+def small_model():
+    # A sees B and C, B sees C; p holds in B and C, q only in C.
+    model = KripkeModel()
+    for name, values in [("A", []), ("B", ["p"]), ("C", ["p", "q"])]:
+        world = model.new_world(name)
+        for value in values:
+            model.add_variable(world, value)
+    model.add_relation("A", "B")
+    model.add_relation("A", "C")
+    model.add_relation("B", "C")
+    return model
+
+
+class TestEvaluate(unittest.TestCase):
+
+    cases = [
+        ("p", [False, True, True]),
+        ("~q", [True, True, False]),
+        ("p^q", [False, False, True]),
+        ("p|q|r", [False, True, True]),
+        ("q->p", [True, True, True]),
+        ("◻p", [True, True, True]),
+        ("◻q", [False, True, True]),
+        ("◇q", [True, True, False]),
+        ("◇◇q", [True, False, False]),
+        ("◻⊥", [False, False, True]),
+        ("◇⊤^◻(p^◇⊤)", [False, False, False]),
+        ("r", [False, False, False]),
+    ]
+
+    def check_backend(self, use_numpy):
+        model = small_model()
+        for text, expected in self.cases:
+            vector = evaluate(Parser().parse_text(text), model, use_numpy)
+            self.assertEqual([bool(value) for value in vector], expected, text)
+
+    def test_bytes(self):
+        self.check_backend(False)
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy is not installed")
+    def test_numpy(self):
+        self.check_backend(True)
+
+    def test_holds(self):
+        formula = Parser().parse_text("◇(p^◇q)")
+        self.assertTrue(holds(formula, small_model()))
+        self.assertFalse(holds(formula, small_model(), 1))
+
+    def test_deep_formula(self):
+        formula = Parser().parse_text("◻" * 5000 + "p")
+        self.assertEqual([bool(value) for value in evaluate(formula, small_model(), False)], [True, True, True])
+
+
+class TestCountermodels(unittest.TestCase):
+
+    def test_countermodels_falsify_formulas(self):
+        for text in ["◇p->◻p", "(p|q)->p", "((◇(p^◇q) ^ ◇(r^◇z^◻~z)) | (◇(p^◇q) ^ ◇s)) -> t", "◻(p|q)->◻p|◻q"]:
+            formula = Parser().parse_text(text)
+            result, model = check_validity_of(formula, verify=True)
+            self.assertFalse(result, text)
+            self.assertTrue(is_countermodel(formula, model), text)
+            self.assertTrue(is_countermodel(formula, model, use_numpy=False), text)
+
+    def test_not_a_countermodel(self):
+        formula = Parser().parse_text("◇q->◇p")
+        self.assertFalse(is_countermodel(formula, small_model()))
+        self.assertFalse(is_countermodel(formula, KripkeModel()))
+
+
+if __name__ == '__main__':
+    unittest.main()
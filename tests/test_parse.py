@@ -1,3 +1,4 @@
+import sys
 import unittest
 from lexer import Token
 from parse import Parser, Node
@@ -13,68 +14,103 @@ class TestParser(unittest.TestCase):
     def test_parse_not(self):
         parser = Parser()
         node = parser.parse_text("~p")
-        expected_node = Node("NOT", "~")
-        expected_node.right = Node("VARIABLE", "p")
+        expected_node = Node("NOT", "~", right=Node("VARIABLE", "p"))
         self.assertEqual(node, expected_node)
 
     def test_parse_necessarily(self):
         parser = Parser()
         node = parser.parse_text("□p")
-        expected_node = Node("NECESSARILY", "□")
-        expected_node.right = Node("VARIABLE", "p")
+        expected_node = Node("NECESSARILY", "□", right=Node("VARIABLE", "p"))
         self.assertEqual(node, expected_node)
 
     def test_parse_possibly(self):
         parser = Parser()
         node = parser.parse_text("◇p")
-        expected_node = Node("POSSIBLY", "◇")
-        expected_node.right = Node("VARIABLE", "p")
+        expected_node = Node("POSSIBLY", "◇", right=Node("VARIABLE", "p"))
         self.assertEqual(node, expected_node)
 
     def test_parse_and(self):
         parser = Parser()
         node = parser.parse_text("p^q")
-        expected_node = Node("AND", "^")
-        expected_node.left = Node("VARIABLE", "p")
-        expected_node.right = Node("VARIABLE", "q")
+        expected_node = Node("AND", "^", Node("VARIABLE", "p"), Node("VARIABLE", "q"))
         self.assertEqual(node, expected_node)
 
     def test_parse_or(self):
         parser = Parser()
         node = parser.parse_text("p|q")
-        expected_node = Node("OR", "|")
-        expected_node.left = Node("VARIABLE", "p")
-        expected_node.right = Node("VARIABLE", "q")
+        expected_node = Node("OR", "|", Node("VARIABLE", "p"), Node("VARIABLE", "q"))
         self.assertEqual(node, expected_node)
 
     def test_parse_implies(self):
         parser = Parser()
         node = parser.parse_text("p->q")
-        expected_node = Node("IMPLIES", "->")
-        expected_node.left = Node("VARIABLE", "p")
-        expected_node.right = Node("VARIABLE", "q")
+        expected_node = Node("IMPLIES", "->", Node("VARIABLE", "p"), Node("VARIABLE", "q"))
         self.assertEqual(node, expected_node)
 
     def test_parse_complex_expression(self):
         parser = Parser()
         node = parser.parse_text("~□(p->q)^(r|s)")
-        expected_node = Node("AND", "^")
-        expected_node.left = Node("NOT", "~")
-        expected_node.left.right = Node("NECESSARILY", "□")
-        expected_node.left.right.right = Node("IMPLIES", "->")
-        expected_node.left.right.right.left = Node("VARIABLE", "p")
-        expected_node.left.right.right.right = Node("VARIABLE", "q")
-        expected_node.right = Node("OR", "|")
-        expected_node.right.left = Node("VARIABLE", "r")
-        expected_node.right.right = Node("VARIABLE", "s")
+        implication = Node("IMPLIES", "->", Node("VARIABLE", "p"), Node("VARIABLE", "q"))
+        expected_node = Node("AND", "^",
+                             Node("NOT", "~", right=Node("NECESSARILY", "□", right=implication)),
+                             Node("OR", "|", Node("VARIABLE", "r"), Node("VARIABLE", "s")))
         self.assertEqual(node, expected_node)
 
+    def test_parse_nary_chains(self):
+        parser = Parser()
+        p, q, r = Node("VARIABLE", "p"), Node("VARIABLE", "q"), Node("VARIABLE", "r")
+        self.assertEqual(parser.parse_text("p^q^r"), Node("AND", "^", args=(p, q, r)))
+        self.assertEqual(parser.parse_text("p|q|r"), Node("OR", "|", args=(p, q, r)))
+        self.assertEqual(parser.parse_text("(p^q)^r"), Node("AND", "^", Node("AND", "^", p, q), r))
+        node = parser.parse_text(" ∧ ".join(["p"] * 1000))
+        self.assertEqual(len(node.args), 1000)
+        self.assertEqual(node.height(), 1)
+
+    def test_precedence(self):
+        parser = Parser()
+        self.assertEqual(parser.parse_text("p|q^r"), parser.parse_text("p|(q^r)"))
+        self.assertEqual(parser.parse_text("p^q|r^s"), parser.parse_text("(p^q)|(r^s)"))
+        self.assertEqual(parser.parse_text("p|q->r"), parser.parse_text("(p|q)->r"))
+        self.assertEqual(parser.parse_text("p->q->r"), parser.parse_text("p->(q->r)"))
+        self.assertEqual(parser.parse_text("~p^◻q|◇r"), parser.parse_text("((~p)^(◻q))|(◇r)"))
+        self.assertEqual(parser.parse_text("~◻p^q"), parser.parse_text("(~(◻p))^q"))
+
+    def test_shared_subformulas(self):
+        parser = Parser()
+        node = parser.parse_text("(p->q)^(p->q)")
+        self.assertIs(node.left, node.right)
+        self.assertIs(node, parser.parse_text("(p->q)^(p->q)"))
+        self.assertIsNot(node, parser.parse_text("(p->q)|(p->q)"))
+
+    def test_node_is_immutable(self):
+        node = Node("VARIABLE", "p")
+        with self.assertRaises(AttributeError):
+            node.right = Node("VARIABLE", "q")
+
+    def test_height(self):
+        parser = Parser()
+        self.assertEqual(parser.parse_text("p").height(), 0)
+        self.assertEqual(parser.parse_text("~□(p->q)^(r|s)").height(), 4)
+
+    def test_deep_nesting(self):
+        depth = 5 * sys.getrecursionlimit()
+        parser = Parser()
+        node = parser.parse_text("◻" * depth + "(" * depth + "p" + ")" * depth)
+        self.assertEqual(node.height(), depth)
+        self.assertTrue(repr(node).startswith("Node(NECESSARILY, □, None, Node("))
+
     def test_errors(self):
         parser = Parser()
         with self.assertRaises(SyntaxError):
             parser.parse_text(")(")    
         with self.assertRaises(SyntaxError):
-            parser.parse_text("(p")     
+            parser.parse_text("(p")
+        with self.assertRaises(SyntaxError):
+            parser.parse_text("p q")
+        with self.assertRaises(SyntaxError):
+            parser.parse_text("p^")
+        with self.assertRaises(SyntaxError):
+            parser.parse_text("")
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,58 @@
+import unittest
+from parse import Parser, Node
+from preprocess import simplify, formula_size, TOP, BOTTOM
+from tableau_procedure import check_validity_of
+
+class TestSimplify(unittest.TestCase):
+
+    def simplified(self, text):
+        formula, _ = simplify(Parser().parse_text(text))
+        return formula
+
+    def test_negation_normal_form(self):
+        parser = Parser()
+        self.assertEqual(self.simplified("~~p"), parser.parse_text("p"))
+        self.assertEqual(self.simplified("~(p->q)"), parser.parse_text("p^~q"))
+        self.assertEqual(self.simplified("p->q"), parser.parse_text("~p|q"))
+        self.assertEqual(self.simplified("~(p^q)"), parser.parse_text("~p|~q"))
+        self.assertEqual(self.simplified("~(p|q)"), parser.parse_text("~p^~q"))
+        self.assertEqual(self.simplified("~◻p"), parser.parse_text("◇~p"))
+        self.assertEqual(self.simplified("~◇(p^q)"), parser.parse_text("◻(~p|~q)"))
+
+    def test_constants(self):
+        self.assertIs(self.simplified("p|~p"), TOP)
+        self.assertIs(self.simplified("q^~q"), BOTTOM)
+        self.assertIs(self.simplified("(p->q)^~(p->q)"), BOTTOM)
+        self.assertIs(self.simplified("◇(p^~p)"), BOTTOM)
+        self.assertIs(self.simplified("◻(q|~q)"), TOP)
+        self.assertIs(self.simplified("~⊤|⊥"), BOTTOM)
+        self.assertEqual(self.simplified("(p|~p)^◻r"), Parser().parse_text("◻r"))
+
+    def test_nary_cleanup(self):
+        parser = Parser()
+        self.assertEqual(self.simplified("p^q^p^r"), parser.parse_text("p^q^r"))
+        self.assertEqual(self.simplified("(p^q)^(r^p)"), parser.parse_text("p^q^r"))
+        self.assertEqual(self.simplified("p^(p|q)"), parser.parse_text("p"))
+        self.assertEqual(self.simplified("p|(p^q)"), parser.parse_text("p"))
+
+    def test_report(self):
+        formula, report = simplify(Parser().parse_text("(p|~p)^◻r"))
+        self.assertEqual(report.size_before, 6)
+        self.assertEqual(report.size_after, 2)
+        self.assertEqual(report.size_after, formula_size(formula))
+        self.assertAlmostEqual(report.reduction(), 2 / 3)
+
+    def test_deep_formula(self):
+        formula, _ = simplify(Parser().parse_text("~" * 10001 + "◻" * 10000 + "p"))
+        self.assertEqual(formula.type, "POSSIBLY")
+        self.assertEqual(formula.height(), 10001)
+
+    def test_same_verdicts(self):
+        formulas = ["◊p → ¬□¬p", "◊p → □p", "□(p → q) ∧ ◊r", "◻◻◻◻(a->b)|◻◻◻◻◻b",
+                    "¬◊(p∧¬q)→(◻p→ ◻q)", "(p ∧ ¬◊q) ∨ (◻p ∧ q) → (◊p → ◻q)", "p|~p", "◇⊤", "◻⊥ -> ◻p"]
+        for text in formulas:
+            formula = Parser().parse_text(text)
+            self.assertEqual(check_validity_of(formula, preprocess=True)[0], check_validity_of(formula)[0], text)
+
+if __name__ == '__main__':
+    unittest.main()
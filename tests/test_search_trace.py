@@ -0,0 +1,94 @@
+import io
+import unittest
+
+from parse import Parser
+from search_trace import Trace, collapse, formula_text, read_events, replay
+from tableau_procedure import Stats, check_validity_of
+from tests.formulas import pigeonhole
+
+
+def traced(text, **options):
+    trace = Trace("test", **options)
+    result = check_validity_of(Parser().parse_text(text), trace=trace)
+    return result, trace
+
+
+class TestFormulaText(unittest.TestCase):
+
+    def test_text(self):
+        self.assertEqual(formula_text(Parser().parse_text("◻(p->q)^~◇r|⊤")), "((□(p->q)^~◇r)|⊤)")
+
+    def test_limit(self):
+        self.assertEqual(formula_text(Parser().parse_text("◻" * 10000 + "p"), 5), "□□□□□…")
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_events(self):
+        _, trace = traced("◻(p|q)->◻p|◻q")
+        kinds = [event[0] for event in trace.events]
+        self.assertEqual(kinds[:3], ["check", "world", "enter"])
+        self.assertEqual(kinds.count("rule"), 11)
+        self.assertEqual(kinds.count("world"), 3)
+        self.assertEqual(kinds.count("split"), 2)
+        self.assertEqual((kinds.count("clash"), kinds.count("backtrack")), (1, 1))
+        self.assertEqual(kinds[-1], "leave")
+        times = [event[1] for event in trace.events]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(trace.formulas[trace.events[3][3]], "(□(p|q)->(□p|□q))")
+
+    def test_stream(self):
+        stream = io.StringIO()
+        traced("◻(p|q)->◻p|◻q", stream=stream)
+        _, trace = traced("◻(p|q)->◻p|◻q")
+        events = list(read_events(io.StringIO(stream.getvalue())))
+        self.assertEqual([event[0] for event in events if event[0] != "formula"], [event[0] for event in trace.events])
+
+    def test_ring_buffer(self):
+        _, trace = traced(pigeonhole(2), capacity=100)
+        self.assertEqual(len(trace.events), 100)
+        self.assertEqual(trace.events[-1][0], "leave")
+
+    def test_same_results(self):
+        for text in ["◇p->◻p", pigeonhole(2), "((◇(p^◇q) ^ ◇(r^◇z^◻~z)) | (◇(p^◇q) ^ ◇s)) -> t"]:
+            formula = Parser().parse_text(text)
+            stats = Stats()
+            self.assertEqual(repr(check_validity_of(formula, trace=Trace(), stats=stats)), repr(check_validity_of(formula)), text)
+            self.assertGreater(stats.rule_count(), 0)
+
+
+class TestTools(unittest.TestCase):
+
+    def events(self, text):
+        _, trace = traced(text)
+        stream = io.StringIO()
+        trace.dump(stream)
+        return list(read_events(io.StringIO(stream.getvalue())))
+
+    def test_collapse_rules(self):
+        stacks = collapse(self.events("◇p->◻p"), "rules")
+        self.assertEqual(stacks, {
+            "test;F (◇p->□p)": 1,
+            "test;F □p": 1,
+            "test;T ◇p": 1,
+            "test;□p;F p": 1,
+            "test;◇p;T p": 1,
+        })
+
+    def test_collapse_time(self):
+        events = self.events("◻(p|q)->◻p|◻q")
+        stacks = collapse(events)
+        self.assertEqual(sum(stacks.values()), events[-1][1])
+        self.assertIn("test;□p;clash", stacks)
+
+    def test_replay(self):
+        lines = list(replay(self.events("◇p->◻p")))
+        self.assertEqual(lines[0], "check test")
+        self.assertTrue(lines[1].endswith("w0 is checked, at depth 1"))
+        self.assertTrue(lines[4].endswith("w0 creates w1 for □p"))
+        self.assertTrue(lines[8].endswith("  w1 F p"))
+        self.assertTrue(lines[-1].endswith("w0 is open"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,11 @@
+import sys
+import time
 import unittest
-from tableau_procedure import KripkeWorld, KripkeModel, Tableau, check_validity_of
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tableau_procedure import UNKNOWN, Budget, CancelToken, KripkeWorld, KripkeModel, Run, Stats, Tableau, Trail, check_validity_of, rule_priority, lifo_priority
 from parse import Parser
+from tests.formulas import pigeonhole
 
 class TestKripkeWorld(unittest.TestCase):
 
@@ -38,6 +43,45 @@ class TestKripkeModel(unittest.TestCase):
         model.add_world(world2)
         model.add_relation("A", "B")
         self.assertEqual(model.get_model(), ([world1, world2], {"A": ["B"]}))
+
+    def test_compact_worlds(self):
+        model = KripkeModel()
+        first = model.new_world()
+        second = model.new_world("B")
+        for value in ["p", "q", "p"]:
+            model.add_variable(second, value)
+        self.assertEqual((first, second, len(model)), (0, 1, 2))
+        self.assertEqual((model.name(first), model.name(second)), ("world0", "B"))
+        self.assertEqual((model.id("world0"), model.id("B"), model.id("C")), (0, 1, None))
+        self.assertEqual(model.values(second), ["p", "q"])
+        self.assertEqual(model.valuations, [0, 0b11])
+
+    def test_successors(self):
+        model = KripkeModel()
+        for _ in range(3):
+            model.new_world()
+        model.connect(0, 2)
+        model.connect(0, 1)
+        self.assertEqual(list(model.successors(0)), [2, 1])
+        self.assertEqual(list(model.successors(1)), [])
+        model.connect(2, 0)
+        self.assertEqual(list(model.successors(2)), [0])
+        self.assertEqual(model.relations, {"world0": ["world2", "world1"], "world2": ["world0"]})
+
+    def test_undo_changes(self):
+        trail = Trail()
+        model = KripkeModel(trail=trail)
+        root = model.new_world()
+        model.add_variable(root, "p")
+        mark = trail.mark()
+        world = model.new_world()
+        model.connect(root, world)
+        model.add_variable(root, "q")
+        model.add_variable(world, "p")
+        trail.undo(mark)
+        self.assertEqual(len(model), 1)
+        self.assertEqual(model.values(root), ["p"])
+        self.assertEqual(list(model.successors(root)), [])
     
 class TestTableau(unittest.TestCase):
 
@@ -80,6 +124,14 @@ class TestTableau(unittest.TestCase):
         tableau = Tableau(tr={"a": True}, fl={"b": True})
         self.assertFalse(tableau.contradiction())
 
+    def test_clash_on_insertion(self):
+        tableau = Tableau(tr={"a": True})
+        tableau.update_false_col_unfolded("b")
+        self.assertIsNone(tableau.clash)
+        tableau.update_false_col_unfolded("a")
+        self.assertEqual(tableau.clash, "a")
+        self.assertTrue(tableau.contradiction())
+
 class TestCheckValidity(unittest.TestCase):
     def test_valid_formula(formula):
         formula = Parser().parse_text("◊p → ¬□¬p")
@@ -93,9 +145,97 @@ class TestCheckValidity(unittest.TestCase):
         assert result == False
         assert isinstance(model, KripkeModel)
     
+    def test_beta_rules_need_both_branches_closed(self):
+        for text in ["(p|q)->p", "(p|q)->q", "p->(p^q)", "~(p^q)->~p", "(p->q)->q"]:
+            result, model = check_validity_of(Parser().parse_text(text))
+            self.assertFalse(result, text)
+        for text in ["(p^q)->p", "(p|q)->(q|p)", "~(p^q)->(~p|~q)", "(p->q)->(~q->~p)"]:
+            result, model = check_validity_of(Parser().parse_text(text))
+            self.assertTrue(result, text)
+
+    def test_no_model_for_valid_formula(self):
+        result, model = check_validity_of(Parser().parse_text("◇p^◇q^(◇r|◻s) -> ◇p"))
+        self.assertTrue(result)
+        self.assertEqual(len(model), 0)
+
+    def test_countermodel_of_open_branch(self):
+        result, model = check_validity_of(Parser().parse_text("(p|q)->p"))
+        self.assertFalse(result)
+        self.assertEqual(len(model.worlds), 1)
+        self.assertEqual(model.worlds[0].values, ["q"])
+
+    def test_nary_connectives(self):
+        for text in ["p|q|r -> r|q|p", "p^q^r -> q", "~(p^q^r) -> ~p|~q|~r", "◻p^◻q^◻r -> ◻(p^q^r)"]:
+            result, model = check_validity_of(Parser().parse_text(text))
+            self.assertTrue(result, text)
+        for text in ["p|q|r -> p", "p^q^r -> s", "◇p^◇q -> ◇(p^q)"]:
+            result, model = check_validity_of(Parser().parse_text(text))
+            self.assertFalse(result, text)
+
+    def test_agenda_policies(self):
+        texts = ["p|q|r -> r|q|p", "(p->q)^(q->r) -> (p->r)", "◻(p->q) -> (◇p->◇q)", "(p|q) -> p", "◇p^◇q -> ◇(p^q)"]
+        for text in texts:
+            formula = Parser().parse_text(text)
+            self.assertEqual(check_validity_of(formula, policy=rule_priority)[0], check_validity_of(formula, policy=lifo_priority)[0], text)
+
+    def test_agenda_order(self):
+        with Tableau() as tableau:
+            beta = Parser().parse_text("p|q")
+            modal = Parser().parse_text("◻p")
+            alpha = Parser().parse_text("p^q")
+            for formula in (modal, beta, alpha):
+                tableau.unfolded.push(formula, True)
+            self.assertEqual(len(tableau.unfolded), 3)
+            mark = tableau.trail.mark()
+            self.assertEqual([tableau.unfolded.pop()[0] for _ in range(3)], [alpha, beta, modal])
+            self.assertIsNone(tableau.unfolded.pop())
+            tableau.trail.undo(mark)
+            self.assertEqual(tableau.unfolded.pop()[0], alpha)
+
+    def test_repeated_successor_labels(self):
+        inner = "(" + "^".join(f"(m{c}|n{c})" for c in "abcdefgh") + ")^◇z^◻~z"
+        names = [f"y{chr(97 + i)}" for i in range(12)]
+        body = "^".join(f"(◇(a^{inner})|◇(b^{inner})|{name})" for name in names)
+        result, model = check_validity_of(Parser().parse_text(f"({body}) -> ◇q|" + "|".join(names)))
+        self.assertTrue(result)
+
+    def test_countermodel_from_witness(self):
+        result, model = check_validity_of(Parser().parse_text("((◇(p^◇q) ^ ◇(r^◇z^◻~z)) | (◇(p^◇q) ^ ◇s)) -> t"))
+        self.assertFalse(result)
+        worlds = {world.name: world.values for world in model.worlds}
+        root = model.worlds[0].name
+        values = sorted(worlds[name] for name in model.relations[root])
+        self.assertEqual(values, [["p"], ["s"]])
+        p_world = next(name for name in model.relations[root] if worlds[name] == ["p"])
+        self.assertEqual([worlds[name] for name in model.relations[p_world]], [["q"]])
+
+    def test_wide_conjunction(self):
+        atoms = ["p" + "".join(chr(ord("a") + int(digit)) for digit in str(i)) for i in range(1000)]
+        result, model = check_validity_of(Parser().parse_text(" ∧ ".join(atoms) + " → " + atoms[500]))
+        self.assertTrue(result)
+        result, model = check_validity_of(Parser().parse_text(" ∧ ".join(atoms) + " → q"))
+        self.assertFalse(result)
+        self.assertEqual(sorted(model.worlds[0].values), sorted(atoms))
+
+    def test_deep_modal_chain(self):
+        depth = 5 * sys.getrecursionlimit()
+        formula = Parser().parse_text("◻" * depth + "(a->b)|" + "◻" * depth + "b")
+        result, model = check_validity_of(formula)
+        self.assertFalse(result)
+        self.assertEqual(len(model.worlds), 2 * depth + 1)
+
+        formula = Parser().parse_text("◻" * depth + "(a->b)->(" + "◻" * depth + "a->" + "◻" * depth + "b)")
+        result, model = check_validity_of(formula)
+        self.assertTrue(result)
+
     def test_rules_combinations(self):
         formula = Parser().parse_text("¬◊(p∧q)→(◻p→ ◻q)")
         result, model = check_validity_of(formula)
+        assert result == False
+        assert isinstance(model, KripkeModel)
+
+        formula = Parser().parse_text("¬◊(p∧¬q)→(◻p→ ◻q)")
+        result, model = check_validity_of(formula)
         assert result == True
         assert isinstance(model, KripkeModel)
 
@@ -114,8 +254,147 @@ class TestCheckValidity(unittest.TestCase):
         assert result == False
         assert isinstance(model, KripkeModel)
 
-        
 
-    
+class TestBudget(unittest.TestCase):
+    def test_unknown_has_no_truth_value(self):
+        with self.assertRaises(TypeError):
+            bool(UNKNOWN)
+
+    def test_max_rules(self):
+        result, budget = check_validity_of(Parser().parse_text(pigeonhole(4)), max_rules=100)
+        self.assertIs(result, UNKNOWN)
+        self.assertEqual((budget.reason, budget.rules), ("max_rules", 100))
+
+    def test_max_worlds(self):
+        formula = Parser().parse_text("(" + "^".join(f"◇{name}" for name in ["a", "b", "c", "d", "e", "f"]) + ") -> ◻q")
+        result, budget = check_validity_of(formula, max_worlds=3)
+        self.assertIs(result, UNKNOWN)
+        self.assertEqual(budget.reason, "max_worlds")
+        self.assertFalse(check_validity_of(formula, max_worlds=10)[0])
+
+    def test_timeout(self):
+        result, budget = check_validity_of(Parser().parse_text(pigeonhole(4)), timeout=0.05)
+        self.assertIs(result, UNKNOWN)
+        self.assertEqual(budget.reason, "timeout")
+        self.assertGreater(budget.rules, 0)
+
+    def test_cancel(self):
+        token = CancelToken()
+        threading.Timer(0.05, token.cancel).start()
+        result, budget = check_validity_of(Parser().parse_text(pigeonhole(4)), cancel=token)
+        self.assertIs(result, UNKNOWN)
+        self.assertEqual(budget.reason, "cancelled")
+
+    def test_within_budget(self):
+        result, model = check_validity_of(Parser().parse_text("◻(p->q)->(◻p->◻q)"), timeout=10, max_rules=1000)
+        self.assertTrue(result)
+
+    def test_progress_from_another_thread(self):
+        budget = Budget(cancel=CancelToken())
+        results = []
+        worker = threading.Thread(target=lambda: results.append(check_validity_of(Parser().parse_text(pigeonhole(4)), budget=budget)))
+        worker.start()
+        while budget.rules < 1000 and worker.is_alive():
+            worker.join(0.01)
+        budget.cancel.cancel()
+        worker.join()
+        self.assertIs(results[0][0], UNKNOWN)
+        self.assertGreaterEqual(budget.rules, 1000)
+
+
+class TestStats(unittest.TestCase):
+    def test_counts(self):
+        stats = Stats()
+        formula = Parser().parse_text("◻(p|q)->◻p|◻q", stats)
+        result, _ = check_validity_of(formula, stats=stats)
+        self.assertFalse(result)
+        self.assertEqual(stats.rules[("OR", True)], 2)
+        self.assertEqual(stats.rules[("NECESSARILY", False)], 2)
+        self.assertEqual(stats.rule_count(), 11)
+        self.assertEqual((stats.beta_splits, stats.backtracks, stats.clashes), (2, 1, 1))
+        self.assertEqual((stats.worlds, stats.max_world_depth, stats.max_branch_depth), (3, 2, 1))
+        self.assertEqual(stats.branch_depth, 0)
+        self.assertEqual(stats.peak_false_column, 4)
+        self.assertEqual(set(stats.phases), {"lex", "parse", "search", "model"})
+        self.assertEqual(stats.as_dict()["rules"]["OR"], {"true": 2, "false": 1})
+
+    def test_same_results(self):
+        for text in ["◇p->◻p", "◻(p->q)->(◻p->◻q)", pigeonhole(2), "((◇(p^◇q) ^ ◇(r^◇z^◻~z)) | (◇(p^◇q) ^ ◇s)) -> t"]:
+            formula = Parser().parse_text(text)
+            stats = Stats()
+            self.assertEqual(repr(check_validity_of(formula, stats=stats)), repr(check_validity_of(formula)), text)
+            self.assertEqual(stats.branch_depth, 0, text)
+
+    def test_phases(self):
+        stats = Stats()
+        check_validity_of(Parser().parse_text("~~◇p->◻p"), preprocess=True, verify=True, stats=stats)
+        self.assertEqual(set(stats.phases), {"preprocess", "search", "model", "verify"})
+        with stats.phase("outer"):
+            with stats.phase("inner"):
+                time.sleep(0.01)
+        self.assertGreaterEqual(stats.phases["inner"], 0.01)
+        self.assertLess(stats.phases["outer"], 0.01)
+
+    def test_budget_with_stats(self):
+        stats = Stats()
+        result, budget = check_validity_of(Parser().parse_text(pigeonhole(4)), max_rules=500, stats=stats)
+        self.assertIs(result, UNKNOWN)
+        self.assertEqual(stats.rule_count(), budget.rules)
+
+
+class TestRun(unittest.TestCase):
+    def test_world_ids(self):
+        run = Run()
+        root = Tableau(run=run)
+        successor = root.add_successor([root])
+        self.assertEqual((root.id, successor.id, run.worlds), (0, 1, 2))
+        self.assertIs(successor.trail, root.trail)
+        self.assertEqual(Tableau().id, 0)
+
+    def test_formula_ids(self):
+        run = Run()
+        p, q = Parser().parse_text("p"), Parser().parse_text("q")
+        self.assertEqual((run.formula_id(p), run.formula_id(q), run.formula_id(p)), (0, 2, 0))
+
+    def test_label_bits(self):
+        p, q = Parser().parse_text("p"), Parser().parse_text("q")
+        run = Run()
+        tableau1 = Tableau(run=run)
+        tableau1.add_true(p)
+        tableau1.add_false(q)
+        tableau2 = Tableau(run=run)
+        tableau2.add_false(q)
+        tableau2.add_true(p)
+        self.assertEqual(tableau1.label(), 0b1001)
+        self.assertEqual(tableau2.label(), tableau1.label())
+        tableau3 = Tableau(run=run)
+        tableau3.add_false(p)
+        tableau3.add_true(q)
+        self.assertEqual(tableau3.label(), 0b0110)
+
+    def test_labels_per_run(self):
+        formula = Parser().parse_text("◇(p^q)^◇(q^p)->◇p")
+        check_validity_of(formula)
+        run = Run()
+        with Tableau(run=run) as tableau:
+            tableau.update_false_col_unfolded(formula)
+            tableau.check_validity()
+        self.assertEqual(len(run.labels), 1)
+
+    def test_concurrent_checks(self):
+        texts = [pigeonhole(2), pigeonhole(3), "◇p->◻p", "◇(p|q)^◇p -> ◻q", "◇◇p^◇◇p->◻q",
+                 "((◇(p^◇q) ^ ◇(r^◇z^◻~z)) | (◇(p^◇q) ^ ◇s)) -> t", "◻(p->q)->(◻p->◻q)"] * 4
+        formulas = [Parser().parse_text(text) for text in texts]
+        expected = [repr(check_validity_of(formula)) for formula in formulas]
+        switch = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda formula: repr(check_validity_of(formula)), formulas))
+        finally:
+            sys.setswitchinterval(switch)
+        self.assertEqual(results, expected)
+
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import verdict_cache
+from verdict_cache import VerdictCache, canonical_key
+from parse import Parser
+
+
+class TestCanonicalKey(unittest.TestCase):
+
+    def test_renamed_variables(self):
+        self.assertEqual(canonical_key(Parser().parse_text("p->(q->p)"))[0], canonical_key(Parser().parse_text("a->(b->a)"))[0])
+
+    def test_commutative_operands(self):
+        self.assertEqual(canonical_key(Parser().parse_text("◻p^(q|~r)"))[0], canonical_key(Parser().parse_text("(~x|y)^◻z"))[0])
+
+    def test_distinct_formulas(self):
+        self.assertNotEqual(canonical_key(Parser().parse_text("p->q"))[0], canonical_key(Parser().parse_text("q->q"))[0])
+        self.assertNotEqual(canonical_key(Parser().parse_text("p->q"))[0], canonical_key(Parser().parse_text("q|p"))[0])
+
+    def test_renaming(self):
+        self.assertEqual(canonical_key(Parser().parse_text("b^a"))[1], {"b": "v0", "a": "v1"})
+
+
+class TestVerdictCache(unittest.TestCase):
+
+    def test_hit_skips_tableau(self):
+        cache = VerdictCache()
+        valid, model = cache.check(Parser().parse_text("(p|q)->p"))
+        self.assertFalse(valid)
+        with mock.patch.object(verdict_cache, "check_validity_of") as check:
+            valid2, model2 = cache.check(Parser().parse_text("(b|a)->b"))
+            check.assert_not_called()
+        self.assertFalse(valid2)
+        self.assertEqual([world.values for world in model2.worlds], [["a"]])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_counts_from_threads(self):
+        cache = VerdictCache(maxsize=4)
+        formulas = [Parser().parse_text(text) for text in ["p->p", "p^q->p", "p|~p", "◇p->◻p", "q->(p->q)"] * 40]
+        switch = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(cache.check, formulas))
+        finally:
+            sys.setswitchinterval(switch)
+        self.assertEqual(cache.hits + cache.misses, len(formulas))
+
+    def test_lru_eviction(self):
+        cache = VerdictCache(maxsize=2)
+        for text in ["p->p", "p^q->p", "p|~p"]:
+            cache.check(Parser().parse_text(text))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(Parser().parse_text("p->p")))
+        self.assertIsNotNone(cache.get(Parser().parse_text("p|~p")))
+
+    def test_minimized_models(self):
+        cache = VerdictCache(minimize=True)
+        _, model = cache.check(Parser().parse_text("◇(p|q)^◇p -> ◻q"))
+        self.assertEqual(len(model.worlds), 4)
+        _, model = cache.get(Parser().parse_text("◇(p|q)^◇p -> ◻q"))
+        self.assertEqual(len(model.worlds), 3)
+
+    def test_on_disk_store(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "verdicts.db")
+            with VerdictCache(path=path) as cache:
+                cache.check(Parser().parse_text("◇p->◻p"))
+            with VerdictCache(path=path) as cache:
+                valid, model = cache.get(Parser().parse_text("◇x->◻x"))
+                self.assertFalse(valid)
+                self.assertEqual(len(model.worlds), 3)
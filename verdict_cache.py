@@ -0,0 +1,346 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import bisimulation
+from parse import Node
+from tableau_procedure import UNKNOWN, KripkeModel, check_validity_of
+
+# Connectives whose operands can be reordered without changing the formula.
+COMMUTATIVE = {"AND", "OR"}
+
+
+def shape_digests(formula: Node) -> dict:
+    """
+    Computes a digest of the shape of every subformula.
+
+    The shape of a formula is the formula with every variable replaced by the
+    same placeholder and the operands of ∧ and ∨ sorted, so alpha-renamed and
+    reordered variants of a formula have the same shape. The digests do not
+    depend on the process, so keys built from them can be stored on disk.
+
+    Parameters
+    ----------
+    formula: Node
+        Formula to measure.
+
+    Returns
+    -------
+    dict
+        Digest of every subformula, by node.
+
+    """
+    digests = {}
+    stack = [formula]
+    while stack:
+        node = stack[-1]
+        if node in digests:
+            stack.pop()
+            continue
+        pending = [arg for arg in node.args if arg not in digests]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        children = [digests[arg] for arg in node.args]
+        if node.type in COMMUTATIVE:
+            children.sort()
+        digest = hashlib.blake2b(node.type.encode(), digest_size=16)
+        for child in children:
+            digest.update(child)
+        digests[node] = digest.digest()
+    return digests
+
+
+def canonical_key(formula: Node) -> tuple:
+    """
+    Computes the canonical key of a formula.
+
+    Operands of ∧ and ∨ are visited in the order of their shape digests and
+    variables are renamed v0, v1, ... in the order they are then first met.
+    Formulas that only differ by such renamings and reorderings get the same
+    key and have the same validity.
+
+    Parameters
+    ----------
+    formula: Node
+        Formula to key.
+
+    Returns
+    -------
+    tuple
+        Key and mapping of the variables of formula to their canonical names.
+
+    """
+    digests = shape_digests(formula)
+    renaming = {}
+    hasher = hashlib.blake2b(digest_size=32)
+    stack = [formula]
+    while stack:
+        node = stack.pop()
+        if node.type == "VARIABLE":
+            if node.value not in renaming:
+                renaming[node.value] = f"v{len(renaming)}"
+            hasher.update(f"{renaming[node.value]};".encode())
+            continue
+        hasher.update(f"{node.type}/{len(node.args)};".encode())
+        args = node.args
+        if node.type in COMMUTATIVE:
+            args = sorted(args, key=digests.__getitem__)
+        stack.extend(reversed(args))
+    return hasher.hexdigest(), renaming
+
+
+def dump_model(model: KripkeModel, renaming: dict) -> str:
+    """
+    Serializes a model, with the variables renamed.
+
+    Parameters
+    ----------
+    model: KripkeModel
+        Model to serialize.
+    renaming: dict
+        Mapping of variable names.
+
+    Returns
+    -------
+    str
+        JSON text of the model.
+
+    """
+    worlds = [[world.name, [renaming.get(value, value) for value in world.values]] for world in model.worlds]
+    return json.dumps({"worlds": worlds, "relations": model.relations}, ensure_ascii=False)
+
+
+def load_model(text: str, renaming: dict) -> KripkeModel:
+    """
+    Deserializes a model, with the variables renamed.
+
+    Parameters
+    ----------
+    text: str
+        JSON text of the model.
+    renaming: dict
+        Mapping of variable names.
+
+    Returns
+    -------
+    KripkeModel
+        New model.
+
+    """
+    data = json.loads(text)
+    model = KripkeModel()
+    for name, values in data["worlds"]:
+        id = model.new_world(name)
+        for value in values:
+            model.add_variable(id, renaming.get(value, value))
+    for name, related in data["relations"].items():
+        for name2 in related:
+            model.add_relation(name, name2)
+    return model
+
+
+class VerdictCache:
+    """
+    Encapsulate a cache of validity verdicts in front of check_validity_of.
+
+    Verdicts are keyed on the canonical key of the formula, so alpha-renamed
+    variants and reorderings of ∧ and ∨ hit the same entry. The countermodel
+    is kept with the verdict and a hit returns a new copy of it, with the
+    variables of the formula asked about. The most recently used entries stay
+    in memory; with a path, every verdict is also stored in an sqlite file
+    that outlives the process.
+
+    Attributes
+    ----------
+    maxsize: int
+        Number of verdicts kept in memory.
+    entries: OrderedDict
+        Verdicts in memory, least recently used first.
+    connection: sqlite3.Connection
+        On-disk store, or None.
+    hits: int
+        Number of lookups answered from the cache, counted under lock.
+    misses: int
+        Number of lookups not answered from the cache, counted under lock.
+    minimize: bool
+        Store countermodels minimized up to bisimulation.
+
+    Methods
+    -------
+    remember(self, key, entry)
+        Keeps an entry in memory, evicting the least recently used one.
+    get(self, formula)
+        Returns the cached verdict of formula.
+    put(self, formula, valid, model)
+        Stores the verdict of formula.
+    check(self, formula, **options)
+        Checks the validity of formula through the cache.
+    clear(self)
+        Forgets every verdict.
+    close(self)
+        Closes the on-disk store.
+
+    """
+
+    def __init__(self, maxsize: int = 1024, path: str = None, minimize: bool = False):
+        self.maxsize = maxsize
+        self.minimize = minimize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.connection = None
+        if path is not None:
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS verdicts (key TEXT PRIMARY KEY, valid INTEGER, model TEXT)")
+            self.connection.commit()
+
+    def __enter__(self) -> 'VerdictCache':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def remember(self, key: str, entry: tuple) -> None:
+        """
+        Keeps an entry in memory, evicting the least recently used one.
+
+        Parameters
+        ----------
+        key: str
+            Canonical key.
+        entry: tuple
+            Validity and serialized model.
+
+        Returns
+        -------
+        None
+
+        """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def get(self, formula: Node) -> tuple:
+        """
+        Returns the cached verdict of formula.
+
+        Parameters
+        ----------
+        formula: Node
+            Formula to look up.
+
+        Returns
+        -------
+        tuple
+            Validity of Formula and Model, or None if it is not cached.
+
+        """
+        key, renaming = canonical_key(formula)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            elif self.connection is not None:
+                row = self.connection.execute("SELECT valid, model FROM verdicts WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = (bool(row[0]), row[1])
+                    self.remember(key, entry)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            return None
+        inverse = {canonical: name for name, canonical in renaming.items()}
+        return entry[0], load_model(entry[1], inverse)
+
+    def put(self, formula: Node, valid: bool, model: KripkeModel) -> None:
+        """
+        Stores the verdict of formula.
+
+        Parameters
+        ----------
+        formula: Node
+            Checked formula.
+        valid: bool
+            Validity of formula.
+        model: KripkeModel
+            Model returned with the verdict.
+
+        Returns
+        -------
+        None
+
+        """
+        key, renaming = canonical_key(formula)
+        if self.minimize and not valid:
+            model = bisimulation.minimize(model)[0]
+        entry = (bool(valid), dump_model(model, renaming))
+        with self.lock:
+            self.remember(key, entry)
+            if self.connection is not None:
+                self.connection.execute("INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?)", (key, int(entry[0]), entry[1]))
+                self.connection.commit()
+
+    def check(self, formula: Node, **options) -> tuple:
+        """
+        Checks the validity of formula through the cache.
+
+        Parameters
+        ----------
+        formula: Node
+            Formula to check.
+        options: dict
+            Options of check_validity_of used on a miss.
+
+        Returns
+        -------
+        tuple
+            Validity of Formula and Model, or UNKNOWN and the Budget, which
+            are not cached.
+
+        """
+        cached = self.get(formula)
+        if cached is not None:
+            return cached
+        valid, model = check_validity_of(formula, **options)
+        if valid is not UNKNOWN:
+            self.put(formula, valid, model)
+        return valid, model
+
+    def clear(self) -> None:
+        """
+        Forgets every verdict, in memory and on disk.
+
+        Returns
+        -------
+        None
+
+        """
+        with self.lock:
+            self.entries.clear()
+            if self.connection is not None:
+                self.connection.execute("DELETE FROM verdicts")
+                self.connection.commit()
+
+    def close(self) -> None:
+        """
+        Closes the on-disk store.
+
+        Returns
+        -------
+        None
+
+        """
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None